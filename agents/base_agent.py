@@ -1,5 +1,6 @@
 from abc import ABC
 import json
+import logging
 from typing import Dict, List, Optional, Union, Tuple
 from time import sleep
 from random import uniform
@@ -9,9 +10,13 @@ import requests
 import google.auth
 import google.auth.transport.requests
 from openai import OpenAI, AzureOpenAI
-from colorama import Fore, Style
 from azure.ai.inference import ChatCompletionsClient
 from azure.core.credentials import AzureKeyCredential
+from time import monotonic
+from scheduler import get_scheduler
+from ledger import get_ledger
+from utils import count_tokens, count_message_tokens
+from prompt_budget import component_values, fit_messages
 
 class APICallError(Exception):
     """Custom exception for API call failures"""
@@ -26,6 +31,7 @@ class BaseAgent:
         "model": "model-name",                                # Required: Model identifier
         "temperature": 0.7,                                   # Required: Temperature for sampling
         "max_retries": 3,                                     # Optional: Number of retries (default: 3)
+        "max_prompt_tokens": 30000,                           # Optional: Trim low-priority prompt parts to fit (--max-prompt-tokens)
         
         # Provider-specific configurations
         "project_id": "your-project",           # Required for Google
@@ -52,6 +58,9 @@ class BaseAgent:
         self.config = config
         self.provider = config['provider']
         self.max_retries = config.get('max_retries', 3)
+        # One entry per call whose prompt was trimmed to max_prompt_tokens, saved with the claim's results
+        self.prompt_trims: List[Dict] = []
+        self._budget_calls = 0
 
         # Initialize client
         try:
@@ -122,7 +131,8 @@ class BaseAgent:
         Returns:
             Either string response or tuple of (response, messages) if return_messages=True
         """
-        print(f'{Fore.GREEN}Model is {self.model}, temperature is {temperature}{Style.RESET_ALL}')
+        logging.debug("Model is %s, temperature is %s", self.model, temperature)
+        messages = self.fit_prompt_budget(messages)
         
         # Provider-specific configurations
         provider_configs = {
@@ -141,103 +151,154 @@ class BaseAgent:
         # breakpoint()
         
         for attempt in range(self.max_retries):
+            start = None
             try:
                 # Add retry delay if needed
                 if attempt > 0:
                     delay = config['retry_delay'] * attempt + uniform(0, config['jitter'])
-                    print(f"\nRetry attempt {attempt + 1}/{self.max_retries}. Waiting {delay:.2f}s...")
+                    logging.warning(f"Retry attempt {attempt + 1}/{self.max_retries} for {self.provider}. Waiting {delay:.2f}s...")
                     sleep(delay)
 
-                # Get response based on provider
-                if self.provider == 'openai':
-                    if any(f'o{i}' in self.model for i in range(1, 6)):  # handles o1, o2, o3, o4, o5
-                        response = self._call_openai_o1_model(messages)
-                    else:
-                        api_params = {
-                            "model": self.model,
-                            "messages": messages,
-                            "temperature": temperature
-                        }
-                        if response_format:
-                            api_params["response_format"] = response_format
-                        response = self.client.chat.completions.create(**api_params)
-                        response = response.choices[0].message.content
-                elif self.provider == 'openrouter':
-                    # Setup extra headers for OpenRouter if provided
-                    extra_headers = {}
-                    if self.http_referer:
-                        extra_headers["HTTP-Referer"] = self.http_referer
-                    if self.x_title:
-                        extra_headers["X-Title"] = self.x_title
-                    
-                    api_params = {
-                        "model": self.model,
-                        "messages": messages,
-                        "temperature": temperature
-                    }
-                    if response_format:
-                        api_params["response_format"] = response_format
-                    if extra_headers:
-                        api_params["extra_headers"] = extra_headers
-                        
-                    response = self.client.chat.completions.create(**api_params)
-                    response = response.choices[0].message.content
-                elif self.provider == 'azure':
-                    payload = {
-                        "messages": messages
-                    }
-                    response = self.client.complete(payload)
-                    response = response.choices[0].message.content
-                elif self.provider == 'google' and 'meta' in self.model:
-                    response = self._call_google_meta_api(messages, temperature)
-                elif self.provider == 'sglang':
-                    response = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=messages,
-                        temperature=temperature,
-                        max_tokens=2048
-                    )
-                    response = response.choices[0].message.content
-                elif self.provider == 'azure_openai':
-                    try:
-                        print(f"Making API call to Azure OpenAI with model: {self.model}")
-                        response = self.client.chat.completions.create(
-                            model=self.model,
-                            messages=messages,
-                            temperature=temperature
-                        )
-                        response = response.choices[0].message.content
-                        print("API call successful")
-                    except Exception as e:
-                        print(f"Azure OpenAI API call failed: {str(e)}")
-                        raise
-                else:
-                    api_params = {
-                        "model": self.model,
-                        "messages": messages,
-                        "temperature": temperature
-                    }
-                    if response_format:
-                        api_params["response_format"] = response_format
-                        
-                    response = self.client.chat.completions.create(**api_params)
-                    response = response.choices[0].message.content
-
-                # Return based on return_messages flag
-                return (response, messages) if return_messages else response
+                # Only the request itself holds a provider slot, not the retry delay
+                with get_scheduler().slot(self.provider):
+                    start = monotonic()
+                    response = self._send_request(messages, temperature, response_format)
+                latency = monotonic() - start
 
             except Exception as e:
                 error_msg = str(e)
                 if hasattr(e, 'response'):
                     error_msg = f"Error code: {e.status_code} - {error_msg} - Response: {e.response}"
                 
-                print(f"\nAPI call failed for {self.provider} (Attempt {attempt + 1}/{self.max_retries})")
-                print(f"Error: {error_msg}")
+                logging.warning(f"API call failed for {self.provider} (Attempt {attempt + 1}/{self.max_retries}): {error_msg}")
+                if start is not None:
+                    self._record_call(messages, monotonic() - start, error=error_msg)
                 
                 if attempt == self.max_retries - 1:
                     raise APICallError(f"Failed to get response from {self.provider}: {error_msg}")
                 continue
 
+            # Recorded outside the try, so a ledger failure is never retried (and billed) as a failed call
+            self._record_call(messages, latency, response=response)
+
+            # Return based on return_messages flag
+            return (response, messages) if return_messages else response
+
+    def fit_prompt_budget(self, messages: List[Dict]) -> List[Dict]:
+        """Trim the lowest-priority prompt components (thinking advice, sources, old rounds) to fit `max_prompt_tokens`."""
+        budget = self.config.get('max_prompt_tokens')
+        if not budget:
+            return messages
+        self._budget_calls += 1
+        # Earlier messages hold earlier values of the components, so remember them all
+        self._prompt_components = component_values(getattr(self, 'context', {}), getattr(self, '_prompt_components', ()))
+        fitted, trimmed = fit_messages(messages, self._prompt_components, budget)
+        if trimmed:
+            prompt_tokens, fitted_tokens = count_message_tokens(messages), count_message_tokens(fitted)
+            self.prompt_trims.append({
+                'call': self._budget_calls,
+                'budget': budget,
+                'prompt_tokens': prompt_tokens,
+                'sent_tokens': fitted_tokens,
+                'trimmed': trimmed
+            })
+            note = '' if fitted_tokens <= budget else ', still over budget after trimming everything allowed'
+            logging.warning(f"Prompt of {prompt_tokens} tokens trimmed to "
+                            f"{fitted_tokens} (budget {budget}): shortened {', '.join(trimmed)}{note}")
+        return fitted
+
+    def _record_call(self, messages: List[Dict], latency: float, response: Optional[str] = None, error: Optional[str] = None) -> None:
+        """Record a call's latency and token counts in the call ledger; a ledger failure only logs a warning."""
+        try:
+            get_ledger().record(
+                provider=self.provider,
+                model=self.config['model'],
+                latency=latency,
+                prompt_tokens=count_message_tokens(messages),
+                completion_tokens=count_tokens(response),
+                error=error
+            )
+        except OSError as e:
+            logging.warning(f"Could not record the {self.provider} call in the ledger: {e}")
+
+    def _send_request(self, messages: List[Dict], temperature: float, response_format: Optional[Dict] = None) -> str:
+        """Send a single request to the configured provider and return the response text."""
+        if self.provider == 'openai':
+            if any(f'o{i}' in self.model for i in range(1, 6)):  # handles o1, o2, o3, o4, o5
+                response = self._call_openai_o1_model(messages)
+            else:
+                api_params = {
+                    "model": self.model,
+                    "messages": messages,
+                    "temperature": temperature
+                }
+                if response_format:
+                    api_params["response_format"] = response_format
+                response = self.client.chat.completions.create(**api_params)
+                response = response.choices[0].message.content
+        elif self.provider == 'openrouter':
+            # Setup extra headers for OpenRouter if provided
+            extra_headers = {}
+            if self.http_referer:
+                extra_headers["HTTP-Referer"] = self.http_referer
+            if self.x_title:
+                extra_headers["X-Title"] = self.x_title
+            
+            api_params = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": temperature
+            }
+            if response_format:
+                api_params["response_format"] = response_format
+            if extra_headers:
+                api_params["extra_headers"] = extra_headers
+                
+            response = self.client.chat.completions.create(**api_params)
+            response = response.choices[0].message.content
+        elif self.provider == 'azure':
+            payload = {
+                "messages": messages
+            }
+            response = self.client.complete(payload)
+            response = response.choices[0].message.content
+        elif self.provider == 'google' and 'meta' in self.model:
+            response = self._call_google_meta_api(messages, temperature)
+        elif self.provider == 'sglang':
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=2048
+            )
+            response = response.choices[0].message.content
+        elif self.provider == 'azure_openai':
+            try:
+                logging.debug("Making API call to Azure OpenAI with model: %s", self.model)
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=temperature
+                )
+                response = response.choices[0].message.content
+                logging.debug("API call successful")
+            except Exception as e:
+                logging.warning(f"Azure OpenAI API call failed: {str(e)}")
+                raise
+        else:
+            api_params = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": temperature
+            }
+            if response_format:
+                api_params["response_format"] = response_format
+                
+            response = self.client.chat.completions.create(**api_params)
+            response = response.choices[0].message.content
+
+        return response
+
     def _call_google_meta_api(self, messages: List[Dict], temperature: float) -> str:
         """Handle Google-hosted Meta models."""
         credentials, _ = google.auth.default(scopes=["https://www.googleapis.com/auth/cloud-platform"])
@@ -264,7 +325,7 @@ class BaseAgent:
     def _call_openai_o1_model(self, messages: List[Dict]) -> str:
         """Handle OpenAI o1 models which only accept user messages."""
         # Warning about message handling
-        print("\nWarning: OpenAI o1 model only accepts user messages. System messages will be ignored.")
+        logging.warning("OpenAI o1 model only accepts user messages. System messages will be ignored.")
         
         # Format message for o1 model
         formatted_messages = [{
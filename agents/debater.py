@@ -1,6 +1,6 @@
 from typing import Dict
-import yaml
 from agents.base_agent import BaseAgent
+from prompt_templates import PromptTemplate, load_prompt_templates
 import json
 
 class Debater(BaseAgent):
@@ -14,7 +14,7 @@ class Debater(BaseAgent):
         self.messages = []
         self._load_prompt_templates()
 
-    def _format_prompt(self, prompt: str) -> str:
+    def _format_prompt(self, prompt: PromptTemplate) -> str:
         """Format prompt with context variables."""
         return prompt.format(
             **self.context,
@@ -23,20 +23,26 @@ class Debater(BaseAgent):
         )
 
     def _load_prompt_templates(self) -> None:
-        """Load prompt templates from YAML file."""
-        with open(self.config['prompt_path'], 'r') as file:
-            prompts = yaml.safe_load(file)['prompts']
-            first_round = prompts['first_round_messages']
-            
-            self.prompts = {
-                'first_round': {
-                    'system': first_round[0]['content'],
-                    'user1': first_round[1]['content'],
-                    'assistant': first_round[2]['content'],
-                    'user2': first_round[3]['content']
-                },
-                'nth_round': prompts['nth_round_messages'][0]['content']
-            }
+        """Load the compiled prompt templates for this agent's prompt file."""
+        prompts = load_prompt_templates(self.config['prompt_path'])
+        first_round = prompts['first_round_messages']
+        
+        self.prompts = {
+            'first_round': {
+                'system': first_round[0]['content'],
+                'user1': first_round[1]['content'],
+                'assistant': first_round[2]['content'],
+                'user2': first_round[3]['content']
+            },
+            'nth_round': prompts['nth_round_messages'][0]['content']
+        }
+
+    def _system_prompt(self) -> str:
+        """Format the system prompt, led by the shared claim and sources block if present."""
+        system = self._format_prompt(self.prompts['first_round']['system'])
+        if self.context.get('SHARED_PREFIX'):
+            return f"{self.context['SHARED_PREFIX']}\n\n{system}"
+        return system
 
     def get_response(self, round_num: int) -> str:
         """Get debater's response for the specified round."""
@@ -52,7 +58,7 @@ class Debater(BaseAgent):
         """Prepare messages for the current round."""
         if round_num == 1:
             self.messages = [
-                {"role": "system", "content": self._format_prompt(self.prompts['first_round']['system'])},
+                {"role": "system", "content": self._system_prompt()},
                 {"role": "user", "content": self._format_prompt(self.prompts['first_round']['user1'])},
                 {"role": "assistant", "content": self._format_prompt(self.prompts['first_round']['assistant'])},
                 {"role": "user", "content": self._format_prompt(self.prompts['first_round']['user2'])}
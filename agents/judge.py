@@ -1,6 +1,6 @@
 from typing import Dict
-import yaml
 from agents.base_agent import BaseAgent
+from prompt_templates import PromptTemplate, load_prompt_templates
 
 class Judge(BaseAgent):
     """Judge agent that evaluates arguments."""
@@ -13,24 +13,32 @@ class Judge(BaseAgent):
         self.messages = []
         self._load_prompt_templates()
 
-    def _format_prompt(self, prompt: str) -> str:
+    def _format_prompt(self, prompt: PromptTemplate) -> str:
         """Format prompt with context variables."""
         return prompt.format(**self.context)
 
     def _load_prompt_templates(self) -> None:
-        """Load prompt templates from YAML file."""
-        with open(self.config['prompt_path'], 'r') as file:
-            prompts = yaml.safe_load(file)['prompts']
-            
-            self.prompts = {
-                'system': prompts['system']['messages'][0]['content'],
-                'intermediate': prompts['intermediate']['messages'][0]['content'],
-                'final': prompts['final']['messages'][0]['content']
-            }
+        """Load the compiled prompt templates for this agent's prompt file."""
+        prompts = load_prompt_templates(self.config['prompt_path'])
+        
+        self.prompts = {
+            'system': prompts['system']['messages'][0]['content'],
+            'intermediate': prompts['intermediate']['messages'][0]['content'],
+            'final': prompts['final']['messages'][0]['content']
+        }
+        
+        # Optional instruction asking for a provisional verdict on intermediate turns
+        if self.config.get('provisional_prompt_path'):
+            prompts = load_prompt_templates(self.config['provisional_prompt_path'])
+            self.prompts['provisional'] = prompts['provisional_verdict']['messages'][0]['content']
 
-    def get_response(self, round_num: int) -> str:
-        """Get judge's response for the specified round."""
-        self._prepare_messages(round_num)
+    def get_response(self, round_num: int, final: bool = False) -> str:
+        """Get judge's response for the specified round.
+        
+        The runner passes `final=True` to request the final verdict, in its
+        last round or earlier when the debate is stopped early.
+        """
+        self._prepare_messages(round_num, final)
         response = self.call_api(
             messages=self.messages,
             temperature=self.config.get('temperature', 0)
@@ -38,16 +46,23 @@ class Judge(BaseAgent):
         self.messages.append({"role": "assistant", "content": response})
         return response
     
-    def _prepare_messages(self, round_num: int) -> None:
+    def _intermediate_prompt(self) -> str:
+        """Format the intermediate prompt, with the provisional verdict request if enabled."""
+        prompt = self._format_prompt(self.prompts['intermediate'])
+        if 'provisional' in self.prompts:
+            prompt = f"{prompt.rstrip()}\n\n{self.prompts['provisional'].text}"
+        return prompt
+    
+    def _prepare_messages(self, round_num: int, final: bool = False) -> None:
         """Prepare messages for the current round."""
         if round_num == 1:
             self.messages = [
                 {"role": "system", "content": self._format_prompt(self.prompts['system'])},
-                {"role": "user", "content": self._format_prompt(self.prompts['intermediate'])}
+                {"role": "user", "content": self._intermediate_prompt()}
             ]
         else:
-            prompt = self.prompts['final'] if round_num == 3 else self.prompts['intermediate']
+            prompt = self._format_prompt(self.prompts['final']) if final else self._intermediate_prompt()
             self.messages.append({
                 "role": "user", 
-                "content": self._format_prompt(prompt)
+                "content": prompt
             })
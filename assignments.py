@@ -0,0 +1,136 @@
+import argparse
+import json
+import logging
+import os
+from collections.abc import Sequence
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+from claim_store import DATASET_PATHS, ClaimStore, claim_hash, load_claims, store_path_for
+
+INDEX_DIR = Path('data/assignments')
+
+def participant_dir(mode: str) -> Path:
+    """Directory of the legacy per-participant claim files for a mode."""
+    return Path(f"./{mode}-claim-assignment-by-participant")
+
+def participant_path(mode: str, prolific_id: str, dataset: str) -> Path:
+    """Legacy per-participant claims file, a full copy of that participant's claims."""
+    return participant_dir(mode) / f"{prolific_id}_{dataset}.json"
+
+def index_path(mode: str) -> Path:
+    """Assignment index for a mode: {dataset: {prolific_id: [claim hash, ...]}}."""
+    return INDEX_DIR / f"{mode}.json"
+
+class AssignedClaims(Sequence):
+    """A participant's claims, resolved by claim hash against the shared dataset.
+
+    Nothing is copied: each item is fetched from the dataset (usually a
+    memory-mapped ClaimStore) when requested.
+    """
+
+    def __init__(self, claims: Sequence, hashes: List[str]):
+        """Resolve the claim hashes to positions in the dataset."""
+        self.claims = claims
+        if isinstance(claims, ClaimStore):
+            self.positions = [claims.position_of(hash_hex) for hash_hex in hashes]
+        else:
+            positions = {claim_hash(claim_data['claim']): i for i, claim_data in enumerate(claims)}
+            self.positions = [positions[hash_hex] for hash_hex in hashes]
+
+    def __len__(self) -> int:
+        """Number of assigned claims."""
+        return len(self.positions)
+
+    def __getitem__(self, position):
+        """Get an assigned claim, or a list of them for a slice."""
+        if isinstance(position, slice):
+            return [self.claims[i] for i in self.positions[position]]
+        return self.claims[self.positions[position]]
+
+@lru_cache(maxsize=None)
+def _load_index(path: Path, mtime_ns: int) -> Dict[str, Dict[str, List[str]]]:
+    """Parse an assignment index (cached per file version)."""
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def load_assignment_index(mode: str) -> Dict[str, Dict[str, List[str]]]:
+    """Get the assignment index for a mode, or an empty index if none was built."""
+    path = index_path(mode)
+    if not path.exists():
+        return {}
+    return _load_index(path, path.stat().st_mtime_ns)
+
+@lru_cache(maxsize=None)
+def _load_dataset(dataset: str) -> Sequence:
+    """Load a dataset once per process, however many participants reference it."""
+    return load_claims(dataset)
+
+def load_assigned_claims(mode: str, prolific_id: str, dataset: str) -> Sequence:
+    """Load the claims assigned to a participant.
+
+    Uses the assignment index when it covers the participant, and falls back
+    to the legacy per-participant file otherwise.
+    """
+    hashes = load_assignment_index(mode).get(dataset, {}).get(prolific_id)
+    if hashes is None:
+        return load_claims(str(participant_path(mode, prolific_id, dataset)))
+    return AssignedClaims(_load_dataset(dataset), hashes)
+
+def build_index(mode: str, datasets: List[str]) -> Tuple[Dict, int]:
+    """Build the assignment index from the per-participant files of a mode.
+
+    Participants with a claim missing from the shared dataset are left out,
+    so they keep loading from their own file. Returns the index and the
+    total size of the per-participant files it covers.
+    """
+    index = {}
+    covered_bytes = 0
+    for dataset in datasets:
+        dataset_hashes = {claim_hash(claim_data['claim']) for claim_data in load_claims(dataset)}
+        participants = {}
+        for path in sorted(participant_dir(mode).glob(f"*_{dataset}.json")):
+            prolific_id = path.name[:-len(f"_{dataset}.json")]
+            with open(path, 'r') as f:
+                hashes = [claim_hash(claim_data['claim']) for claim_data in json.load(f)]
+            missing = [hash_hex for hash_hex in hashes if hash_hex not in dataset_hashes]
+            if missing:
+                logging.warning(f"Skipping {path}: {len(missing)} claims not in the {dataset} dataset")
+                continue
+            participants[prolific_id] = hashes
+            covered_bytes += path.stat().st_size
+        index[dataset] = participants
+        logging.info(f"{mode}/{dataset}: indexed {len(participants)} participants")
+    return index, covered_bytes
+
+def write_index(mode: str, index: Dict) -> Path:
+    """Atomically write the assignment index for a mode."""
+    path = index_path(mode)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_path, path)
+    return path
+
+def main():
+    """Build participant-to-claim assignment indexes from the per-participant claim files."""
+    parser = argparse.ArgumentParser(description='Build participant-to-claim assignment indexes')
+    parser.add_argument('modes', nargs='*', default=['debate', 'consultancy'], help='Modes to index')
+    parser.add_argument('--datasets', nargs='+', default=list(DATASET_PATHS), help='Datasets to index')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    for mode in args.modes:
+        if not participant_dir(mode).exists():
+            logging.warning(f"Skipping {mode}: {participant_dir(mode)} not found")
+            continue
+        datasets = [dataset for dataset in args.datasets
+                    if any(path.exists() for path in (Path(DATASET_PATHS.get(dataset, dataset)), store_path_for(DATASET_PATHS.get(dataset, dataset))))]
+        index, covered_bytes = build_index(mode, datasets)
+        path = write_index(mode, index)
+        print(f"{mode}: wrote {path} ({path.stat().st_size:,} bytes) replacing "
+              f"{covered_bytes:,} bytes of per-participant claim copies")
+
+if __name__ == "__main__":
+    main()
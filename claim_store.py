@@ -0,0 +1,379 @@
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from source_registry import SOURCE_REF, get_source_registry
+
+DATASET_PATHS = {
+    'covid': 'data/final-data/enriched_covid_data_15.json',
+    'climate': 'data/final-data/enriched_climate_data_15.json'
+}
+
+# Sources per side shown to the agents and saved with the results
+SOURCES_PER_SIDE = 7
+
+# Claim fields holding lists of sources, stored as references into the source registry
+SOURCE_LIST_FIELDS = ('supporting_sources', 'opposing_sources')
+
+STORE_SUFFIX = '.claims'
+MAGIC = b'CLAIMS05'
+# magic, claim count, index offset, size of the source registry file once the store's sources were written to it
+HEADER = struct.Struct('<8sQQQ')
+# record offset, record length, sha256 of the claim text
+INDEX_ENTRY = struct.Struct('<QQ32s')
+# number of fields in a record
+RECORD_HEADER = struct.Struct('<I')
+# field name length, encoded value length
+FIELD_ENTRY = struct.Struct('<HI')
+
+def claim_hash(claim: str) -> str:
+    """Stable identifier of a claim: the sha256 hex digest of its text."""
+    return hashlib.sha256(claim.encode('utf-8')).hexdigest()
+
+def store_path_for(json_path: Union[str, Path]) -> Path:
+    """Path of the compiled store next to a claims JSON file."""
+    return Path(json_path).with_suffix(STORE_SUFFIX)
+
+def encode_record(claim_data: Dict) -> bytes:
+    """Encode a claim with each field as its own JSON value, so fields decode independently.
+
+    Sources are interned in the source registry and stored as references, so
+    an article cited by many claims is stored once.
+    """
+    registry = get_source_registry()
+    parts = [RECORD_HEADER.pack(len(claim_data))]
+    for name, value in claim_data.items():
+        if name in SOURCE_LIST_FIELDS and isinstance(value, list):
+            value = [registry.ref(source) for source in value]
+        name_bytes = name.encode('utf-8')
+        value_bytes = json.dumps(value, ensure_ascii=False).encode('utf-8')
+        parts.extend([FIELD_ENTRY.pack(len(name_bytes), len(value_bytes)), name_bytes, value_bytes])
+    return b''.join(parts)
+
+def compile_store(json_path: Union[str, Path], store_path: Optional[Union[str, Path]] = None) -> Path:
+    """Compile a claims JSON file into an indexed store.
+
+    Layout: a fixed header, one record per claim, then an index of
+    (offset, length, claim hash) per claim, so a single claim can be read
+    without parsing the rest of the file. Each record stores every field as
+    a separately encoded JSON value, with sources referenced by ID. The
+    header records the source registry's size after compiling; the
+    registry is append-only, so any registry at least that large holds
+    every referenced source.
+    """
+    json_path = Path(json_path)
+    store_path = Path(store_path) if store_path else store_path_for(json_path)
+    with open(json_path, 'r') as f:
+        claims = json.load(f)
+
+    tmp_path = store_path.with_suffix(f'{STORE_SUFFIX}.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, 0, 0, 0))
+        index = []
+        for claim_data in claims:
+            record = encode_record(claim_data)
+            index.append(INDEX_ENTRY.pack(f.tell(), len(record), bytes.fromhex(claim_hash(claim_data['claim']))))
+            f.write(record)
+        index_offset = f.tell()
+        f.write(b''.join(index))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(claims), index_offset, get_source_registry().size()))
+    # Swap in atomically so concurrent readers never see a half-written store
+    os.replace(tmp_path, store_path)
+    logging.info(f"Compiled {len(claims)} claims from {json_path} into {store_path}")
+    return store_path
+
+def missing_source_error(error: KeyError) -> RuntimeError:
+    """The error for a source missing from the registry.
+
+    A RuntimeError rather than the registry's KeyError, so Mapping.get
+    cannot mistake a missing source for an absent field.
+    """
+    return RuntimeError(f"{error.args[0]}; recompile the claim store with `python claim_store.py`")
+
+class ClaimRecord(Mapping):
+    """Read-only view of one claim in the store that decodes each field on first access.
+
+    Holding a record keeps only the fields actually used (e.g. 'claim' and the
+    sources) as Python objects; the rest stays as bytes in the shared mapping.
+    """
+
+    def __init__(self, buffer: memoryview):
+        """Initialize the view over the record's bytes."""
+        self._buffer = buffer
+        self._fields = None
+        self._values = {}
+
+    def _field_table(self) -> Dict[str, tuple]:
+        """Map field names to the (offset, length) of their encoded values."""
+        if self._fields is None:
+            fields = {}
+            (count,) = RECORD_HEADER.unpack_from(self._buffer, 0)
+            offset = RECORD_HEADER.size
+            for _ in range(count):
+                name_length, value_length = FIELD_ENTRY.unpack_from(self._buffer, offset)
+                offset += FIELD_ENTRY.size
+                name = bytes(self._buffer[offset:offset + name_length]).decode('utf-8')
+                offset += name_length
+                fields[name] = (offset, value_length)
+                offset += value_length
+            self._fields = fields
+        return self._fields
+
+    def __getitem__(self, name: str):
+        """Decode and return a field, expanding source references."""
+        if name not in self._values:
+            offset, length = self._field_table()[name]
+            value = json.loads(bytes(self._buffer[offset:offset + length]))
+            if name in SOURCE_LIST_FIELDS and isinstance(value, list):
+                registry = get_source_registry()
+                try:
+                    value = [registry.resolve(source) for source in value]
+                except KeyError as e:
+                    raise missing_source_error(e) from e
+            self._values[name] = value
+        return self._values[name]
+
+    def source_refs(self, name: str) -> List[Dict]:
+        """The stored `{'$source': id, ...}` references of a source list field, without reading the sources."""
+        if name not in self._field_table():
+            return []
+        offset, length = self._field_table()[name]
+        return json.loads(bytes(self._buffer[offset:offset + length]))
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over field names in their original order."""
+        return iter(self._field_table())
+
+    def __len__(self) -> int:
+        """Number of fields."""
+        return len(self._field_table())
+
+    def to_dict(self) -> Dict:
+        """Decode every field into a plain dict."""
+        return {name: self[name] for name in self}
+
+class ClaimStore(Sequence):
+    """Read-only list of claims backed by a memory-mapped store file.
+
+    The file is mapped on first access. All processes reading the same store
+    share its pages through the OS page cache, and each claim is a
+    ClaimRecord whose fields are decoded only when requested.
+
+    Usage:
+        claims = ClaimStore('data/final-data/enriched_covid_data_15.claims')
+        first = claims[0]                     # nothing decoded yet
+        text = first['claim']                 # decodes just this field
+        same = claims.by_hash(claim_hash(text))
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """Initialize the store without reading it yet."""
+        self.path = Path(path)
+        self._mmap = None
+        self._count = None
+        self._index_offset = None
+        self._positions = None
+
+    def _open(self) -> None:
+        """Map the file and read the header."""
+        if self._mmap is not None:
+            return
+        with open(self.path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, index_offset, _ = HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            mapped.close()
+            raise ValueError(f"{self.path} is not a compiled claim store")
+        self._count = count
+        self._index_offset = index_offset
+        self._mmap = mapped
+
+    def _index_entry(self, position: int) -> tuple:
+        """Read the (offset, length, hash) index entry of a claim."""
+        return INDEX_ENTRY.unpack_from(self._mmap, self._index_offset + position * INDEX_ENTRY.size)
+
+    def __len__(self) -> int:
+        """Number of claims in the store."""
+        self._open()
+        return self._count
+
+    def __getitem__(self, position):
+        """Get the claim at a position, or a list of claims for a slice."""
+        self._open()
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self._count))]
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError(f"claim {position} out of range")
+        offset, length, _ = self._index_entry(position)
+        return ClaimRecord(memoryview(self._mmap)[offset:offset + length])
+
+    def position_of(self, hash_hex: str) -> int:
+        """Position of the claim with the given claim hash."""
+        self._open()
+        if self._positions is None:
+            self._positions = {self._index_entry(i)[2].hex(): i for i in range(self._count)}
+        if hash_hex not in self._positions:
+            raise KeyError(f"No claim with hash {hash_hex} in {self.path}")
+        return self._positions[hash_hex]
+
+    def by_hash(self, hash_hex: str) -> ClaimRecord:
+        """Get a claim by its claim hash."""
+        return self[self.position_of(hash_hex)]
+
+    def close(self) -> None:
+        """Unmap the file. Records still referencing it must not be used afterwards."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+class ClaimView(NamedTuple):
+    """Compact, immutable view of a claim with exactly the fields the runners use.
+
+    Sources are trimmed to the top `SOURCES_PER_SIDE` per side and identified
+    by their source registry IDs. Claims from a compiled store already hold
+    the IDs; sources of raw JSON claims are registered in memory only, and
+    written to the registry by `save_sources` once results cite them.
+    """
+    claim: str
+    veracity: str
+    label: Optional[str]
+    evidence: Optional[str]
+    evidence_label: Optional[str]
+    article: Optional[str]
+    supporting_source_ids: Tuple[str, ...]
+    opposing_source_ids: Tuple[str, ...]
+    supporting_sources: Tuple[Dict, ...]
+    opposing_sources: Tuple[Dict, ...]
+
+    @classmethod
+    def from_claim(cls, claim_data: Mapping, top_k: Optional[int] = SOURCES_PER_SIDE) -> 'ClaimView':
+        """Build the view from a raw enriched claim, keeping `top_k` sources per side (all if None)."""
+        registry = get_source_registry()
+        if isinstance(claim_data, ClaimRecord):
+            supporting_ids, opposing_ids = (
+                tuple(ref[SOURCE_REF] for ref in claim_data.source_refs(name)[:top_k]) for name in SOURCE_LIST_FIELDS
+            )
+        else:
+            supporting_ids, opposing_ids = (
+                tuple(registry.intern(s, save=False) for s in claim_data[name][:top_k]) if name in claim_data else ()
+                for name in SOURCE_LIST_FIELDS
+            )
+        try:
+            supporting_sources = tuple(registry.get(sid) for sid in supporting_ids)
+            opposing_sources = tuple(registry.get(sid) for sid in opposing_ids)
+        except KeyError as e:
+            raise missing_source_error(e) from e
+        return cls(
+            claim=claim_data['claim'],
+            veracity=claim_data['veracity'],
+            label=claim_data.get('label'),
+            evidence=claim_data.get('evidence'),
+            evidence_label=claim_data.get('evidence_label'),
+            article=claim_data.get('article'),
+            supporting_source_ids=supporting_ids,
+            opposing_source_ids=opposing_ids,
+            supporting_sources=supporting_sources,
+            opposing_sources=opposing_sources
+        )
+
+    def top_sources(self, top_k: Optional[int]) -> 'ClaimView':
+        """The view with only its first `top_k` sources per side (all if None)."""
+        if top_k is None:
+            return self
+        return self._replace(
+            supporting_source_ids=self.supporting_source_ids[:top_k], supporting_sources=self.supporting_sources[:top_k],
+            opposing_source_ids=self.opposing_source_ids[:top_k], opposing_sources=self.opposing_sources[:top_k]
+        )
+
+    def save_sources(self) -> None:
+        """Write the view's sources to the source registry, before results cite their IDs."""
+        get_source_registry().save([*self.supporting_source_ids, *self.opposing_source_ids])
+
+    @property
+    def sources(self) -> List[Dict]:
+        """Supporting then opposing sources, as passed to the agents."""
+        return [*self.supporting_sources, *self.opposing_sources]
+
+class ClaimViews(Sequence):
+    """Lazy sequence of ClaimViews over a list of raw claims or a ClaimStore.
+
+    Each view is built when its claim is requested, so a run only decodes
+    and cleans the claims it actually processes.
+    """
+
+    def __init__(self, claims: Sequence, top_k: Optional[int] = SOURCES_PER_SIDE):
+        """Initialize over the raw claims."""
+        self.claims = claims
+        self.top_k = top_k
+
+    def __len__(self) -> int:
+        """Number of claims."""
+        return len(self.claims)
+
+    def __getitem__(self, position):
+        """Get the view at a position, or a list of views for a slice."""
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        return ClaimView.from_claim(self.claims[position], self.top_k)
+
+def is_store_fresh(json_path: Path, store_path: Path) -> bool:
+    """Whether a compiled store in the current format exists, is at least as new as its JSON source, and its sources are in the registry."""
+    if not store_path.exists():
+        return False
+    with open(store_path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+        return False
+    if json_path.exists() and store_path.stat().st_mtime < json_path.stat().st_mtime:
+        return False
+    registry = get_source_registry()
+    registry_size = HEADER.unpack(header)[3]
+    if registry.size() < registry_size:
+        logging.warning(f"{store_path} was compiled against a {registry_size:,}-byte {registry.path}, "
+                        f"which is now {registry.size():,} bytes and misses some of its sources")
+        return False
+    return True
+
+def load_claims(dataset: str) -> Union[ClaimStore, List[Dict]]:
+    """Load claims based on dataset type.
+
+    Uses the compiled store when it is up to date with the JSON file, so
+    claims are memory-mapped and decoded lazily; otherwise parses the JSON file.
+    """
+    path = Path(DATASET_PATHS.get(dataset) or dataset)
+    store_path = store_path_for(path)
+    if is_store_fresh(path, store_path):
+        return ClaimStore(store_path)
+    if store_path.exists() and not path.exists():
+        raise FileNotFoundError(f"{store_path} cannot be used and {path} to recompile it from is missing")
+
+    if dataset in DATASET_PATHS:
+        logging.warning(f"Parsing {path} in full; run `python claim_store.py` to compile an indexed store")
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def main():
+    """Compile claims JSON files into indexed stores."""
+    parser = argparse.ArgumentParser(description='Compile claims JSON files into indexed claim stores')
+    parser.add_argument('paths', nargs='*', help='Claims JSON files or dataset names (default: all datasets)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    for path in args.paths or list(DATASET_PATHS):
+        json_path = Path(DATASET_PATHS.get(path, path))
+        if not args.paths and not json_path.exists():
+            logging.warning(f"Skipping {json_path}: file not found")
+            continue
+        compile_store(json_path)
+
+if __name__ == "__main__":
+    main()
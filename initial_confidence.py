@@ -1,29 +1,20 @@
-import yaml
 import logging
 import argparse
-import json
 import re
 import tqdm
-import fcntl
-from typing import Dict, List, Tuple
+from collections import ChainMap
+from typing import Dict, Tuple
 from pathlib import Path
 from datetime import datetime
-from utils import extract_content
+from utils import extract_content, get_persona_repository
+from run_config import load_run_config
+from assignments import load_assigned_claims
 from agents.judge import Judge
+from claim_store import load_claims
+from results_db import open_results_sinks
+from run_logging import LOG_DIR, LazyJSON, claim_log_name, claim_logging, setup_logging
 
 
-def load_claims(dataset: str) -> List[Dict]:
-    """Load claims based on dataset type."""
-    paths = {
-        'covid': 'data/final-data/enriched_covid_data_15.json',
-        'climate': 'data/final-data/enriched_climate_data_15.json'
-    }
-    path = paths.get(dataset) or dataset
-
-    with open(path, 'r') as f:
-        all_claims = json.load(f)
-        return all_claims
-
 class InitialJudgementRunner:
     """Runs the judge to get initial claim evaluations."""
     
@@ -33,7 +24,8 @@ class InitialJudgementRunner:
     def __init__(self, claim: str, judge_persona: str, judge_config: Dict = None):
         # Use provided configs or load from file
         if judge_config:
-            self.judge_config = judge_config
+            # Per-runner layer: the shared judge config is reused for every persona and claim
+            self.judge_config = ChainMap({}, judge_config)
         else:
             self.judge_config = self._load_config()
         
@@ -48,12 +40,10 @@ class InitialJudgementRunner:
 
     def _load_config(self) -> Dict:
         """Load and prepare configuration for judge agent."""
-        with open(self.CONFIG_PATH, 'r') as file:
-            config = yaml.safe_load(file)
-            
-            # Setup judge config
-            judge_config = config['consultant_judge']
-            return judge_config
+        config = load_run_config(self.CONFIG_PATH)
+        
+        # Setup judge config
+        return config.overlay(config['consultant_judge'])
 
     def run(self) -> Dict:
         """Run the judgement process and return result."""
@@ -61,9 +51,7 @@ class InitialJudgementRunner:
             # Get judge's response
             judge_response = self.judge.get_response(1)
             logging.info(f"\nJudge Response:\n{judge_response}\n")
-            logging.info("--------------------------------")
-            logging.info(json.dumps(self.judge.messages, indent=2))
-            logging.info("--------------------------------")
+            logging.debug("Judge messages:\n%s", LazyJSON(self.judge.messages))
             
             # Extract judge thinking and decision
             judge_thinking = extract_content(judge_response, "thinking")
@@ -85,23 +73,22 @@ class InitialJudgementRunner:
 
     @classmethod
     def _load_base_config(cls, judge_model: str) -> Dict:
-        """Load base configuration for specified model."""
-        with open(cls.CONFIG_PATH, 'r') as file:
-            config = yaml.safe_load(file)
-            
-            # Map model names to config keys
-            model_map = {
-                'gpt4o': 'azure',
-                'claude': 'anthropic',
-                'qwen': 'sglang',
-                'deepseek': 'azure'
-            }
-            
-            # Get the right judge config
-            judge_config = config['consultant_judge'].get(model_map[judge_model], {})
-            judge_config['model_type'] = model_map[judge_model]
-            
-            return judge_config
+        """Create a copy-on-write config for the specified model over the once-loaded run config."""
+        config = load_run_config(cls.CONFIG_PATH)
+        
+        # Map model names to config keys
+        model_map = {
+            'gpt4o': 'azure',
+            'claude': 'anthropic',
+            'qwen': 'sglang',
+            'deepseek': 'azure'
+        }
+        
+        # Get the right judge config
+        return config.overlay(
+            config['consultant_judge'].get(model_map[judge_model], {}),
+            model_type=model_map[judge_model]
+        )
 
 def extract_verdict(response_text: str) -> Tuple[str, int]:
     """Extract verdict and confidence from judge's response text, case-insensitive."""
@@ -127,12 +114,12 @@ def extract_verdict(response_text: str) -> Tuple[str, int]:
     return (verdict, confidence)
 
 def save_results(args, judge_prolific_id, all_judgement_data, runner):
-    """Save results with file locking for parallel processing."""
+    """Append the run to the setup's results log (see results_log.py) and results database."""
     base_dir = Path('saved-data/initial')
     setup_dir = base_dir / f"judge_{datetime.now().strftime('%Y%m%d_%H%M%S')}" / args.dataset
     setup_dir.mkdir(parents=True, exist_ok=True)
     
-    results_file = setup_dir / "results.json"
+    results_file = setup_dir / "results.jsonl"
     
     # Generate run ID
     run_id = f"run_judge_initial_{datetime.now().strftime('%Y%m%d_%H%M%S.%f')}"
@@ -160,25 +147,10 @@ def save_results(args, judge_prolific_id, all_judgement_data, runner):
         
         run_data['claims'][claim_id] = claim_info
     
-    # File locking for concurrent access
-    with open(results_file, 'a+') as f:
-        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-        try:
-            # Read existing data
-            f.seek(0)
-            content = f.read()
-            existing_data = json.loads(content) if content else {'runs': {}}
-            
-            # Add new run
-            existing_data['runs'][run_id] = run_data
-            
-            # Write back
-            f.seek(0)
-            f.truncate()
-            json.dump(existing_data, f, indent=2)
-            
-        finally:
-            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    # One O_APPEND line per claim plus a closing run line; no lock, no rewrite of earlier runs.
+    # With --results-db the run is also saved to the SQLite database in one transaction.
+    with open_results_sinks(results_file, 'initial', args.results_db) as results_sinks:
+        results_sinks.append_run(run_id, run_data)
     
     logging.info(f"Saved results to {results_file}")
 
@@ -199,6 +171,13 @@ def main():
     parser.add_argument('--personas-path',
                        default='./personas/all_personas.json',
                        help='List of all Prolific personas')
+    parser.add_argument('--results-db',
+                       metavar='PATH',
+                       help='Also save results to this SQLite results database, e.g. saved-data/results.db (see results_db.py)')
+    parser.add_argument('--log-level',
+                       choices=['DEBUG', 'INFO', 'WARNING'],
+                       default='INFO',
+                       help='Logging level; DEBUG also logs the judge\'s full messages for each claim')
     
     args = parser.parse_args()
 
@@ -206,30 +185,22 @@ def main():
     judge_config = InitialJudgementRunner._load_base_config(args.judge_model)
 
     # Get all Prolific submissions
-    with open(args.personas_path, 'r') as personas_file:
-        personas = json.load(personas_file)
+    personas = get_persona_repository(args.personas_path).all()
+
+    # Claim details go to one log file per persona and claim; the console shows progress and warnings
+    log_dir = setup_logging(LOG_DIR / f"initial_{args.dataset}_{args.judge_model}_{datetime.now().strftime('%Y%m%d_%H%M%S')}", args.log_level)
+    print(f"\nPer-claim logs: {log_dir}")
 
     for judge_prolific_id in tqdm.tqdm(personas.keys()):
         judge_persona = personas[judge_prolific_id]
 
         # Load claims data
-        claims_path = f"./{args.mode}-claim-assignment-by-participant/{judge_prolific_id}_{args.dataset}.json"
         try:
-            with open(claims_path, 'r') as f:
-                claims_data = json.load(f)
+            claims_data = load_assigned_claims(args.mode, judge_prolific_id, args.dataset)
         except FileNotFoundError:
             # Fall back to loading from the dataset directly
             claims_data = load_claims(args.dataset)
             
-        # Configure logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.StreamHandler()
-            ]
-        )
-
         # Process each claim
         all_judgement_data = {}
         
@@ -246,7 +217,8 @@ def main():
                 )
                 
                 # Get judgment result
-                result = runner.run()
+                with claim_logging(f"{judge_prolific_id}_{claim_log_name(claim_data['claim'])}"):
+                    result = runner.run()
                 
                 # Store result
                 claim_key = f"claim_{idx + 1}"
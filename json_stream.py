@@ -0,0 +1,107 @@
+import json
+import re
+from typing import Any, Iterator, TextIO
+
+# Characters read from the file at a time
+CHUNK_SIZE = 1 << 20
+
+# Characters kept ahead of a value before decoding it, so a number is never cut at the end of the buffer
+MIN_LOOKAHEAD = 64
+
+_WHITESPACE = re.compile(r'\s*')
+
+class JSONStream:
+    """Incremental reader of one large JSON document.
+
+    Objects are walked key by key and each value is decoded on its own, so
+    memory is bounded by the largest value actually decoded rather than
+    the whole file, like ijson but built on the standard json decoder.
+
+    Usage:
+        with open('results_correct.json') as f:
+            stream = JSONStream(f)
+            for key in stream.keys():            # top-level object
+                if key == 'runs':
+                    for run_id in stream.keys():     # walk into a nested object...
+                        run = stream.value()         # ...or decode a value whole
+                else:
+                    stream.skip()
+
+    After each key the caller must consume its value, with value(), skip()
+    or a nested keys(), before asking for the next key.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int = CHUNK_SIZE):
+        """Initialize over a file opened in text mode."""
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> None:
+        """Drop the consumed part of the buffer and read `size` more characters."""
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+
+    def peek(self) -> str:
+        """The next non-whitespace character, without consuming it ('' at the end)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if len(self.buffer) - self.pos >= MIN_LOOKAHEAD or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill(self.chunk_size)
+
+    def expect(self, char: str) -> None:
+        """Consume the next non-whitespace character, which must be `char`."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r} in {getattr(self.f, 'name', 'stream')}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next value whole."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                # Grow geometrically so a large value is re-decoded only a few times
+                self._fill(max(self.chunk_size, len(self.buffer)))
+                continue
+            if end == len(self.buffer) and not self.eof:
+                self._fill(self.chunk_size)
+                continue
+            self.pos = end
+            return value
+
+    def skip(self) -> None:
+        """Consume the next value without keeping it; objects are skipped key by key."""
+        if self.peek() == '{':
+            for _ in self.keys():
+                self.skip()
+        else:
+            self.value()
+
+    def keys(self) -> Iterator[str]:
+        """Walk the next object, yielding its keys; the caller consumes each value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            separator = self.peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or '}}' but found {separator!r} in {getattr(self.f, 'name', 'stream')}")
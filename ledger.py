@@ -0,0 +1,96 @@
+import json
+import os
+import threading
+from pathlib import Path
+from time import time
+from typing import Callable, Dict, Iterator, Optional
+from scheduler import percentile
+
+LEDGER_PATH = Path('saved-data/ledger/calls.jsonl')
+
+class CallLedger:
+    """Append-only log of every API call: provider, model, latency and token counts.
+    
+    Each call is one JSON line written with a single O_APPEND write, so parallel
+    runs can share the same ledger file. The planner reads it back to estimate
+    per-provider latency and throughput.
+    """
+
+    def __init__(self, path: Path = LEDGER_PATH):
+        """Initialize the ledger at the given path."""
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._fd = None
+        self._listeners = []
+
+    def add_listener(self, listener: Callable[[Dict], None]) -> None:
+        """Call `listener(entry)` for every call recorded in this process."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict], None]) -> None:
+        """Stop notifying a listener."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def record(self, provider: str, model: str, latency: float, prompt_tokens: int,
+               completion_tokens: int, error: Optional[str] = None) -> None:
+        """Append one call record."""
+        entry = {
+            'time': time(),
+            'provider': provider,
+            'model': model,
+            'latency': round(latency, 3),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens
+        }
+        if error:
+            entry['error'] = error[:200]
+        line = (json.dumps(entry) + '\n').encode('utf-8')
+        with self._lock:
+            if self._fd is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, line)
+        for listener in list(self._listeners):
+            listener(entry)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Iterate over all recorded calls, skipping partial lines."""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def provider_stats(self, max_age_days: Optional[float] = None) -> Dict[str, Dict]:
+        """Summarize successful calls per provider: latency percentiles and output throughput."""
+        cutoff = time() - max_age_days * 86400 if max_age_days else 0
+        grouped = {}
+        for entry in self:
+            if entry.get('error') or entry['time'] < cutoff:
+                continue
+            grouped.setdefault(entry['provider'], []).append(entry)
+
+        stats = {}
+        for provider, entries in grouped.items():
+            latencies = [entry['latency'] for entry in entries]
+            completion_tokens = sum(entry['completion_tokens'] for entry in entries)
+            stats[provider] = {
+                'calls': len(entries),
+                'p50_latency': percentile(latencies, 0.5),
+                'p95_latency': percentile(latencies, 0.95),
+                'mean_prompt_tokens': sum(entry['prompt_tokens'] for entry in entries) / len(entries),
+                'mean_completion_tokens': completion_tokens / len(entries),
+                # Seconds per generated token within a single call stream
+                'seconds_per_output_token': sum(latencies) / completion_tokens if completion_tokens else None
+            }
+        return stats
+
+_ledger = CallLedger()
+
+def get_ledger() -> CallLedger:
+    """Get the process-wide call ledger."""
+    return _ledger
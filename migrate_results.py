@@ -0,0 +1,95 @@
+import argparse
+import logging
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Union
+from results_log import ResultsLog, iter_legacy_records, iter_records, log_path_for
+
+# Suffix a legacy file is renamed to once its runs are verified in the log
+MIGRATED_SUFFIX = '.migrated'
+
+class MigrationResult(NamedTuple):
+    """What migrating one legacy file did."""
+    legacy_path: Path
+    log_path: Path
+    runs: int
+    claims: int
+    skipped_runs: int
+
+def count_claims(records) -> Dict[str, int]:
+    """Distinct claims per run ID among results records."""
+    claims: Dict[str, set] = {}
+    for record in records:
+        if record['type'] == 'claim':
+            claims.setdefault(record['run_id'], set()).add(record['claim_id'])
+    return {run_id: len(claim_ids) for run_id, claim_ids in claims.items()}
+
+def migrate_file(legacy_path: Union[str, Path], dry_run: bool = False, remove: bool = False) -> MigrationResult:
+    """Move the runs of a legacy results JSON file into the results log beside it.
+
+    The legacy file is streamed, so memory stays bounded by its largest
+    claim. Runs already complete in the log (e.g. from an interrupted
+    migration) are skipped. After writing, the log is re-read and every
+    migrated run must have the claim count found in the legacy file;
+    only then is the legacy file renamed to `*.json.migrated` (or deleted
+    with `remove`), since load_results would otherwise read both.
+    """
+    legacy_path = Path(legacy_path)
+    log_path = log_path_for(legacy_path)
+    finished = {record['run_id'] for record in iter_records(log_path) if record['type'] == 'run'}
+
+    expected: Dict[str, int] = {}
+    skipped = set()
+    with ResultsLog(log_path) as log:
+        for record in iter_legacy_records(legacy_path):
+            run_id = record['run_id']
+            if run_id in finished:
+                skipped.add(run_id)
+                continue
+            if record['type'] == 'run':
+                expected[run_id] = record['claim_count']
+            if not dry_run:
+                log.append(record)
+    claims = sum(expected.values())
+    if dry_run:
+        return MigrationResult(legacy_path, log_path, len(expected), claims, len(skipped))
+
+    # Verify the log before touching the legacy file
+    run_records = {record['run_id']: record for record in iter_records(log_path)
+                   if record['type'] == 'run' and record['run_id'] in expected}
+    written = count_claims(record for record in iter_records(log_path) if record['run_id'] in expected)
+    for run_id, claim_count in expected.items():
+        if run_id not in run_records or written.get(run_id, 0) != claim_count:
+            raise ValueError(f"{log_path}: run {run_id} has {written.get(run_id, 0)} claims "
+                             f"after migration, expected {claim_count}; {legacy_path} was left in place")
+
+    if remove:
+        legacy_path.unlink()
+    else:
+        legacy_path.rename(legacy_path.with_name(legacy_path.name + MIGRATED_SUFFIX))
+    return MigrationResult(legacy_path, log_path, len(expected), claims, len(skipped))
+
+def find_legacy_files(root: Union[str, Path] = 'saved-data') -> List[Path]:
+    """Every legacy results JSON file under a directory."""
+    return sorted(Path(root).glob('**/results*.json'))
+
+def main():
+    """Convert legacy results JSON files to append-only results logs."""
+    parser = argparse.ArgumentParser(description='Migrate legacy results_*.json files to results logs (results_*.jsonl)')
+    parser.add_argument('paths', nargs='*', help='Legacy results_*.json files (default: every one under saved-data/)')
+    parser.add_argument('--dry-run', action='store_true', help='Only read the files and count their runs and claims')
+    parser.add_argument('--remove', action='store_true', help=f"Delete legacy files after verifying instead of renaming them to *.json{MIGRATED_SUFFIX}")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    paths = [Path(path) for path in args.paths] or find_legacy_files()
+    if not paths:
+        print("No legacy results files found")
+        return
+    for path in paths:
+        result = migrate_file(path, args.dry_run, args.remove)
+        action = 'would migrate' if args.dry_run else 'migrated'
+        skipped = f", {result.skipped_runs} already in the log" if result.skipped_runs else ''
+        logging.info(f"{path}: {action} {result.runs} runs ({result.claims} claims) to {result.log_path}{skipped}")
+
+if __name__ == "__main__":
+    main()
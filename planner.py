@@ -0,0 +1,242 @@
+import argparse
+import heapq
+import itertools
+import logging
+from typing import Dict, Iterable, List, Optional
+from run_config import load_run_config
+from agents.base_agent import BaseAgent
+from agents.judge import Judge
+from ledger import get_ledger
+from scheduler import get_scheduler
+from utils import count_tokens, count_message_tokens
+
+# Used when the ledger has no history for a provider
+DEFAULT_COMPLETION_TOKENS = 600
+DEFAULT_SECONDS_PER_OUTPUT_TOKEN = 0.02
+MIN_HISTORY_CALLS = 20
+
+class SimulatedResponder:
+    """Stands in for an agent's `call_api`, recording each prompt and returning filler text.
+
+    The filler has the tags the runners extract and the expected length, so the
+    real templates and transcript assembly produce realistic later-round prompts.
+    """
+
+    def __init__(self, agent: BaseAgent, calls: List[Dict], completion_tokens: int, judge_answer_tag: str):
+        """Initialize the responder for one agent; `judge_answer_tag` is the runner's JUDGE_ANSWER_TAG."""
+        self.agent = agent
+        self.calls = calls
+        self.completion_tokens = completion_tokens
+        answer_tag = judge_answer_tag if isinstance(agent, Judge) else 'argument'
+        half = completion_tokens // 2
+        self.response = (
+            f"<thinking>{filler_text(completion_tokens - half)}</thinking>\n"
+            f"<{answer_tag}>{filler_text(half)}</{answer_tag}>"
+        )
+
+    def __call__(self, messages: List[Dict], temperature: float, response_format: Optional[Dict] = None,
+                 return_messages: bool = False):
+        """Record the call and return the filler response."""
+        # Trimmed like a real call, so planned prompt sizes respect max_prompt_tokens
+        messages = self.agent.fit_prompt_budget(messages)
+        self.calls.append({
+            'provider': self.agent.provider,
+            'model': self.agent.config['model'],
+            'prompt_tokens': count_message_tokens(messages),
+            'completion_tokens': self.completion_tokens
+        })
+        return (self.response, messages) if return_messages else self.response
+
+def filler_text(tokens: int) -> str:
+    """Generate filler text of roughly the given number of tokens."""
+    tokens_per_word = count_tokens("word " * 100) / 100
+    return "word " * int(tokens / tokens_per_word)
+
+def runner_agents(runner) -> List[BaseAgent]:
+    """Get the agents owned by a debate or consultancy runner."""
+    return [value for value in vars(runner).values() if isinstance(value, BaseAgent)]
+
+def simulate_claim(runner, provider_stats: Dict[str, Dict], responder: type = SimulatedResponder) -> List[Dict]:
+    """Run a claim's rounds locally with simulated responses and return its calls."""
+    calls = []
+    for agent in runner_agents(runner):
+        stats = provider_stats.get(agent.provider, {})
+        completion_tokens = DEFAULT_COMPLETION_TOKENS
+        if stats.get('calls', 0) >= MIN_HISTORY_CALLS:
+            completion_tokens = int(stats['mean_completion_tokens'])
+        agent.call_api = responder(agent, calls, completion_tokens, runner.JUDGE_ANSWER_TAG)
+    runner.run()
+    return calls
+
+def load_pricing(config_path: str) -> Dict[str, Dict]:
+    """Load the per-model token prices (USD per 1M tokens) from the config."""
+    return load_run_config(config_path).get('pricing') or {}
+
+def call_latency(call: Dict, provider_stats: Dict[str, Dict]) -> float:
+    """Estimate a call's latency from the provider's historical output throughput."""
+    stats = provider_stats.get(call['provider'], {})
+    seconds_per_token = DEFAULT_SECONDS_PER_OUTPUT_TOKEN
+    if stats.get('calls', 0) >= MIN_HISTORY_CALLS and stats.get('seconds_per_output_token'):
+        seconds_per_token = stats['seconds_per_output_token']
+    return call['completion_tokens'] * seconds_per_token
+
+def plan_run(runners: Iterable, workers: int, config_path: str) -> Dict:
+    """Forecast the calls, tokens, cost and wall time of a run without calling any API.
+
+    Every claim's prompts are rendered from the real templates and counted
+    offline; later rounds use simulated responses sized from the call ledger.
+    Wall time assumes claims run `workers` at a time and each provider is
+    bounded by its scheduler limit. The simulated judge never gives a
+    provisional verdict, so with adaptive rounds every claim is planned at
+    its full number of rounds.
+    """
+    provider_stats = get_ledger().provider_stats()
+    pricing = load_pricing(config_path)
+    scheduler = get_scheduler()
+
+    providers = {}
+    claim_paths = []
+    adaptive_rounds = False
+    # Rendering many rounds would otherwise flood the log with prompt dumps and trim warnings
+    root_logger = logging.getLogger()
+    level = root_logger.level
+    root_logger.setLevel(logging.ERROR)
+    try:
+        for runner in runners:
+            calls = simulate_claim(runner, provider_stats)
+            adaptive_rounds = adaptive_rounds or runner.confidence_threshold is not None
+            path = 0.0
+            for call in calls:
+                latency = call_latency(call, provider_stats)
+                path += latency
+                totals = providers.setdefault(call['provider'], {
+                    'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost': 0.0, 'busy_seconds': 0.0,
+                    'history': call['provider'] in provider_stats
+                })
+                prices = pricing.get(call['model'], {})
+                totals['calls'] += 1
+                totals['prompt_tokens'] += call['prompt_tokens']
+                totals['completion_tokens'] += call['completion_tokens']
+                totals['cost'] += (call['prompt_tokens'] * prices.get('input', 0) + call['completion_tokens'] * prices.get('output', 0)) / 1e6
+                totals['busy_seconds'] += latency
+            claim_paths.append(path)
+    finally:
+        root_logger.setLevel(level)
+
+    # The run is bounded by claim throughput, per-provider capacity and the slowest claim
+    bounds = [sum(claim_paths) / max(workers, 1), max(claim_paths, default=0.0)]
+    for provider, totals in providers.items():
+        bounds.append(totals['busy_seconds'] / scheduler.queue(provider).limit)
+
+    return {
+        'claims': len(claim_paths),
+        'workers': workers,
+        'providers': providers,
+        'calls': sum(totals['calls'] for totals in providers.values()),
+        'prompt_tokens': sum(totals['prompt_tokens'] for totals in providers.values()),
+        'completion_tokens': sum(totals['completion_tokens'] for totals in providers.values()),
+        'cost': sum(totals['cost'] for totals in providers.values()),
+        'wall_seconds': max(bounds),
+        'adaptive_rounds': adaptive_rounds
+    }
+
+def format_duration(seconds: float) -> str:
+    """Format seconds as h:mm:ss."""
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def format_plan(plan: Dict, title: str = "Run plan") -> str:
+    """Format a plan as a short report."""
+    lines = [
+        f"\n{title}: {plan['claims']} claims, {plan['workers']} workers",
+        f"{'provider':<12}{'calls':>8}{'prompt tok':>14}{'output tok':>14}{'cost $':>10}  history"
+    ]
+    for provider, totals in sorted(plan['providers'].items()):
+        lines.append(
+            f"{provider:<12}{totals['calls']:>8}{totals['prompt_tokens']:>14,}{totals['completion_tokens']:>14,}"
+            f"{totals['cost']:>10.2f}  {'ledger' if totals['history'] else 'defaults'}"
+        )
+    lines.append(
+        f"{'total':<12}{plan['calls']:>8}{plan['prompt_tokens']:>14,}{plan['completion_tokens']:>14,}"
+        f"{plan['cost']:>10.2f}"
+    )
+    lines.append(f"Expected wall time: {format_duration(plan['wall_seconds'])}")
+    if plan.get('adaptive_rounds'):
+        lines.append("Upper bound: with --adaptive-rounds, claims that stop early make fewer calls than planned.")
+    return "\n".join(lines)
+
+def sweep_makespan(durations: List[float], jobs: int) -> float:
+    """Wall time of running combinations `jobs` at a time, longest first (as GNU parallel would)."""
+    slots = [0.0] * max(jobs, 1)
+    for duration in sorted(durations, reverse=True):
+        heapq.heapreplace(slots, slots[0] + duration)
+    return max(slots)
+
+def expand_matrix(options: Dict[str, List[str]]) -> List[List[str]]:
+    """Expand {flag: values} into one argument list per combination."""
+    flags = list(options)
+    return [
+        list(itertools.chain.from_iterable(zip(flags, values)))
+        for values in itertools.product(*(options[flag] for flag in flags))
+    ]
+
+def plan_sweep(mode: str, combinations: List[List[str]], jobs: int) -> Dict:
+    """Plan every combination of a sweep using the runner's own argument parser."""
+    if mode == 'debate':
+        import run_debate as runner_module
+        config_path = runner_module.DebateRunner.CONFIG_PATH
+    else:
+        import run_consultancy as runner_module
+        config_path = runner_module.ConsultancyRunner.CONFIG_PATH
+
+    plans = []
+    for argv in combinations:
+        args = runner_module.build_parser().parse_args(argv)
+        workers = runner_module.setup_scheduler(config_path, args.workers, args.provider_limit, args.adaptive_concurrency)
+        if mode == 'debate':
+            claims = runner_module.load_run_claims(args)
+            runners = (runner_module.build_runner(args, claim) for claim in claims)
+        else:
+            claims, consultant_config, judge_config = runner_module.load_run_inputs(args)
+            runners = (runner_module.build_runner(args, claim, consultant_config, judge_config) for claim in claims)
+        plan = plan_run(runners, workers, config_path)
+        print(format_plan(plan, title=' '.join(argv)))
+        plans.append(plan)
+
+    providers = {}
+    for plan in plans:
+        for provider, totals in plan['providers'].items():
+            merged = providers.setdefault(provider, {'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost': 0.0, 'history': totals['history']})
+            for key in ('calls', 'prompt_tokens', 'completion_tokens', 'cost'):
+                merged[key] += totals[key]
+    return {
+        'claims': sum(plan['claims'] for plan in plans),
+        'workers': f"{jobs} jobs x {plans[0]['workers'] if plans else 0}",
+        'providers': providers,
+        'calls': sum(plan['calls'] for plan in plans),
+        'prompt_tokens': sum(plan['prompt_tokens'] for plan in plans),
+        'completion_tokens': sum(plan['completion_tokens'] for plan in plans),
+        'cost': sum(plan['cost'] for plan in plans),
+        'wall_seconds': sweep_makespan([plan['wall_seconds'] for plan in plans], jobs),
+        'adaptive_rounds': any(plan['adaptive_rounds'] for plan in plans)
+    }
+
+def main():
+    """Plan a sweep over a matrix of runner settings, as the scripts in scripts/ run them."""
+    parser = argparse.ArgumentParser(description='Forecast calls, tokens, cost and wall time of a sweep without API calls')
+    parser.add_argument('mode', choices=['debate', 'consultancy'], help='Which runner the sweep uses')
+    parser.add_argument('--jobs', type=int, default=16, help='Combinations run in parallel (GNU parallel --jobs)')
+    parser.add_argument('--set', action='append', nargs='+', default=[], metavar=('FLAG', 'VALUE'),
+                        help='Runner flag (without dashes) and the values to sweep over, e.g. --set dataset climate covid')
+    parser.add_argument('--extra', nargs=argparse.REMAINDER, default=[],
+                        help='Flags passed unchanged to every combination (must come last)')
+    args = parser.parse_args()
+
+    options = {f"--{values[0].lstrip('-')}": values[1:] for values in args.set}
+    combinations = [argv + args.extra for argv in expand_matrix(options)]
+    plan = plan_sweep(args.mode, combinations, args.jobs)
+    print(format_plan(plan, title=f"Sweep total ({len(combinations)} combinations)"))
+    print("Note: sweep wall time assumes parallel jobs do not slow each other down at the provider.")
+
+if __name__ == "__main__":
+    main()
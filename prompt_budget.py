@@ -0,0 +1,227 @@
+import argparse
+import logging
+from typing import Dict, List, Mapping, Sequence, Tuple
+from utils import count_tokens, count_message_tokens
+
+# Prompt components and the context keys that carry them
+COMPONENT_KEYS = {
+    'sources': ('SHARED_PREFIX', 'REFERENCE_SOURCES'),
+    'persona': ('PERSONA_DIR', 'PERSONA_DESC'),
+    'transcript': ('previous_rounds_transcript_debate', 'previous_rounds_transcript_consultant',
+                   'previous_rounds_transcript_judge', 'entire_consultant_judge_transcript'),
+    'thinking_advice': ('ROUND_THINKING_ADVICE',)
+}
+
+# Columns of the breakdown: the components, the agent's own earlier turns and everything else
+REPORT_COMPONENTS = ('instructions', 'sources', 'persona', 'transcript', 'thinking_advice', 'responses')
+
+# Components trimmed to fit a budget, lowest priority first. Instructions and personas are never trimmed.
+TRIM_ORDER = ('thinking_advice', 'sources', 'transcript')
+
+# Context keys never trimmed: the shared prefix must stay byte-identical for prefix cache reuse
+UNTRIMMED_KEYS = ('SHARED_PREFIX',)
+
+# Shorter context values (names, answers) are not tracked as components
+MIN_COMPONENT_CHARS = 20
+
+SOURCES_OPEN = '<reference_sources>\n'
+SOURCES_CLOSE = '\n</reference_sources>'
+SOURCE_SEPARATOR = '\n\nTitle: '
+
+def component_values(context: Mapping, earlier: Sequence[Tuple[str, str, str]] = ()) -> List[Tuple[str, str, str]]:
+    """(component, context key, text) of every component in a context, after the `earlier` ones.
+
+    Agents keep their earlier messages, which hold earlier values of the same
+    keys (e.g. the transcript as of the previous round), so callers pass the
+    values seen so far to attribute and trim those copies too.
+    """
+    values = list(earlier)
+    seen = {text for _, _, text in values}
+    for component, keys in COMPONENT_KEYS.items():
+        for key in keys:
+            value = context.get(key)
+            text = str(value) if value is not None else ''
+            if len(text) >= MIN_COMPONENT_CHARS and text not in seen:
+                values.append((component, key, text))
+                seen.add(text)
+    return values
+
+def prompt_breakdown(messages: Sequence[Dict], values: Sequence[Tuple[str, str, str]]) -> Dict[str, int]:
+    """Tokens of a prompt per component, attributed by finding each component value (from component_values) in the messages."""
+    totals = dict.fromkeys(REPORT_COMPONENTS, 0)
+    # Longest first, so e.g. the shared prefix is matched before the sources inside it
+    values = sorted(values, key=lambda item: -len(item[2]))
+    for message in messages:
+        content = message.get('content') or ''
+        for component, _, text in values:
+            occurrences = content.count(text)
+            if occurrences:
+                totals[component] += occurrences * count_tokens(text)
+                content = content.replace(text, '')
+        rest = 'responses' if message.get('role') == 'assistant' else 'instructions'
+        # count_message_tokens adds 4 tokens of overhead per message
+        totals[rest] += count_tokens(content) + 4
+    return totals
+
+def _keep_head_blocks(blocks: List[str], target: int, separator: str) -> Tuple[List[str], int]:
+    """Keep leading blocks while they fit in `target` tokens; return them and how many were dropped."""
+    kept, used = [], 0
+    for block in blocks:
+        cost = count_tokens(block) + (count_tokens(separator) if kept else 0)
+        if used + cost > target:
+            break
+        kept.append(block)
+        used += cost
+    return kept, len(blocks) - len(kept)
+
+def shorten_sources(text: str, target: int) -> str:
+    """Drop whole sources from the end of a sources block (or shared prefix) to fit `target` tokens."""
+    head, opened, rest = text.partition(SOURCES_OPEN)
+    if opened:
+        inner, closed, tail = rest.rpartition(SOURCES_CLOSE)
+        head, tail = head + opened, closed + tail
+    else:
+        head, inner, tail = '', text, ''
+    if not inner.startswith('Title: '):
+        # Not a sources block, e.g. the note pointing to sources in the shared prefix
+        return text
+    blocks = inner.split(SOURCE_SEPARATOR)
+    blocks = blocks[:1] + [f"Title: {block}" for block in blocks[1:]]
+    note_tokens = count_tokens("\n\n[99 sources omitted to fit the prompt budget]")
+    kept, dropped = _keep_head_blocks(blocks, max(0, target - count_tokens(head + tail) - note_tokens), '\n\n')
+    if not dropped:
+        return text
+    if not kept:
+        # Not even one whole source fits: keep the start of the first one
+        words = blocks[0].split(' ')
+        kept = [' '.join(words[:max(0, (target - count_tokens(head + tail) - note_tokens))])]
+    sources_text = '\n\n'.join(kept)
+    return f"{head}{sources_text}\n\n[{dropped} sources omitted to fit the prompt budget]{tail}"
+
+def shorten_transcript(text: str, target: int) -> str:
+    """Drop the oldest transcript lines to fit `target` tokens, keeping the most recent rounds."""
+    note = '[Earlier rounds omitted to fit the prompt budget]'
+    lines = text.split('\n')
+    kept, dropped = _keep_head_blocks(lines[::-1], max(0, target - count_tokens(note)), '\n')
+    if not dropped:
+        return text
+    return '\n'.join([note, *kept[::-1]])
+
+def shorten_component(component: str, text: str, target: int) -> str:
+    """Shorten a component's text to about `target` tokens."""
+    if component == 'sources':
+        return shorten_sources(text, target)
+    if component == 'transcript':
+        return shorten_transcript(text, target)
+    return ''
+
+def fit_messages(messages: List[Dict], values: Sequence[Tuple[str, str, str]], budget: int) -> Tuple[List[Dict], List[str]]:
+    """Trim the lowest-priority components of a prompt until it fits in `budget` tokens.
+
+    `values` come from component_values. Within a component the longest
+    value is trimmed first, since later transcripts contain the earlier
+    copies as their start. Keys in UNTRIMMED_KEYS are left as they are, so
+    with a shared prefix the transcript is trimmed instead. Returns new
+    messages (the originals are not modified) and the context keys that
+    were trimmed. If trimming every allowed component is not enough, the
+    smallest prompt reached is returned.
+    """
+    total = count_message_tokens(messages)
+    if total <= budget:
+        return messages, []
+
+    trimmed = []
+    values = sorted(values, key=lambda item: -len(item[2]))
+    for component in TRIM_ORDER:
+        for value_component, key, text in values:
+            if value_component != component or key in UNTRIMMED_KEYS:
+                continue
+            occurrences = sum((message.get('content') or '').count(text) for message in messages)
+            if not occurrences:
+                continue
+            excess = total - budget
+            target = max(0, count_tokens(text) - -(-excess // occurrences))
+            shorter = shorten_component(component, text, target)
+            if shorter == text:
+                continue
+            messages = [
+                {**message, 'content': message['content'].replace(text, shorter)} if message.get('content') else message
+                for message in messages
+            ]
+            if key not in trimmed:
+                trimmed.append(key)
+            total = count_message_tokens(messages)
+            if total <= budget:
+                return messages, trimmed
+    return messages, trimmed
+
+def format_breakdown(rows: List[Dict]) -> str:
+    """Format the per-call breakdown as a table with per-component totals."""
+    header = f"{'agent':<18} {'round':>5} " + ' '.join(f"{name:>15}" for name in REPORT_COMPONENTS) + f" {'total':>8} {'sent':>8}"
+    lines = [header, '-' * len(header)]
+    totals = dict.fromkeys(REPORT_COMPONENTS, 0)
+    for row in rows:
+        for name in REPORT_COMPONENTS:
+            totals[name] += row['components'][name]
+        total = sum(row['components'].values())
+        lines.append(
+            f"{row['agent']:<18} {row['round']:>5} " + ' '.join(f"{row['components'][name]:>15,}" for name in REPORT_COMPONENTS)
+            + f" {total:>8,} {row['sent']:>8,}" + (f"  trimmed {', '.join(row['trimmed'])}" if row['trimmed'] else '')
+        )
+    lines.append('-' * len(header))
+    grand_total = sum(totals.values())
+    lines.append(f"{'all calls':<18} {'':>5} " + ' '.join(f"{totals[name]:>15,}" for name in REPORT_COMPONENTS)
+                 + f" {grand_total:>8,} {sum(row['sent'] for row in rows):>8,}")
+    lines.append(f"{'share':<18} {'':>5} " + ' '.join(f"{totals[name] / max(grand_total, 1):>15.0%}" for name in REPORT_COMPONENTS))
+    return '\n'.join(lines)
+
+def main():
+    """Render the prompts a runner would send for one claim and break down their tokens per component and round."""
+    parser = argparse.ArgumentParser(
+        description='Show where the prompt tokens of a claim go, without API calls. '
+                    'Any other flags are passed to the runner, e.g. --dataset covid --debater browsing ...')
+    parser.add_argument('mode', choices=['debate', 'consultancy'], help='Which runner to render')
+    parser.add_argument('--claim', type=int, default=0, help='Position of the claim in the dataset')
+    args, runner_argv = parser.parse_known_args()
+
+    # Imported here: the runners import the agents, which import this module
+    from planner import SimulatedResponder, simulate_claim
+    if args.mode == 'debate':
+        import run_debate as runner_module
+        runner_args = runner_module.build_parser().parse_args(runner_argv)
+        claim = runner_module.load_run_claims(runner_args)[args.claim]
+        runner = runner_module.build_runner(runner_args, claim)
+    else:
+        import run_consultancy as runner_module
+        runner_args = runner_module.build_parser().parse_args(runner_argv)
+        claims, consultant_config, judge_config = runner_module.load_run_inputs(runner_args)
+        claim = claims[args.claim]
+        runner = runner_module.build_runner(runner_args, claim, consultant_config, judge_config)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    rows = []
+
+    class BreakdownResponder(SimulatedResponder):
+        """Simulated responder that also breaks down each prompt."""
+
+        values = ()
+
+        def __call__(self, messages, *call_args, **call_kwargs):
+            """Record the prompt's breakdown, then respond like the planner does."""
+            self.values = component_values(self.agent.context, self.values)
+            fitted, trimmed = fit_messages(messages, self.values, self.agent.config.get('max_prompt_tokens') or float('inf'))
+            rows.append({
+                'agent': self.agent.name,
+                'round': sum(row['agent'] == self.agent.name for row in rows) + 1,
+                'components': prompt_breakdown(messages, self.values),
+                'sent': count_message_tokens(fitted),
+                'trimmed': trimmed
+            })
+            return super().__call__(messages, *call_args, **call_kwargs)
+
+    simulate_claim(runner, {}, responder=BreakdownResponder)
+    print(f"Claim: {claim.claim}\n")
+    print(format_breakdown(rows))
+
+if __name__ == "__main__":
+    main()
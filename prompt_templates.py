@@ -0,0 +1,90 @@
+import os
+import threading
+from string import Formatter
+from time import monotonic
+from typing import Any, Dict, FrozenSet
+import yaml
+from utils import PlaceholderManager
+
+# How often a cached prompt file's mtime is re-checked
+RECHECK_SECONDS = 2.0
+
+KNOWN_PLACEHOLDERS = PlaceholderManager.PLACEHOLDER_KEYS | PlaceholderManager.RUNTIME_KEYS
+
+class PromptTemplate:
+    """A prompt string parsed once, with its placeholder names extracted."""
+
+    __slots__ = ('text', 'fields', '_format')
+
+    def __init__(self, text: str):
+        """Parse the template text."""
+        self.text = text
+        # '{x[y]}' and '{x.y}' both read the placeholder 'x'
+        self.fields: FrozenSet[str] = frozenset(
+            field.split('.')[0].split('[')[0]
+            for _, field, _, _ in Formatter().parse(text) if field
+        )
+        self._format = text.format
+
+    def format(self, **context) -> str:
+        """Fill in the placeholders from the context."""
+        return self._format(**context)
+
+    def __str__(self) -> str:
+        """The raw template text."""
+        return self.text
+
+def compile_prompts(node: Any, path: str) -> Any:
+    """Replace every message `content` string in a parsed prompt file with a PromptTemplate."""
+    if isinstance(node, dict):
+        compiled = {}
+        for key, value in node.items():
+            if key == 'content' and isinstance(value, str):
+                template = PromptTemplate(value)
+                unknown = template.fields - KNOWN_PLACEHOLDERS
+                if unknown:
+                    raise ValueError(f"Unknown placeholders {sorted(unknown)} in {path}")
+                compiled[key] = template
+            else:
+                compiled[key] = compile_prompts(value, path)
+        return compiled
+    if isinstance(node, list):
+        return [compile_prompts(value, path) for value in node]
+    return node
+
+class PromptRegistry:
+    """Process-wide cache of compiled prompt files, keyed by path and mtime.
+
+    Each file is parsed and validated once; agents built afterwards get the
+    cached templates. The mtime is re-checked at most every RECHECK_SECONDS,
+    so edited prompt files are still picked up by long runs.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Dict:
+        """Get the compiled `prompts` section of a prompt file."""
+        entry = self._entries.get(path)
+        now = monotonic()
+        if entry and now - entry['checked'] < RECHECK_SECONDS:
+            return entry['prompts']
+
+        with self._lock:
+            mtime = os.stat(path).st_mtime_ns
+            entry = self._entries.get(path)
+            if entry is None or entry['mtime'] != mtime:
+                with open(path, 'r') as file:
+                    prompts = compile_prompts(yaml.safe_load(file)['prompts'], path)
+                entry = {'mtime': mtime, 'prompts': prompts}
+                self._entries[path] = entry
+            entry['checked'] = now
+            return entry['prompts']
+
+_registry = PromptRegistry()
+
+def load_prompt_templates(path: str) -> Dict:
+    """Get the compiled prompt templates of a prompt file from the process-wide registry."""
+    return _registry.get(path)
@@ -0,0 +1,268 @@
+import argparse
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from claim_store import claim_hash
+from results_log import ResultsLog, ResultsSink, ResultsSinks, find_results_logs, load_results
+from transcript_store import TranscriptCodec
+
+DEFAULT_DB_PATH = Path('saved-data/results.db')
+
+# Seconds a writer waits for another process's transaction before failing
+BUSY_TIMEOUT = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    setup TEXT,
+    dataset TEXT,
+    position TEXT,
+    prolific_id TEXT,
+    model_a TEXT,
+    model_b TEXT,
+    judge_model TEXT,
+    timestamp TEXT,
+    metadata TEXT,
+    telemetry TEXT
+);
+CREATE TABLE IF NOT EXISTS claims (
+    run_id TEXT NOT NULL REFERENCES runs(run_id),
+    claim_id TEXT NOT NULL,
+    claim TEXT,
+    claim_hash TEXT,
+    true_label TEXT,
+    label TEXT,
+    rounds_used INTEGER,
+    stopped_early INTEGER,
+    details TEXT,
+    PRIMARY KEY (run_id, claim_id)
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    run_id TEXT NOT NULL,
+    claim_id TEXT NOT NULL,
+    round_index INTEGER NOT NULL,
+    round_number INTEGER,
+    data TEXT,
+    PRIMARY KEY (run_id, claim_id, round_index)
+);
+CREATE TABLE IF NOT EXISTS verdicts (
+    run_id TEXT NOT NULL,
+    claim_id TEXT NOT NULL,
+    verdict TEXT,
+    confidence INTEGER,
+    correct INTEGER,
+    PRIMARY KEY (run_id, claim_id)
+);
+CREATE INDEX IF NOT EXISTS runs_setup_dataset ON runs (setup, dataset);
+CREATE INDEX IF NOT EXISTS runs_models ON runs (model_a, model_b, judge_model);
+CREATE INDEX IF NOT EXISTS runs_position ON runs (position);
+CREATE INDEX IF NOT EXISTS runs_prolific_id ON runs (prolific_id);
+CREATE INDEX IF NOT EXISTS claims_claim_hash ON claims (claim_hash);
+"""
+
+# Claim fields stored in their own columns or tables rather than in `details`
+CLAIM_COLUMNS = ('claim', 'true_label', 'label', 'rounds_used', 'stopped_early', 'rounds',
+                 'judge_final_verdict', 'judge_verdict', 'judge_confidence_level')
+
+def _label(value) -> Optional[str]:
+    """Store labels and verdicts as text, whatever type the run used."""
+    return None if value is None else str(value)
+
+def run_columns(run_id: str, mode: str, run_data: Dict) -> Dict:
+    """The indexed settings of a run: setup, dataset, position, Prolific ID and models."""
+    metadata = run_data.get('metadata') or {}
+    return {
+        'run_id': run_id,
+        'mode': mode,
+        'setup': metadata.get('setup'),
+        'dataset': metadata.get('dataset'),
+        'position': metadata.get('argue_for_debater_a', metadata.get('argue_for')),
+        'prolific_id': metadata.get('prolific_id'),
+        'model_a': metadata.get('debater_a_model', metadata.get('consultant_model')),
+        'model_b': metadata.get('debater_b_model'),
+        'judge_model': metadata.get('judge_model'),
+        'timestamp': metadata.get('timestamp')
+    }
+
+def claim_verdict(claim_info: Dict) -> Tuple[Optional[str], Optional[int]]:
+    """The judge's final verdict on a claim and whether it matches the true label (1/0)."""
+    verdict = _label(claim_info.get('judge_final_verdict', claim_info.get('judge_verdict')))
+    true_label = _label(claim_info.get('true_label'))
+    correct = None if verdict is None or true_label is None else int(verdict.lower() == true_label.lower())
+    return verdict, correct
+
+def mode_for_path(path: Union[str, Path]) -> str:
+    """The mode of a results file from its place under saved-data/ (debate, consultancy or initial)."""
+    return next((part for part in Path(path).parts if part in ('debate', 'consultancy', 'initial')), 'debate')
+
+def run_row(run_id: str, mode: str, run_data: Dict) -> tuple:
+    """The `runs` row of a run."""
+    return (
+        *run_columns(run_id, mode, run_data).values(),
+        json.dumps(run_data.get('metadata') or {}, ensure_ascii=False),
+        json.dumps(run_data['telemetry'], ensure_ascii=False) if 'telemetry' in run_data else None
+    )
+
+class ResultsDatabase(ResultsSink):
+    """SQLite results backend with indexed runs, claims, rounds and verdicts.
+
+    The database runs in WAL mode, so analysis can read while jobs write and
+    parallel jobs can share one file: each run is saved in one short
+    transaction, and writers wait up to BUSY_TIMEOUT for each other. Round
+    transcripts live in their own table, so queries over verdicts never
+    read them.
+
+    Usage:
+        with ResultsDatabase('saved-data/results.db', mode='debate') as db:
+            db.append_run(run_id, run_data)
+        frame = load_verdicts('saved-data/results.db', dataset='covid', judge_model='gpt4o')
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_DB_PATH, mode: str = 'debate'):
+        """Open (and create if needed) the database."""
+        self.path = Path(path)
+        self.mode = mode
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(SCHEMA)
+
+    def _transaction(self, write) -> None:
+        """Run `write(cursor)` in one write transaction."""
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                write(cursor)
+                cursor.execute('COMMIT')
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+
+    @staticmethod
+    def _insert_claim(cursor, run_id: str, claim_id: str, claim_info: Dict) -> None:
+        """Replace a claim's rows in the claims, rounds and verdicts tables."""
+        for table in ('claims', 'rounds', 'verdicts'):
+            cursor.execute(f'DELETE FROM {table} WHERE run_id = ? AND claim_id = ?', (run_id, claim_id))
+        claim_text = claim_info.get('claim')
+        cursor.execute('INSERT INTO claims VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', (
+            run_id, claim_id, claim_text, claim_hash(claim_text) if claim_text else None,
+            _label(claim_info.get('true_label')), _label(claim_info.get('label')),
+            claim_info.get('rounds_used'),
+            None if 'stopped_early' not in claim_info else int(bool(claim_info['stopped_early'])),
+            json.dumps({key: value for key, value in claim_info.items() if key not in CLAIM_COLUMNS}, ensure_ascii=False)
+        ))
+        cursor.executemany('INSERT INTO rounds VALUES (?, ?, ?, ?, ?)', [
+            (run_id, claim_id, index, round_info.get('round_number'), json.dumps(round_info, ensure_ascii=False))
+            for index, round_info in enumerate(claim_info.get('rounds', []))
+        ])
+        verdict, correct = claim_verdict(claim_info)
+        cursor.execute('INSERT INTO verdicts VALUES (?, ?, ?, ?, ?)',
+                       (run_id, claim_id, verdict, claim_info.get('judge_confidence_level'), correct))
+
+    def append_run(self, run_id: str, run_data: Dict) -> None:
+        """Save a run and its claims, rounds and verdicts in one transaction."""
+        def write(cursor):
+            for table in ('claims', 'rounds', 'verdicts'):
+                cursor.execute(f'DELETE FROM {table} WHERE run_id = ?', (run_id,))
+            for claim_id, claim_info in run_data.get('claims', {}).items():
+                self._insert_claim(cursor, run_id, claim_id, claim_info)
+            cursor.execute('INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                           run_row(run_id, self.mode, run_data))
+        self._transaction(write)
+
+    def append_claim(self, run_id: str, claim_id: str, claim_info: Dict) -> None:
+        """Save one claim of a streamed run; it is queryable once the run is finished."""
+        self._transaction(lambda cursor: self._insert_claim(cursor, run_id, claim_id, claim_info))
+
+    def finish_run(self, run_id: str, run_data: Dict, claim_count: int) -> None:
+        """Save a streamed run's row after its claims."""
+        self._transaction(lambda cursor: cursor.execute(
+            'INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', run_row(run_id, self.mode, run_data)))
+
+    def close(self) -> None:
+        """Close the connection."""
+        with self._lock:
+            self._connection.close()
+
+def open_results_sinks(results_file: Union[str, Path], mode: str, db_path: Optional[Union[str, Path]] = None,
+                       compress_transcripts: bool = False) -> ResultsSink:
+    """The sinks a runner saves to: its results log, plus the results database if one is given."""
+    sinks = [ResultsLog(results_file, TranscriptCodec() if compress_transcripts else None)]
+    if db_path:
+        sinks.append(ResultsDatabase(db_path, mode))
+    return ResultsSinks(sinks)
+
+VERDICTS_QUERY = """
+SELECT runs.run_id, runs.mode, runs.setup, runs.dataset, runs.position, runs.prolific_id,
+       runs.model_a, runs.model_b, runs.judge_model, runs.timestamp,
+       claims.claim_id, claims.claim, claims.claim_hash, claims.true_label, claims.label,
+       claims.rounds_used, claims.stopped_early,
+       verdicts.verdict, verdicts.confidence, verdicts.correct
+FROM runs
+JOIN claims ON claims.run_id = runs.run_id
+LEFT JOIN verdicts ON verdicts.run_id = claims.run_id AND verdicts.claim_id = claims.claim_id
+"""
+
+# Columns of `runs` that load_verdicts can filter on
+FILTER_COLUMNS = ('mode', 'setup', 'dataset', 'position', 'prolific_id', 'model_a', 'model_b', 'judge_model')
+
+def query_verdicts(db_path: Union[str, Path] = DEFAULT_DB_PATH, **filters) -> List[Dict]:
+    """One dict per claim with its run's settings and the judge's verdict, filtered on run columns.
+
+    A filter value may be a single value or a list of values, e.g.
+    `query_verdicts(dataset='covid', judge_model=['gpt4o', 'claude'])`.
+    """
+    unknown = set(filters) - set(FILTER_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown filters {sorted(unknown)}; use {', '.join(FILTER_COLUMNS)}")
+    clauses, params = [], []
+    for column, value in filters.items():
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        clauses.append(f"runs.{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    sql = VERDICTS_QUERY + (f"WHERE {' AND '.join(clauses)}" if clauses else '')
+    connection = sqlite3.connect(f"file:{Path(db_path)}?mode=ro", uri=True, timeout=BUSY_TIMEOUT)
+    connection.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in connection.execute(sql, params)]
+    finally:
+        connection.close()
+
+def load_verdicts(db_path: Union[str, Path] = DEFAULT_DB_PATH, **filters):
+    """query_verdicts as a pandas DataFrame (`.to_numpy()` for arrays)."""
+    import pandas as pd
+    return pd.DataFrame(query_verdicts(db_path, **filters))
+
+def load_rounds(db_path: Union[str, Path], run_id: str, claim_id: str) -> List[Dict]:
+    """The round transcripts of one claim."""
+    connection = sqlite3.connect(f"file:{Path(db_path)}?mode=ro", uri=True, timeout=BUSY_TIMEOUT)
+    try:
+        rows = connection.execute('SELECT data FROM rounds WHERE run_id = ? AND claim_id = ? ORDER BY round_index',
+                                  (run_id, claim_id))
+        return [json.loads(data) for (data,) in rows]
+    finally:
+        connection.close()
+
+def main():
+    """Import results logs (or legacy results JSON files) into the results database."""
+    parser = argparse.ArgumentParser(description='Import saved results into the SQLite results database')
+    parser.add_argument('paths', nargs='*', help='results_*.jsonl or results_*.json files (default: everything under saved-data/)')
+    parser.add_argument('--db', default=str(DEFAULT_DB_PATH), help='Database path')
+    args = parser.parse_args()
+
+    for path in [Path(path) for path in args.paths] or find_results_logs():
+        mode = mode_for_path(path)
+        runs = load_results(path)['runs']
+        with ResultsDatabase(args.db, mode) as db:
+            for run_id, run_data in runs.items():
+                db.append_run(run_id, run_data)
+        print(f"{path}: imported {len(runs)} {mode} runs")
+
+if __name__ == "__main__":
+    main()
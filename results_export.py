@@ -0,0 +1,182 @@
+import argparse
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+from claim_store import claim_hash
+from results_db import claim_verdict, mode_for_path, run_columns
+from results_log import find_results_logs, load_results
+
+EXPORT_DIR = Path('saved-data/export')
+
+# Run IDs already exported, one per line, for --incremental
+MANIFEST_NAME = 'exported_runs.txt'
+
+# Both tables are split into setup=.../dataset=.../model_a=... directories
+PARTITION_COLUMNS = ('setup', 'dataset', 'model_a')
+
+FORMATS = {'parquet': 'parquet', 'arrow': 'ipc'}
+FILE_SUFFIXES = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+# Column types of each table; fixed so every incremental part has the same schema
+TABLE_COLUMNS = {
+    'verdicts': (
+        ('run_id', 'string'), ('mode', 'string'), ('setup', 'string'), ('dataset', 'string'),
+        ('position', 'string'), ('prolific_id', 'string'), ('model_a', 'string'), ('model_b', 'string'),
+        ('judge_model', 'string'), ('timestamp', 'string'), ('claim_id', 'string'), ('claim', 'string'),
+        ('claim_hash', 'string'), ('true_label', 'string'), ('label', 'string'), ('rounds_used', 'int32'),
+        ('stopped_early', 'bool_'), ('verdict', 'string'), ('confidence', 'int32'), ('correct', 'bool_'),
+        ('metadata', 'string')
+    ),
+    'rounds': (
+        ('run_id', 'string'), ('mode', 'string'), ('setup', 'string'), ('dataset', 'string'),
+        ('model_a', 'string'), ('claim_id', 'string'), ('round_index', 'int32'), ('round_number', 'int32'),
+        ('speaker', 'string'), ('field', 'string'), ('text', 'string')
+    )
+}
+
+def _int(value) -> Optional[int]:
+    """An integer column value, or None if the run saved something else."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _bool(value) -> Optional[bool]:
+    """A boolean column value that keeps None as null."""
+    return None if value is None else bool(value)
+
+def verdict_records(run_id: str, mode: str, run_data: Dict) -> Iterator[Dict]:
+    """One `verdicts` row per claim of a run: the run's settings, the claim and the judge's verdict."""
+    columns = run_columns(run_id, mode, run_data)
+    metadata = json.dumps(run_data.get('metadata') or {}, ensure_ascii=False)
+    for claim_id, claim_info in run_data.get('claims', {}).items():
+        verdict, correct = claim_verdict(claim_info)
+        claim_text = claim_info.get('claim')
+        yield {
+            **columns,
+            'claim_id': claim_id,
+            'claim': claim_text,
+            'claim_hash': claim_hash(claim_text) if claim_text else None,
+            'true_label': None if claim_info.get('true_label') is None else str(claim_info['true_label']),
+            'label': claim_info.get('label'),
+            'rounds_used': _int(claim_info.get('rounds_used')),
+            'stopped_early': _bool(claim_info.get('stopped_early')),
+            'verdict': verdict,
+            'confidence': _int(claim_info.get('judge_confidence_level')),
+            'correct': _bool(correct),
+            'metadata': metadata
+        }
+
+def round_records(run_id: str, mode: str, run_data: Dict) -> Iterator[Dict]:
+    """One `rounds` row per text field of each speaker in each round, e.g. (debater_a, argument)."""
+    columns = run_columns(run_id, mode, run_data)
+    partition = {key: columns[key] for key in ('run_id', 'mode', 'setup', 'dataset', 'model_a')}
+    for claim_id, claim_info in run_data.get('claims', {}).items():
+        for index, round_info in enumerate(claim_info.get('rounds', [])):
+            base = {**partition, 'claim_id': claim_id, 'round_index': index,
+                    'round_number': _int(round_info.get('round_number'))}
+            for speaker, turn in round_info.items():
+                # Skips round_number and markers such as judge_only on an early-stopped final judgement
+                if not isinstance(turn, dict):
+                    continue
+                for field, text in turn.items():
+                    if text is not None:
+                        yield {**base, 'speaker': speaker, 'field': field, 'text': str(text)}
+
+def table_schema(name: str):
+    """The pyarrow schema of an exported table."""
+    import pyarrow as pa
+    return pa.schema([(column, getattr(pa, type_name)()) for column, type_name in TABLE_COLUMNS[name]])
+
+def read_manifest(output_dir: Path) -> set:
+    """Run IDs already exported to a directory."""
+    path = output_dir / MANIFEST_NAME
+    return set(path.read_text().split()) if path.exists() else set()
+
+def export_results(paths: Sequence[Union[str, Path]], output_dir: Union[str, Path] = EXPORT_DIR,
+                   file_format: str = 'parquet', incremental: bool = False) -> Dict[str, int]:
+    """Export results logs to partitioned `verdicts` and `rounds` datasets.
+
+    Each log is flattened and written on its own, so memory stays bounded by
+    the largest log. With `incremental`, runs listed in the directory's
+    manifest are skipped and new runs are added as new files; otherwise the
+    export is rebuilt from scratch. Returns the runs and rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    output_dir = Path(output_dir)
+    if not incremental:
+        for name in TABLE_COLUMNS:
+            shutil.rmtree(output_dir / name, ignore_errors=True)
+        (output_dir / MANIFEST_NAME).unlink(missing_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    exported = read_manifest(output_dir)
+    partitioning = ds.partitioning(pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]), flavor='hive')
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    counts = {'runs': 0, **dict.fromkeys(TABLE_COLUMNS, 0)}
+
+    for part, path in enumerate(paths):
+        mode = mode_for_path(path)
+        runs = {run_id: run_data for run_id, run_data in load_results(path)['runs'].items() if run_id not in exported}
+        if not runs:
+            continue
+        for name, records in (('verdicts', verdict_records), ('rounds', round_records)):
+            rows = [row for run_id, run_data in runs.items() for row in records(run_id, mode, run_data)]
+            if not rows:
+                continue
+            ds.write_dataset(
+                pa.Table.from_pylist(rows, schema=table_schema(name)), output_dir / name,
+                format=FORMATS[file_format], partitioning=partitioning,
+                basename_template=f"part-{stamp}-{part}-{{i}}.{FILE_SUFFIXES[file_format]}",
+                existing_data_behavior='overwrite_or_ignore'
+            )
+            counts[name] += len(rows)
+        # Record the runs only once both tables have them
+        with open(output_dir / MANIFEST_NAME, 'a') as f:
+            f.write(''.join(f"{run_id}\n" for run_id in runs))
+        exported.update(runs)
+        counts['runs'] += len(runs)
+    return counts
+
+def load_export(name: str, columns: Optional[List[str]] = None, output_dir: Union[str, Path] = EXPORT_DIR, **filters):
+    """Read an exported table as a pyarrow Table (`.to_pandas()` for a DataFrame).
+
+    Files are memory-mapped, only the requested columns are read, and
+    filters on partition columns skip whole directories, e.g.
+    `load_export('verdicts', ['judge_model', 'correct'], dataset='covid', model_a=['gpt4o', 'qwen'])`.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from pyarrow.fs import LocalFileSystem
+
+    path = Path(output_dir) / name
+    file_format = 'arrow' if next(path.rglob('*.arrow'), None) else 'parquet'
+    dataset = ds.dataset(
+        str(path), format=FORMATS[file_format], filesystem=LocalFileSystem(use_mmap=True),
+        partitioning=ds.partitioning(pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]), flavor='hive')
+    )
+    expression = None
+    for column, value in filters.items():
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        condition = ds.field(column).isin(values)
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression)
+
+def main():
+    """Export saved results to partitioned Parquet or Arrow datasets for analysis."""
+    parser = argparse.ArgumentParser(description='Export results logs to partitioned Parquet/Arrow verdict and round tables')
+    parser.add_argument('paths', nargs='*', help='results_*.jsonl files (default: every results log under saved-data/)')
+    parser.add_argument('--output', default=str(EXPORT_DIR), help='Export directory')
+    parser.add_argument('--format', choices=list(FORMATS), default='parquet', help='File format')
+    parser.add_argument('--incremental', action='store_true', help='Only add runs not exported yet, keeping existing files')
+    args = parser.parse_args()
+
+    paths = [Path(path) for path in args.paths] or find_results_logs()
+    counts = export_results(paths, args.output, args.format, args.incremental)
+    print(f"Exported {counts['runs']} runs ({counts['verdicts']} verdict rows, {counts['rounds']} round rows) to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+from json_stream import JSONStream
+from transcript_store import TranscriptCodec, pack_claim, unpack_claim
+
+RESULTS_SUFFIX = '.jsonl'
+
+class ResultsSink(ABC):
+    """Destination the runners save runs to.
+
+    A run is `{'metadata': {...}, 'claims': {claim_id: claim_info}, ...}`, as
+    built by the runners' save functions. It is saved whole with append_run,
+    or streamed: append_claim as each claim finishes, then finish_run.
+    Sinks are context managers.
+    """
+
+    @abstractmethod
+    def append_run(self, run_id: str, run_data: Dict) -> None:
+        """Save one finished run."""
+
+    @abstractmethod
+    def append_claim(self, run_id: str, claim_id: str, claim_info: Dict) -> None:
+        """Save one finished claim of a run in progress."""
+
+    @abstractmethod
+    def finish_run(self, run_id: str, run_data: Dict, claim_count: int) -> None:
+        """Save a streamed run's metadata and telemetry after its claims, marking it complete."""
+
+    def close(self) -> None:
+        """Release any open files or connections."""
+
+    def __enter__(self) -> 'ResultsSink':
+        """Use the sink as a context manager that closes it."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the sink."""
+        self.close()
+
+class ResultsSinks(ResultsSink):
+    """Saves each run to several sinks, e.g. the results log and a results database."""
+
+    def __init__(self, sinks: List[ResultsSink]):
+        """Initialize with the sinks to fan out to."""
+        self.sinks = sinks
+
+    def append_run(self, run_id: str, run_data: Dict) -> None:
+        """Save the run to every sink."""
+        for sink in self.sinks:
+            sink.append_run(run_id, run_data)
+
+    def append_claim(self, run_id: str, claim_id: str, claim_info: Dict) -> None:
+        """Save the claim to every sink."""
+        for sink in self.sinks:
+            sink.append_claim(run_id, claim_id, claim_info)
+
+    def finish_run(self, run_id: str, run_data: Dict, claim_count: int) -> None:
+        """Finish the run in every sink."""
+        for sink in self.sinks:
+            sink.finish_run(run_id, run_data, claim_count)
+
+    def close(self) -> None:
+        """Close every sink."""
+        for sink in self.sinks:
+            sink.close()
+
+class ResultsLog(ResultsSink):
+    """Append-only, line-delimited results file shared by parallel runs.
+
+    Each claim is one `{"type": "claim", ...}` line and each run ends with
+    one `{"type": "run", ...}` line holding its metadata and telemetry. Every
+    line is a single O_APPEND write, so saving a run costs the size of that
+    run rather than the whole history, and parallel jobs never wait on a lock.
+    A run whose `run` line is missing (e.g. the job was killed) is incomplete.
+    With a `codec`, claim transcripts are stored compressed (see
+    transcript_store.py); readers expand them transparently.
+
+    Usage:
+        with ResultsLog('saved-data/debate/.../results_correct.jsonl') as log:
+            log.append_run(run_id, run_data)    # {'metadata', 'claims', 'telemetry'}
+        results = load_results(log.path)        # legacy {'runs': {...}} view
+    """
+
+    def __init__(self, path: Union[str, Path], codec: Optional[TranscriptCodec] = None):
+        """Initialize the log without opening the file yet."""
+        self.path = Path(path)
+        self.codec = codec
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def append(self, record: Dict) -> None:
+        """Append one record as a single line."""
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            if self._fd is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            written = os.write(self._fd, line)
+        if written != len(line):
+            raise OSError(f"Short write to {self.path}: {written} of {len(line)} bytes")
+
+    def append_claim(self, run_id: str, claim_id: str, claim_info: Dict) -> None:
+        """Append one claim's results."""
+        if self.codec is not None:
+            claim_info = pack_claim(claim_info, self.codec)
+        self.append({'type': 'claim', 'run_id': run_id, 'claim_id': claim_id, 'claim': claim_info})
+
+    def append_run(self, run_id: str, run_data: Dict) -> None:
+        """Append a run: one line per claim, then the run line that marks it complete."""
+        for claim_id, claim_info in run_data.get('claims', {}).items():
+            self.append_claim(run_id, claim_id, claim_info)
+        self.finish_run(run_id, run_data, len(run_data.get('claims', {})))
+
+    def finish_run(self, run_id: str, run_data: Dict, claim_count: int) -> None:
+        """Append the run line (metadata, telemetry and claim count) after its claims."""
+        record = {'type': 'run', 'run_id': run_id, 'claim_count': claim_count}
+        record.update((key, value) for key, value in run_data.items() if key != 'claims')
+        self.append(record)
+
+    def close(self) -> None:
+        """Close the file."""
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+def log_path_for(path: Union[str, Path]) -> Path:
+    """The results log for a legacy `results_*.json` path (or the log path itself)."""
+    return Path(path).with_suffix(RESULTS_SUFFIX)
+
+def find_results_logs(root: Union[str, Path] = 'saved-data') -> List[Path]:
+    """Every results log under a directory, including legacy results JSON files without a log."""
+    found = [*Path(root).glob('**/results*.jsonl'), *Path(root).glob('**/results*.json')]
+    # load_results reads a log together with the legacy JSON file beside it
+    return list(dict.fromkeys(log_path_for(path) for path in sorted(found)))
+
+def iter_records(path: Union[str, Path]) -> Iterator[Dict]:
+    """Iterate over the records of a results log, skipping a partial last line and expanding packed claims."""
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            record = json.loads(line)
+            if record['type'] == 'claim':
+                record['claim'] = unpack_claim(record['claim'])
+            yield record
+
+def iter_legacy_records(path: Union[str, Path]) -> Iterator[Dict]:
+    """Iterate over a legacy `{'runs': {...}}` results JSON file as results log records.
+
+    The file is streamed one claim at a time (see json_stream.py), so even
+    files of hundreds of MB are read in bounded memory. Each run yields its
+    claim records and then its run record, as ResultsLog writes them.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = JSONStream(f)
+        for key in stream.keys():
+            if key != 'runs':
+                stream.skip()
+                continue
+            for run_id in stream.keys():
+                record = {'type': 'run', 'run_id': run_id}
+                claim_count = 0
+                for field in stream.keys():
+                    if field != 'claims':
+                        record[field] = stream.value()
+                        continue
+                    for claim_id in stream.keys():
+                        yield {'type': 'claim', 'run_id': run_id, 'claim_id': claim_id, 'claim': stream.value()}
+                        claim_count += 1
+                record['claim_count'] = claim_count
+                yield record
+
+def iter_results(path: Union[str, Path]) -> Iterator[Dict]:
+    """Iterate over the records of the legacy JSON file beside a log (if any), then the log's own."""
+    legacy = Path(path).with_suffix('.json')
+    if legacy.exists() and legacy.stat().st_size:
+        yield from iter_legacy_records(legacy)
+    yield from iter_records(log_path_for(path))
+
+def load_results(path: Union[str, Path], include_incomplete: bool = False) -> Dict:
+    """Load results in the legacy `{'runs': {run_id: {'metadata', 'claims', ...}}}` shape.
+
+    Accepts a `.jsonl` log or a legacy `.json` path; runs saved in the legacy
+    JSON file next to the log (from before the switch) come first. Runs
+    without their closing `run` line are skipped unless `include_incomplete`,
+    in which case their metadata is None.
+    """
+    claims: Dict[str, Dict] = {}
+    headers: Dict[str, Dict] = {}
+    for record in iter_results(path):
+        if record['type'] == 'claim':
+            claims.setdefault(record['run_id'], {})[record['claim_id']] = record['claim']
+        elif record['type'] == 'run':
+            headers[record['run_id']] = record
+
+    runs = {}
+    for run_id in dict.fromkeys([*claims, *headers]):
+        header = headers.get(run_id)
+        if header is None and not include_incomplete:
+            continue
+        run = {'metadata': header.get('metadata') if header else None, 'claims': claims.get(run_id, {})}
+        if header:
+            run.update((key, value) for key, value in header.items()
+                       if key not in ('type', 'run_id', 'claim_count', 'metadata'))
+        runs[run_id] = run
+    return {'runs': runs}
+
+def main():
+    """Summarize a results log or export it in the legacy JSON layout."""
+    parser = argparse.ArgumentParser(description='Read an append-only results log')
+    parser.add_argument('path', help='results_*.jsonl (or the legacy results_*.json path)')
+    parser.add_argument('--output', help='Write the legacy {"runs": {...}} JSON here')
+    parser.add_argument('--include-incomplete', action='store_true', help='Include runs that never finished')
+    args = parser.parse_args()
+
+    results = load_results(args.path, args.include_incomplete)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {len(results['runs'])} runs to {args.output}")
+        return
+    for run_id, run in results['runs'].items():
+        state = '' if run['metadata'] is not None else ' (incomplete)'
+        print(f"{run_id}: {len(run['claims'])} claims{state}")
+
+if __name__ == "__main__":
+    main()
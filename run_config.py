@@ -0,0 +1,76 @@
+import os
+import threading
+from collections import ChainMap
+from typing import Any, Dict, Mapping
+import yaml
+
+class FrozenDict(dict):
+    """Read-only dict. Behaves (and prints) like a dict, but cannot be changed."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Run config is read-only; set per-claim values on an overlay instead")
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    __ior__ = _read_only
+
+class FrozenList(list):
+    """Read-only list. Behaves (and prints) like a list, but cannot be changed."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Run config is read-only")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+def freeze(value: Any) -> Any:
+    """Recursively convert parsed YAML into read-only dicts and lists."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+class RunConfig:
+    """The contents of config.yaml, loaded once per process and never modified.
+
+    Agents get copy-on-write overlays: a ChainMap whose first map takes all
+    writes (per-claim settings such as `claim_veracity` or `prompt_path`)
+    while reads fall through to the shared, frozen sections. Creating an
+    overlay copies nothing, and no claim can change another claim's config.
+
+    Usage:
+        config = load_run_config('config/config.yaml')
+        judge_config = config.overlay(config['debate_judge']['openai'])
+        judge_config['prompt_path'] = '...'    # only this overlay changes
+        claim_config = judge_config.new_child() # cheap per-claim layer on top
+    """
+
+    def __init__(self, path: str, data: Mapping):
+        """Freeze the parsed config."""
+        self.path = path
+        self.data = freeze(dict(data or {}))
+
+    def __getitem__(self, section: str) -> Any:
+        """Get a (read-only) top-level section."""
+        return self.data[section]
+
+    def get(self, section: str, default: Any = None) -> Any:
+        """Get a (read-only) top-level section, or a default."""
+        return self.data.get(section, default)
+
+    def overlay(self, *sections: Mapping, **values) -> ChainMap:
+        """Create a writable view over config sections, starting with `values`."""
+        return ChainMap(dict(values), *sections)
+
+_configs: Dict[str, RunConfig] = {}
+_lock = threading.Lock()
+
+def load_run_config(path: str) -> RunConfig:
+    """Get the run config for a config file, parsing it on first use."""
+    key = os.path.abspath(path)
+    with _lock:
+        if key not in _configs:
+            with open(path, 'r') as file:
+                _configs[key] = RunConfig(path, yaml.safe_load(file))
+        return _configs[key]
@@ -1,34 +1,38 @@
-import yaml
 import logging
 import argparse
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Sequence
 from pathlib import Path
 from datetime import datetime
-import json
 from agents.debater import Debater
 from agents.judge import Judge
-from utils import PlaceholderManager, extract_content, format_transcript
+from claim_store import load_claims, ClaimView, ClaimViews, SOURCES_PER_SIDE
+from run_config import load_run_config
+from assignments import load_assigned_claims
+from source_registry import get_source_registry
+from results_db import open_results_sinks
+from source_retrieval import retrieve_sources
+from source_compression import compress_sources
+from source_dedup import dedupe_claim
+from utils import PlaceholderManager, extract_content, format_transcript, extract_provisional_verdict, strip_provisional, claim_source_seed
 import random
 import re
-import fcntl  # Add this import at the top
-
-def load_claims(dataset: str) -> List[Dict]:
-    """Load claims based on dataset type."""
-    paths = {
-        'covid': 'data/final-data/enriched_covid_data_15.json',
-        'climate': 'data/final-data/enriched_climate_data_15.json'
-    }
-    path = paths.get(dataset) or dataset
-
-    with open(path, 'r') as f:
-        all_claims = json.load(f)
-        return all_claims
+import os
+from concurrent.futures import ThreadPoolExecutor
+from run_logging import LOG_DIR, LazyJSON, claim_log_name, claim_logging, setup_logging
+from scheduler import STREAM_WINDOW_PER_WORKER, setup_scheduler, get_scheduler, submit_in_order
+from sglang_metrics import PrefixCacheReport, sglang_ports
+from planner import plan_run, format_plan
+from telemetry import get_monitor, start_monitor, DEFAULT_STATUS_INTERVAL
 
 class DebateRunner:
     """Manages the debate process between two debaters and a judge."""
     
     CONFIG_PATH = "config/config.yaml"
     TOTAL_ROUNDS = 3
+    EARLY_STOP_CONFIDENCE = 90
+    PROVISIONAL_PROMPT_PATH = "config/prompts/provisional_verdict_prompts.yaml"
+    # Tag the judge puts its answer in; also used by the planner's simulated judge
+    JUDGE_ANSWER_TAG = "questions"
     
     # Prompt paths for different debate styles
     DEBATER_PROMPT_PATHS = {
@@ -51,10 +55,23 @@ class DebateRunner:
     
     def __init__(self, debater_type: str, judge_type: str, claim: str,
                  first_debater_config: Dict = None, second_debater_config: Dict = None,
-                 judge_config: Dict = None, sources: List[Dict] = None):
-        """Initialize the debate runner."""
+                 judge_config: Dict = None, sources: List[Dict] = None,
+                 confidence_threshold: int = None, source_selection: Dict = None):
+        """Initialize the debate runner.
+        
+        If `confidence_threshold` is set, the judge gives a provisional verdict on
+        each intermediate turn and the debate skips to the judge's final verdict
+        once the provisional confidence reaches the threshold.
+        
+        `source_selection` records how `sources` were cut down (collapsed
+        duplicates, retrieved passages), for saving with the results.
+        """
         self.debater_type = debater_type
         self.judge_type = judge_type
+        self.confidence_threshold = confidence_threshold
+        self.source_selection = source_selection or {}
+        self.rounds_used = 0
+        self.stopped_early = False
         
         # Get prompt paths
         self.debater_prompt_path = self.DEBATER_PROMPT_PATHS[debater_type]
@@ -73,6 +90,8 @@ class DebateRunner:
         self.first_debater_config['prompt_path'] = self.debater_prompt_path
         self.second_debater_config['prompt_path'] = self.debater_prompt_path
         self.judge_config['prompt_path'] = self.judge_prompt_path
+        if confidence_threshold is not None:
+            self.judge_config['provisional_prompt_path'] = self.PROVISIONAL_PROMPT_PATH
         
         # Setup context and agents
         placeholder_manager = PlaceholderManager(
@@ -139,27 +158,23 @@ class DebateRunner:
 
     def _load_config(self) -> Tuple[Dict, Dict, Dict]:
         """Load and prepare configuration for all agents."""
-        with open(self.CONFIG_PATH, 'r') as file:
-            config = yaml.safe_load(file)
-            
-            first_config = {
-                **config['debaters']['first'],
-                'debater_settings': config['debater_settings'],
-                'prompt_path': self.debater_prompt_path
-            }
-            
-            second_config = {
-                **config['debaters']['second'],
-                'debater_settings': config['debater_settings'],
-                'prompt_path': self.debater_prompt_path
-            }
-            
-            judge_config = {
-                **config['debate_judge'],
-                'prompt_path': self.judge_prompt_path
-            }
-            
-            return first_config, second_config, judge_config
+        config = load_run_config(self.CONFIG_PATH)
+        
+        first_config = config.overlay(
+            config['debaters']['first'],
+            debater_settings=config['debater_settings'],
+            prompt_path=self.debater_prompt_path
+        )
+        
+        second_config = config.overlay(
+            config['debaters']['second'],
+            debater_settings=config['debater_settings'],
+            prompt_path=self.debater_prompt_path
+        )
+        
+        judge_config = config.overlay(config['debate_judge'], prompt_path=self.judge_prompt_path)
+        
+        return first_config, second_config, judge_config
 
     def run_round(self, round_num: int) -> Dict:
         """Run a single round of debate and return round data."""
@@ -168,9 +183,7 @@ class DebateRunner:
         # Get first debater's response
         first_response = self.first_debater.get_response(round_num)
         logging.info(f"\nDebater A Response (Round {round_num}):\n{first_response}\n")
-        logging.info("--------------------------------")
-        logging.info(json.dumps(self.first_debater.messages, indent=2))
-        logging.info("--------------------------------")
+        logging.debug("Debater A messages:\n%s", LazyJSON(self.first_debater.messages))
         
         # Extract first debater data
         first_thinking = extract_content(first_response, "thinking")
@@ -179,9 +192,7 @@ class DebateRunner:
         # Get second debater's response
         second_response = self.second_debater.get_response(round_num)
         logging.info(f"\nDebater B Response (Round {round_num}):\n{second_response}\n")
-        logging.info("--------------------------------")
-        logging.info(json.dumps(self.second_debater.messages, indent=2))
-        logging.info("--------------------------------")
+        logging.debug("Debater B messages:\n%s", LazyJSON(self.second_debater.messages))
         
         # Extract second debater data
         second_thinking = extract_content(second_response, "thinking")
@@ -203,18 +214,23 @@ class DebateRunner:
         self.judge_context['previous_rounds_transcript_debate'] = transcript_text
         
         # Debug print after updating contexts
-        logging.info(f"Updated transcript: {transcript_text}")
+        logging.debug("Updated transcript: %s", transcript_text)
         
         # Get judge's response
-        judge_response = self.judge.get_response(round_num)
+        judge_response = self.judge.get_response(round_num, final=round_num == self.TOTAL_ROUNDS)
         logging.info(f"\nJudge Response (Round {round_num}):\n{judge_response}\n")
-        logging.info("--------------------------------")
-        logging.info(json.dumps(self.judge.messages, indent=2))
-        logging.info("--------------------------------")
+        logging.debug("Judge messages:\n%s", LazyJSON(self.judge.messages))
         
-        # Extract judge data
-        judge_thinking = extract_content(judge_response, "thinking")
-        judge_questions = extract_content(judge_response, "questions")
+        # Extract judge data, leaving out the provisional verdict so it never reaches the transcript
+        visible_response = strip_provisional(judge_response)
+        judge_thinking = extract_content(visible_response, "thinking")
+        judge_questions = extract_content(visible_response, self.JUDGE_ANSWER_TAG)
+        judge_data = {
+            "thinking": judge_thinking,
+            "questions": judge_questions
+        }
+        if self.confidence_threshold is not None and round_num < self.TOTAL_ROUNDS:
+            judge_data["provisional_verdict"], judge_data["provisional_confidence"] = extract_provisional_verdict(judge_response)
         
         # Add judge questions to transcript if not final round
         if round_num < self.TOTAL_ROUNDS:
@@ -234,12 +250,32 @@ class DebateRunner:
                 "thinking": second_thinking,
                 "argument": second_argument
             },
+            "judge": judge_data
+        }
+
+    def run_final_judgement(self, round_num: int) -> Dict:
+        """Ask the judge for its final verdict now, skipping the remaining debate rounds."""
+        logging.info(f"\n{'='*50}\nJudge is confident, skipping to final verdict (round {round_num})\n{'='*50}")
+        
+        judge_response = self.judge.get_response(round_num, final=True)
+        logging.info(f"\nJudge Response (Round {round_num}):\n{judge_response}\n")
+        
+        return {
+            "round_number": round_num,
+            "judge_only": True,
             "judge": {
-                "thinking": judge_thinking,
-                "questions": judge_questions
+                "thinking": extract_content(judge_response, "thinking"),
+                "questions": extract_content(judge_response, self.JUDGE_ANSWER_TAG)
             }
         }
 
+    def _should_stop_early(self, round_info: Dict) -> bool:
+        """Whether the judge's provisional confidence allows skipping to the final verdict."""
+        if self.confidence_threshold is None or round_info['round_number'] >= self.TOTAL_ROUNDS:
+            return False
+        confidence = round_info['judge'].get('provisional_confidence')
+        return confidence is not None and confidence >= self.confidence_threshold
+
     def run(self) -> None:
         """Run the complete debate process."""
         try:
@@ -248,6 +284,12 @@ class DebateRunner:
                 try:
                     round_info = self.run_round(round_num)
                     round_data.append(round_info)
+                    self.rounds_used = round_num
+                    get_monitor().round_finished()
+                    if self._should_stop_early(round_info):
+                        round_data.append(self.run_final_judgement(round_num + 1))
+                        self.stopped_early = True
+                        break
                 except Exception as e:
                     logging.error(f"Error in round {round_num}", exc_info=e)
                     raise
@@ -261,31 +303,120 @@ class DebateRunner:
 
     @classmethod
     def _load_base_config(cls, debater_a_model: str, debater_b_model: str, judge_model: str) -> Tuple[Dict, Dict, Dict]:
-        """Load base configuration for specified models."""
-        with open(cls.CONFIG_PATH, 'r') as file:
-            config = yaml.safe_load(file)
-            
-            # Map model names to config keys
-            model_map = {
-                'gpt4o': 'openai',
-                'claude': 'anthropic',
-                'qwen': 'sglang',
-                'deepseek': 'azure'
-            }
-            
-            # Get configs for each agent
-            first_debater_config = config['debaters']['first'][model_map[debater_a_model]]
-            second_debater_config = config['debaters']['second'][model_map[debater_b_model]]
-            judge_config = config['debate_judge'][model_map[judge_model]]
-            
-            # Add debater settings
-            first_debater_config['debater_settings'] = config['debater_settings']
-            second_debater_config['debater_settings'] = config['debater_settings']
-            
-            return first_debater_config, second_debater_config, judge_config
+        """Create fresh copy-on-write configs for the specified models over the once-loaded run config."""
+        config = load_run_config(cls.CONFIG_PATH)
+        
+        # Map model names to config keys
+        model_map = {
+            'gpt4o': 'openai',
+            'claude': 'anthropic',
+            'qwen': 'sglang',
+            'deepseek': 'azure'
+        }
+        
+        # Get configs for each agent, with debater settings added
+        first_debater_config = config.overlay(
+            config['debaters']['first'][model_map[debater_a_model]],
+            debater_settings=config['debater_settings']
+        )
+        second_debater_config = config.overlay(
+            config['debaters']['second'][model_map[debater_b_model]],
+            debater_settings=config['debater_settings']
+        )
+        judge_config = config.overlay(config['debate_judge'][model_map[judge_model]])
+        
+        return first_debater_config, second_debater_config, judge_config
 
-def main():
-    """Run the debate process."""
+def build_runner(args, claim_data: ClaimView) -> DebateRunner:
+    """Build the debate runner for one claim from the command-line settings."""
+    first_debater_config, second_debater_config, judge_config = DebateRunner._load_base_config(
+        args.debater_a_model, 
+        args.debater_b_model, 
+        args.judge_model
+    )
+
+    if args.judge == 'persona':
+        first_debater_config['judge_prolific_id'] = args.judge_prolific_id
+    
+    # Add claim veracity and argue_for setting
+    first_debater_config['claim_veracity'] = claim_data.veracity
+    first_debater_config['argue_for_debater_a'] = args.argue_for_debater_a
+    first_debater_config['shared_prefix'] = args.prefix_cache
+    if args.source_seed is not None:
+        first_debater_config['source_seed'] = claim_source_seed(args.source_seed, claim_data.claim)
+    if args.max_prompt_tokens:
+        for config in (first_debater_config, second_debater_config, judge_config):
+            config['max_prompt_tokens'] = args.max_prompt_tokens
+    
+    # Cut the sources down to distinct stories, then to the passages and sentences most relevant to the claim
+    top_k = None if args.source_budget else SOURCES_PER_SIDE
+    sources, source_selection = claim_data.top_sources(top_k).sources, {}
+    if 'browsing' in args.debater:
+        if args.dedupe_sources:
+            claim_data, duplicates, tokens_saved = dedupe_claim(claim_data, top_k=top_k)
+            sources = claim_data.sources
+            source_selection.update(duplicates=duplicates, duplicate_tokens_saved=tokens_saved)
+            if duplicates:
+                logging.info(f"Collapsed {sum(map(len, duplicates.values()))} near-duplicate sources, "
+                             f"freeing {tokens_saved:,} tokens for distinct ones")
+        if args.source_budget:
+            sources, source_selection['passages'] = retrieve_sources(claim_data, args.source_budget, args.source_top_k)
+        if args.compress_sources:
+            sources = compress_sources(sources, claim_data.claim, args.compress_sources)
+    
+    # Then create runner with configs
+    runner = DebateRunner(
+        debater_type=args.debater,
+        judge_type=args.judge,
+        claim=claim_data.claim,
+        first_debater_config=first_debater_config,
+        second_debater_config=second_debater_config,
+        judge_config=judge_config,
+        sources=sources,
+        confidence_threshold=args.confidence_threshold if args.adaptive_rounds else None,
+        source_selection=source_selection
+    )
+    return runner
+
+def run_claim(args, claim_data: ClaimView) -> Tuple[DebateRunner, Dict]:
+    """Run the full debate for one claim and return the runner and its debate data."""
+    get_monitor().claim_started()
+    logging.info(f"\nProcessing claim: {claim_data.claim}")
+    # Everything logged while the claim runs goes to its own log file
+    with claim_logging(claim_log_name(claim_data.claim)):
+        runner = build_runner(args, claim_data)
+        round_data = runner.run()
+    # The results cite sources by ID
+    claim_data.save_sources()
+    debate_data = {
+        'metadata': {
+            'claim': claim_data.claim,
+            'veracity': claim_data.veracity,
+            'label': claim_data.label,
+            'evidence': claim_data.evidence,
+            'evidence_label': claim_data.evidence_label,
+            'article': claim_data.article
+        },
+        'rounds': round_data,
+        'rounds_used': runner.rounds_used,
+        'stopped_early': runner.stopped_early,
+        'source_seed': runner.first_debater_config.get('source_seed'),
+        'source_selection': runner.source_selection,
+        # Calls whose prompt was trimmed to --max-prompt-tokens, by agent
+        'prompt_trims': {
+            role: agent.prompt_trims
+            for role, agent in (('debater_a', runner.first_debater), ('debater_b', runner.second_debater), ('judge', runner.judge))
+            if agent.prompt_trims
+        },
+        'source_ids': {
+            'supporting_sources': list(claim_data.supporting_source_ids),
+            'opposing_sources': list(claim_data.opposing_source_ids)
+        }
+    }
+    return runner, debate_data
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser for debate runs."""
     parser = argparse.ArgumentParser(description='Run debate with different configurations')
     parser.add_argument('--debater', 
                        choices=['default', 'browsing', 'default-personalized', 'browsing-personalized'],
@@ -321,114 +452,194 @@ def main():
     parser.add_argument('--test-run',
                        action='store_true',
                        help='Run with only the first claim for testing purposes')
-    
-    args = parser.parse_args()
-    
+    parser.add_argument('--workers',
+                       type=int,
+                       help='Number of claims to run concurrently (default: scheduler.claim_workers in config)')
+    parser.add_argument('--provider-limit',
+                       action='append',
+                       metavar='PROVIDER=N',
+                       help='Override the in-flight request limit for a provider, e.g. --provider-limit sglang=4')
+    parser.add_argument('--adaptive-concurrency',
+                       action='store_true',
+                       help='Adapt provider limits to observed latency and rate-limit errors (AIMD)')
+    parser.add_argument('--adaptive-rounds',
+                       action='store_true',
+                       help='Skip to the final verdict once the judge\'s provisional confidence reaches --confidence-threshold')
+    parser.add_argument('--confidence-threshold',
+                       type=int,
+                       default=DebateRunner.EARLY_STOP_CONFIDENCE,
+                       help='Provisional confidence (1-100) needed to stop early with --adaptive-rounds')
+    parser.add_argument('--source-seed',
+                       type=int,
+                       help='Seed for reproducible per-claim source ordering (recorded with the results)')
+    parser.add_argument('--prefix-cache',
+                       action='store_true',
+                       help='Lead every source-reading prompt with an identical claim and sources block so SGLang can reuse its prefix cache (implies seeded source ordering)')
+    parser.add_argument('--dedupe-sources',
+                       action='store_true',
+                       help='Collapse near-duplicate sources (MinHash/LSH) into one with merged URLs before building the prompts')
+    parser.add_argument('--source-budget',
+                       type=int,
+                       help='Token budget for reference sources: pick the passages most relevant to the claim (BM25) from all of its sources instead of the first 7 per side')
+    parser.add_argument('--source-top-k',
+                       type=int,
+                       help='Maximum passages per claim with --source-budget (split between the two sides)')
+    parser.add_argument('--compress-sources',
+                       type=int,
+                       metavar='TOKENS',
+                       help='Compress each source to at most TOKENS tokens, keeping the sentences most relevant to the claim (cached in data/sources/compressed.jsonl)')
+    parser.add_argument('--max-prompt-tokens',
+                       type=int,
+                       help='Per-call prompt budget for every agent (overrides max_prompt_tokens in config): trims thinking advice, then sources, then older rounds to fit')
+    parser.add_argument('--results-db',
+                       metavar='PATH',
+                       help='Also save results to this SQLite results database, e.g. saved-data/results.db (see results_db.py)')
+    parser.add_argument('--compress-transcripts',
+                       action='store_true',
+                       help='Store round transcripts compressed with the trained dictionary (python transcript_store.py train) and climate articles by content hash')
+    parser.add_argument('--stream-results',
+                       action='store_true',
+                       help='Write each claim to the results log as soon as it finishes and drop it from memory, keeping memory flat on large sweeps')
+    parser.add_argument('--log-level',
+                       choices=['DEBUG', 'INFO', 'WARNING'],
+                       default='INFO',
+                       help='Logging level; DEBUG also logs every agent\'s full message history each round')
+    parser.add_argument('--plan',
+                       action='store_true',
+                       help='Print the expected calls, tokens, cost and wall time without making any API calls')
+    parser.add_argument('--status-interval',
+                       type=float,
+                       default=DEFAULT_STATUS_INTERVAL,
+                       help='Seconds between live status lines and status file updates (saved-data/status/)')
+    return parser
+
+def load_run_claims(args) -> Sequence[ClaimView]:
+    """Load the claims for a run."""
     # Load claims based on dataset
     if args.judge == 'persona':
-        claims_data = load_claims(f"./debate-claim-assignment-by-participant/{args.judge_prolific_id}_{args.dataset}.json")
+        claims_data = load_assigned_claims('debate', args.judge_prolific_id, args.dataset)
     else:
         claims_data = load_claims(args.dataset)
+    # With a source budget every source is a retrieval candidate; duplicates are collapsed before the top sources are kept
+    claims_data = ClaimViews(claims_data, None if args.source_budget or args.dedupe_sources else SOURCES_PER_SIDE)
 
     # If test run, use only the first claim
     if args.test_run:
         claims_data = claims_data[:1]
+    return claims_data
+
+def status_run_name(args) -> str:
+    """Name of this run's live status file, unique per process."""
+    name = (f"debate_{args.debater}_{args.judge}_{args.dataset}_{args.argue_for_debater_a}"
+            f"_da-{args.debater_a_model}_db-{args.debater_b_model}_j-{args.judge_model}")
+    if args.judge_prolific_id:
+        name += f"_{args.judge_prolific_id}"
+    return f"{name}_{os.getpid()}"
+
+def main():
+    """Run the debate process."""
+    args = build_parser().parse_args()
+    workers = setup_scheduler(DebateRunner.CONFIG_PATH, args.workers, args.provider_limit, args.adaptive_concurrency)
+
+    # Seeded source ordering keeps the shared prefix byte-identical across agents and runs
+    if args.prefix_cache and args.source_seed is None:
+        args.source_seed = random.randrange(2**32)
+        print(f"\nUsing source seed {args.source_seed}")
+    
+    # Claim details go to one log file per claim; the console shows run-level progress and warnings.
+    # Configured before loading claims so their warnings are logged too; a plan only logs to the console.
+    log_dir = None if args.plan else LOG_DIR / f"{status_run_name(args)}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    log_dir = setup_logging(log_dir, args.log_level)
+
+    claims_data = load_run_claims(args)
+    if args.test_run:
         print(f"\n🧪 TEST RUN MODE: Processing only the first claim for testing")
+
+    if args.plan:
+        plan = plan_run((build_runner(args, claim_data) for claim_data in claims_data), workers, DebateRunner.CONFIG_PATH)
+        print(format_plan(plan))
+        return
     
     # Create setup directory
     setup_dir = Path('saved-data/debate') / f"debater_{args.debater}_judge_{args.judge}"
     setup_dir.mkdir(parents=True, exist_ok=True)
     
-    # # Setup logging
-    # log_file = setup_dir / f"{args.dataset}.log"
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            # logging.FileHandler(log_file),  # Commented out file logging
-            logging.StreamHandler()
-        ]
-    )
+    print(f"\nPer-claim logs: {log_dir}")
     
     # Process each claim
     all_debate_data = {}
     
-    print(f"\nStarting claims processing... Total claims: {len(claims_data)}")
+    print(f"\nStarting claims processing... Total claims: {len(claims_data)}, workers: {workers}")
     if len(claims_data) == 0:
         return
     
-    for claim_data in claims_data:
-        try:
-            logging.info(f"\nProcessing claim: {claim_data['claim']}")
-            
-            # Combine supporting and opposing sources (limited to first 7 each)
-            all_sources = []
-            if 'supporting_sources' in claim_data:
-                all_sources.extend(claim_data['supporting_sources'][:7])  # Take first 7 supporting sources
-            if 'opposing_sources' in claim_data:
-                all_sources.extend(claim_data['opposing_sources'][:7])  # Take first 7 opposing sources
-            
-            first_debater_config, second_debater_config, judge_config = DebateRunner._load_base_config(
-                args.debater_a_model, 
-                args.debater_b_model, 
-                args.judge_model
-            )
-
-            if args.judge == 'persona':
-                first_debater_config['judge_prolific_id'] = args.judge_prolific_id
-            
-            # Add claim veracity and argue_for setting
-            first_debater_config['claim_veracity'] = claim_data['veracity']
-            first_debater_config['argue_for_debater_a'] = args.argue_for_debater_a
-            
-            # Then create runner with configs
-            runner = DebateRunner(
-                debater_type=args.debater,
-                judge_type=args.judge,
-                claim=claim_data['claim'],
-                first_debater_config=first_debater_config,
-                second_debater_config=second_debater_config,
-                judge_config=judge_config,
-                sources=all_sources
-            )
-            
-            # Get round data and store in all_debate_data
-            round_data = runner.run()
-            claim_key = f"claim_{len(all_debate_data) + 1}"
-            all_debate_data[claim_key] = {
-                'metadata': {
-                    'claim': claim_data['claim'],
-                    'veracity': claim_data['veracity'],
-                    'label': claim_data.get('label'),
-                    'evidence': claim_data.get('evidence'),
-                    'evidence_label': claim_data.get('evidence_label'),
-                    'article': claim_data.get('article')
-                },
-                'rounds': round_data,
-                'supporting_sources': claim_data.get('supporting_sources', []),
-                'opposing_sources': claim_data.get('opposing_sources', [])
-            }
-            
-        except Exception as e:
-            logging.error(f"Error processing claim: {claim_data['claim']}")
-            logging.error(f"Error details", exc_info=e)
-            continue
+    # Snapshot SGLang prefix cache counters to report the hit rate for this run
+    cache_report = PrefixCacheReport(sglang_ports(DebateRunner._load_base_config(
+        args.debater_a_model, args.debater_b_model, args.judge_model
+    )))
+    monitor = start_monitor(status_run_name(args), len(claims_data), args.status_interval)
+    
+    results_sinks = None
+    if args.stream_results:
+        # Each finished claim is written out and dropped, so memory stays flat however many claims run
+        run_id = new_run_id(args)
+        results_file = results_path(args)
+        results_sinks = open_results_sinks(results_file, 'debate', args.results_db, args.compress_transcripts)
+    claim_count = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit(claim_data):
+            future = executor.submit(run_claim, args, claim_data)
+            future.add_done_callback(lambda done: monitor.claim_finished(done.exception() is None))
+            return future
+
+        # Collect in input order so claim numbering matches the sequential run
+        window = STREAM_WINDOW_PER_WORKER * workers if args.stream_results else None
+        for claim_data, future in submit_in_order(submit, claims_data, window):
+            try:
+                runner, debate_data = future.result()
+            except Exception as e:
+                logging.error(f"Error processing claim: {claim_data.claim}")
+                logging.error(f"Error details", exc_info=e)
+                continue
+            claim_count += 1
+            claim_key = f"claim_{claim_count}"
+            if results_sinks is not None:
+                results_sinks.append_claim(run_id, claim_key, build_claim_info(args, runner, debate_data))
+            else:
+                all_debate_data[claim_key] = debate_data
+    progress = monitor.stop()
+    
+    if not claim_count:
+        logging.error("No claims were processed successfully, nothing to save")
+        if results_sinks is not None:
+            results_sinks.close()
+        return
     
     # Save results with runner context
-    save_debate_results(args, all_debate_data, runner)
+    telemetry = {'sglang_prefix_cache': cache_report.finish(), 'progress': progress}
+    if results_sinks is not None:
+        # The run line marks the streamed claims as a complete run
+        with results_sinks:
+            results_sinks.finish_run(run_id, build_run_data(args, runner, telemetry), claim_count)
+        logging.info(f"Saved results to {results_file}")
+        return
+    save_debate_results(args, all_debate_data, runner, telemetry)
 
-def save_debate_results(args, all_debate_data, runner):
-    """Save results with file locking for parallel processing."""
+def results_path(args) -> Path:
+    """The setup's results log for this run's position."""
     base_dir = Path('saved-data/debate')
     setup_dir = base_dir / f"debater_{args.debater}_judge_{args.judge}" / args.dataset
     setup_dir.mkdir(parents=True, exist_ok=True)
-    
-    results_file = setup_dir / f"results_{args.argue_for_debater_a}.json"
-    
-    # Process the data first
-    run_id = f"run_da-{args.debater_a_model}_db-{args.debater_b_model}_j-{args.judge_model}_{datetime.now().strftime('%Y%m%d_%H%M%S.%f')}"
-    
-    run_data = {
+    return setup_dir / f"results_{args.argue_for_debater_a}.jsonl"
+
+def new_run_id(args) -> str:
+    """A unique ID for this run."""
+    return f"run_da-{args.debater_a_model}_db-{args.debater_b_model}_j-{args.judge_model}_{datetime.now().strftime('%Y%m%d_%H%M%S.%f')}"
+
+def build_run_data(args, runner, telemetry: Dict = None) -> Dict:
+    """The run's metadata and telemetry, with its claims still empty."""
+    return {
         'metadata': {
             'setup': f"{args.debater}_{args.judge}",
             'prolific_id': args.judge_prolific_id if hasattr(args, 'judge_prolific_id') else None,
@@ -441,69 +652,80 @@ def save_debate_results(args, all_debate_data, runner):
             'word_limit': runner.first_debater_config['debater_settings']['word_limit'],
             'debater_a_temperature': runner.first_debater_config['temperature'],
             'debater_b_temperature': runner.second_debater_config['temperature'],
-            'judge_temperature': runner.judge_config['temperature']
+            'judge_temperature': runner.judge_config['temperature'],
+            'early_stop_confidence': args.confidence_threshold if args.adaptive_rounds else None,
+            'source_seed': args.source_seed,
+            'prefix_cache': args.prefix_cache,
+            'source_registry': str(get_source_registry().path),
+            'source_budget': args.source_budget,
+            'dedupe_sources': args.dedupe_sources,
+            'source_top_k': args.source_top_k,
+            'compress_sources': args.compress_sources,
+            'max_prompt_tokens': args.max_prompt_tokens
         },
-        'claims': {}
+        'claims': {},
+        # Provider limits and adaptive-concurrency state at the end of the run
+        'telemetry': {
+            'scheduler': get_scheduler().snapshot(),
+            **(telemetry or {})
+        }
     }
-    
-    # Process claims data
+
+def build_claim_info(args, runner, claim_data: Dict) -> Dict:
+    """The saved results of one claim, from its data as returned by run_claim."""
+    # Create new PlaceholderManager for each claim
+    claim_config = runner.first_debater_config.copy()
+    claim_config['claim_veracity'] = claim_data['metadata']['veracity']
+    claim_config['argue_for_debater_a'] = args.argue_for_debater_a
+
+    placeholder_manager = PlaceholderManager(claim_config, args.debater, 'debate', claim_data['metadata']['claim'])
+    claim_context = placeholder_manager.get_context()
+
+    # Extract judge's final verdict from last round
+    judge_questions = claim_data['rounds'][-1]['judge']['questions']
+    verdict, confidence = extract_verdict(judge_questions)
+
+    # Detailed claim info
+    claim_info = {
+        'claim': claim_data['metadata']['claim'],
+        'true_label': claim_data['metadata']['veracity'],
+        'debater_a_defending': claim_context['ANSWER_DEFENDING'],
+        'debater_a_opposing': claim_context['ANSWER_OPPOSING'],
+        'debater_b_defending': claim_context['ANSWER_OPPOSING'],  # B argues opposite of A
+        'debater_b_opposing': claim_context['ANSWER_DEFENDING'],  # B argues opposite of A
+        'judge_final_verdict': verdict,
+        'judge_confidence_level': confidence,
+        'label': claim_data['metadata'].get('label'),
+        'rounds_used': claim_data.get('rounds_used', len(claim_data['rounds'])),
+        'stopped_early': claim_data.get('stopped_early', False),
+        'source_seed': claim_data.get('source_seed'),
+        'rounds': claim_data['rounds'],
+        # Sources are stored once in the source registry and referenced by ID
+        'source_ids': claim_data['source_ids'],
+        # Duplicates collapsed and passages kept with --dedupe-sources / --source-budget
+        'source_selection': claim_data.get('source_selection'),
+        # Prompts trimmed to --max-prompt-tokens, per agent; empty when nothing was trimmed
+        'prompt_trims': claim_data.get('prompt_trims', {})
+    }
+
+    # Add optional fields for climate dataset
+    for field in ['evidence', 'evidence_label', 'article']:
+        if field in claim_data['metadata']:
+            claim_info[field] = claim_data['metadata'][field]
+    return claim_info
+
+def save_debate_results(args, all_debate_data, runner, telemetry: Dict = None):
+    """Append the run to the setup's results log (see results_log.py) and results database."""
+    results_file = results_path(args)
+    run_id = new_run_id(args)
+    run_data = build_run_data(args, runner, telemetry)
     for claim_id, claim_data in all_debate_data.items():
-        # Create new PlaceholderManager for each claim
-        claim_config = runner.first_debater_config.copy()
-        claim_config['claim_veracity'] = claim_data['metadata']['veracity']
-        claim_config['argue_for_debater_a'] = args.argue_for_debater_a
-        
-        placeholder_manager = PlaceholderManager(claim_config, args.debater, 'debate', claim_data['metadata']['claim'])
-        claim_context = placeholder_manager.get_context()
-        
-        # Extract judge's final verdict from last round
-        judge_questions = claim_data['rounds'][-1]['judge']['questions']
-        verdict, confidence = extract_verdict(judge_questions)
-        
-        # Detailed claim info
-        claim_info = {
-            'claim': claim_data['metadata']['claim'],
-            'true_label': claim_data['metadata']['veracity'],
-            'debater_a_defending': claim_context['ANSWER_DEFENDING'],
-            'debater_a_opposing': claim_context['ANSWER_OPPOSING'],
-            'debater_b_defending': claim_context['ANSWER_OPPOSING'],  # B argues opposite of A
-            'debater_b_opposing': claim_context['ANSWER_DEFENDING'],  # B argues opposite of A
-            'judge_final_verdict': verdict,
-            'judge_confidence_level': confidence,
-            'label': claim_data['metadata'].get('label'),
-            'rounds': claim_data['rounds'],
-            'sources': {
-                'supporting_sources': [clean_source(s) for s in claim_data.get('supporting_sources', [])[:7]],
-                'opposing_sources': [clean_source(s) for s in claim_data.get('opposing_sources', [])[:7]]
-            }
-        }
-        
-        # Add optional fields for climate dataset
-        for field in ['evidence', 'evidence_label', 'article']:
-            if field in claim_data['metadata']:
-                claim_info[field] = claim_data['metadata'][field]
-        
-        run_data['claims'][claim_id] = claim_info
-    
-    # File locking for concurrent access
-    with open(results_file, 'a+') as f:
-        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
-        try:
-            # Read existing data
-            f.seek(0)
-            content = f.read()
-            existing_data = json.loads(content) if content else {'runs': {}}
-            
-            # Add new run
-            existing_data['runs'][run_id] = run_data
-            
-            # Write back
-            f.seek(0)
-            f.truncate()
-            json.dump(existing_data, f, indent=2)
-            
-        finally:
-            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        run_data['claims'][claim_id] = build_claim_info(args, runner, claim_data)
+
+    # One O_APPEND line per claim plus a closing run line; no lock, no rewrite of earlier runs.
+    # With --results-db the run is also saved to the SQLite database in one transaction.
+    with open_results_sinks(results_file, 'debate', args.results_db, args.compress_transcripts) as results_sinks:
+        results_sinks.append_run(run_id, run_data)
     
     logging.info(f"Saved results to {results_file}")
 
@@ -529,13 +751,5 @@ def extract_verdict(question_text: str) -> (str, int):
 
     return (verdict, confidence)
 
-def clean_source(source):
-    """Clean source object to only include essential fields."""
-    return {
-        'title': source.get('title', ''),
-        'url': source.get('url', ''),
-        'content': source.get('content', '')
-    }
-
 if __name__ == "__main__":
     main()
@@ -0,0 +1,165 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterator, Optional, Union
+from claim_store import claim_hash
+
+LOG_DIR = Path('saved-data/logs')
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Per-claim log files kept open at once; older ones are closed and reopened on their next record
+MAX_OPEN_FILES = 64
+
+# Name of the claim the current thread is working on, if any
+_claim_name: ContextVar[Optional[str]] = ContextVar('claim_name', default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+class LazyJSON:
+    """A value that is serialized to indented JSON only if the log record is formatted.
+
+    Usage:
+        logging.debug("Judge messages:\\n%s", LazyJSON(self.judge.messages))
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        """Wrap a JSON-serializable value, copying a list or dict so later appends are not logged."""
+        self.value = copy.copy(value) if isinstance(value, (list, dict)) else value
+
+    def __str__(self) -> str:
+        """The value as indented JSON."""
+        return json.dumps(self.value, indent=2, ensure_ascii=False)
+
+@contextmanager
+def claim_logging(name: str) -> Iterator[None]:
+    """Send the current thread's log records to the claim's own log file while in the block."""
+    token = _claim_name.set(name)
+    try:
+        yield
+    finally:
+        _claim_name.reset(token)
+
+def claim_log_name(claim: str) -> str:
+    """A short file-safe name for a claim's log: its first words and a hash of the claim."""
+    words = '_'.join(re.findall(r'\w+', claim.lower())[:6])[:60]
+    return f"{words}_{claim_hash(claim)[:8]}"
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """A QueueHandler that enqueues records unformatted, leaving all formatting to the listener thread.
+
+    QueueHandler.prepare formats each record in the thread that logs it, so
+    it can be pickled; the queue here never leaves the process.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Enqueue the record as it is."""
+        return record
+
+class ClaimTagFilter(logging.Filter):
+    """Tags records with the claim of the thread that logged them (before they cross the queue)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Add `record.claim` and let the record through."""
+        record.claim = _claim_name.get()
+        return True
+
+class ConsoleFilter(logging.Filter):
+    """Keeps per-claim detail off the console: run-level records and warnings only."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Pass records without a claim, and warnings or worse from any claim."""
+        return getattr(record, 'claim', None) is None or record.levelno >= logging.WARNING
+
+class ClaimFileHandler(logging.Handler):
+    """Writes each claim's records to `<directory>/<claim>.log`, and untagged records to `run.log`.
+
+    Only used from the listener thread, so files are written one record at a
+    time without interleaving.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        """Initialize without creating the directory until the first record."""
+        super().__init__()
+        self.directory = Path(directory)
+        self._files: 'OrderedDict[str, Any]' = OrderedDict()
+
+    def _file(self, name: str):
+        """The open file for a log name, opening it (and closing the oldest) as needed."""
+        f = self._files.pop(name, None)
+        if f is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            f = open(self.directory / f"{name}.log", 'a', encoding='utf-8')
+            while len(self._files) >= MAX_OPEN_FILES:
+                self._files.popitem(last=False)[1].close()
+        self._files[name] = f
+        return f
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Append the formatted record to its claim's file."""
+        try:
+            f = self._file(getattr(record, 'claim', None) or 'run')
+            f.write(self.format(record) + '\n')
+            f.flush()
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        """Close every open file."""
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+        super().close()
+
+def setup_logging(log_dir: Optional[Union[str, Path]] = None, level: Union[int, str] = logging.INFO) -> Optional[Path]:
+    """Route all logging through a queue to a listener thread that writes the console and per-claim files.
+
+    Threads only enqueue unformatted records, so a slow terminal or disk
+    (or serializing a message dump) never stalls an API worker. Records below `level` are dropped before any formatting,
+    so DEBUG-only message dumps cost nothing at INFO. Returns the log
+    directory (None without per-claim files).
+    """
+    global _listener
+    stop_logging()
+    formatter = logging.Formatter(LOG_FORMAT)
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+    handlers = [console]
+    if log_dir is not None:
+        console.addFilter(ConsoleFilter())
+        claim_files = ClaimFileHandler(log_dir)
+        claim_files.setFormatter(formatter)
+        handlers.append(claim_files)
+
+    records = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(records)
+    queue_handler.addFilter(ClaimTagFilter())
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return Path(log_dir) if log_dir is not None else None
+
+def stop_logging() -> None:
+    """Flush the queue and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(stop_logging)
@@ -0,0 +1,317 @@
+import re
+import threading
+import logging
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from time import monotonic, time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from run_config import load_run_config
+
+DEFAULT_PROVIDER_LIMIT = 4
+DEFAULT_CLAIM_WORKERS = 8
+
+# Claims submitted ahead per worker when results are streamed, so workers stay busy behind a slow claim
+STREAM_WINDOW_PER_WORKER = 2
+
+# Error texts that signal overload when an error carries no status code; 429 only as a whole number
+CONGESTION_PATTERN = re.compile(r'\b429\b|rate.limit|timed out|timeout|overloaded', re.IGNORECASE)
+
+DEFAULT_ADAPTIVE_SETTINGS = {
+    'enabled': False,
+    'min_limit': 1,
+    'max_limit': 32,
+    'increase': 1,
+    'decrease_factor': 0.5,
+    'latency_window': 50,
+    'p95_tolerance': 2.0
+}
+
+class ProviderQueue:
+    """FIFO queue with its own concurrency limit for a single provider."""
+
+    def __init__(self, provider: str, limit: int):
+        """Initialize an empty queue for the provider."""
+        self.provider = provider
+        self.limit = max(1, int(limit))
+        self.in_flight = 0
+        self._waiting = deque()
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until this caller is at the head of the queue and a slot is free."""
+        ticket = object()
+        with self._condition:
+            self._waiting.append(ticket)
+            while self._waiting[0] is not ticket or self.in_flight >= self.limit:
+                self._condition.wait()
+            self._waiting.popleft()
+            self.in_flight += 1
+            # Wake the next waiter so it can re-check the head of the queue
+            self._condition.notify_all()
+
+    def release(self) -> None:
+        """Free a slot and wake waiting callers."""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def set_limit(self, limit: int) -> None:
+        """Change the concurrency limit; waiting callers re-check immediately."""
+        with self._condition:
+            self.limit = max(1, int(limit))
+            self._condition.notify_all()
+
+    def snapshot(self) -> Dict:
+        """Return the current limit, in-flight and queued counts."""
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'queued': len(self._waiting)
+            }
+
+def is_congestion_error(error: BaseException) -> bool:
+    """Whether an API error signals overload (rate limit, timeout, server busy)."""
+    if isinstance(error, TimeoutError):
+        return True
+    status_code = getattr(error, 'status_code', None)
+    if status_code is not None:
+        return status_code in (408, 429, 503, 529)
+    return CONGESTION_PATTERN.search(str(error)) is not None
+
+def percentile(values, fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of a sequence of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+class AIMDController:
+    """Adapts one provider's concurrency limit from observed latency and errors.
+
+    The limit grows additively by `increase` after a full window of healthy calls
+    made while callers are queueing (as many successes as the current limit), and is
+    cut multiplicatively by `decrease_factor` on 429s, timeouts, or when the
+    recent p95 latency exceeds `p95_tolerance` times the best p95 seen so far.
+    Only one cut is applied per window so a burst of errors counts once.
+    """
+
+    def __init__(self, provider_queue: ProviderQueue, min_limit: int = 1, max_limit: int = 32,
+                 increase: int = 1, decrease_factor: float = 0.5, latency_window: int = 50,
+                 p95_tolerance: float = 2.0):
+        """Initialize the controller for a provider queue."""
+        self.queue = provider_queue
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.p95_tolerance = p95_tolerance
+        self.latencies = deque(maxlen=latency_window)
+        self.baseline_p95 = None
+        self.successes_since_change = 0
+        self.calls_since_decrease = 0
+        self.counts = {'calls': 0, 'errors': 0, 'congestion_errors': 0, 'increases': 0, 'decreases': 0}
+        self.history = deque(maxlen=100)
+        self._lock = threading.Lock()
+        provider_queue.set_limit(min(max(provider_queue.limit, min_limit), max_limit))
+
+    def record(self, latency: float, error: Optional[BaseException] = None) -> None:
+        """Record the outcome of one call and adjust the limit."""
+        with self._lock:
+            self.counts['calls'] += 1
+            self.calls_since_decrease += 1
+            limit = self.queue.limit
+
+            if error is not None:
+                self.counts['errors'] += 1
+                if is_congestion_error(error):
+                    self.counts['congestion_errors'] += 1
+                    self._decrease(limit, f"{type(error).__name__}: {str(error)[:80]}")
+                return
+
+            self.latencies.append(latency)
+            # Latency is only judged over a full window of recent calls
+            if len(self.latencies) == self.latencies.maxlen:
+                p95 = percentile(self.latencies, 0.95)
+                if self.baseline_p95 is None or p95 < self.baseline_p95:
+                    self.baseline_p95 = p95
+                if p95 > self.baseline_p95 * self.p95_tolerance:
+                    self._decrease(limit, f"p95 {p95:.1f}s above baseline {self.baseline_p95:.1f}s")
+                    return
+
+            # Only successes while the limit is holding callers back count towards an increase
+            snapshot = self.queue.snapshot()
+            if not (snapshot['queued'] > 0 or snapshot['in_flight'] + 1 >= limit):
+                return
+            self.successes_since_change += 1
+            if self.successes_since_change >= limit and limit < self.max_limit:
+                self._set_limit(min(self.max_limit, limit + self.increase), 'healthy window', 'increases')
+
+    def _decrease(self, limit: int, reason: str) -> None:
+        """Cut the limit multiplicatively, at most once per window of calls."""
+        if self.calls_since_decrease < limit and self.counts['decreases']:
+            return
+        self.calls_since_decrease = 0
+        # Forget latencies from the overloaded period before judging the next window
+        self.latencies.clear()
+        self._set_limit(max(self.min_limit, int(limit * self.decrease_factor)), reason, 'decreases')
+
+    def _set_limit(self, new_limit: int, reason: str, counter: str) -> None:
+        """Apply a new limit and record the change."""
+        old_limit = self.queue.limit
+        self.successes_since_change = 0
+        if new_limit == old_limit:
+            return
+        self.queue.set_limit(new_limit)
+        self.counts[counter] += 1
+        self.history.append({'time': time(), 'limit': new_limit, 'reason': reason})
+        logging.info(f"[{self.queue.provider}] concurrency limit {old_limit} -> {new_limit} ({reason})")
+
+    def snapshot(self) -> Dict:
+        """Return the controller's state for run telemetry."""
+        with self._lock:
+            return {
+                **self.counts,
+                'p95_latency': percentile(self.latencies, 0.95),
+                'baseline_p95_latency': self.baseline_p95,
+                'limit_changes': list(self.history)
+            }
+
+class ProviderScheduler:
+    """Dispatches API calls through one queue and one concurrency limit per provider.
+
+    Claims run concurrently in worker threads and every agent call waits on its
+    own provider's queue, so a slow provider (e.g. a local SGLang server) only
+    holds back the calls that are actually waiting for it, while calls for other
+    providers keep using their free capacity.
+
+    With `adaptive` settings enabled, each provider's limit is driven by an
+    AIMDController instead of staying fixed.
+
+    Usage:
+        scheduler = ProviderScheduler({'openai': 16, 'sglang': 4})
+        with scheduler.slot('openai'):
+            response = client.chat.completions.create(...)
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, default_limit: int = DEFAULT_PROVIDER_LIMIT,
+                 adaptive: Optional[Dict] = None):
+        """Initialize the scheduler with per-provider limits."""
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self.adaptive = {**DEFAULT_ADAPTIVE_SETTINGS, **(adaptive or {})}
+        self._queues = {}
+        self._controllers = {}
+        self._lock = threading.Lock()
+
+    def queue(self, provider: str) -> ProviderQueue:
+        """Get (or lazily create) the queue for a provider."""
+        with self._lock:
+            if provider not in self._queues:
+                limit = self.limits.get(provider, self.default_limit)
+                self._queues[provider] = ProviderQueue(provider, limit)
+                if self.adaptive['enabled']:
+                    self._controllers[provider] = AIMDController(
+                        self._queues[provider],
+                        **{key: value for key, value in self.adaptive.items() if key != 'enabled'}
+                    )
+            return self._queues[provider]
+
+    @contextmanager
+    def slot(self, provider: str):
+        """Hold one of the provider's concurrency slots for the duration of the block."""
+        provider_queue = self.queue(provider)
+        controller = self._controllers.get(provider)
+        provider_queue.acquire()
+        start = monotonic()
+        error = None
+        try:
+            yield provider_queue
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            provider_queue.release()
+            if controller:
+                controller.record(monotonic() - start, error)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Return the state of every provider queue, including its current limit."""
+        with self._lock:
+            queues = dict(self._queues)
+            controllers = dict(self._controllers)
+        snapshot = {}
+        for provider, provider_queue in queues.items():
+            snapshot[provider] = provider_queue.snapshot()
+            if provider in controllers:
+                snapshot[provider]['adaptive'] = controllers[provider].snapshot()
+        return snapshot
+
+_scheduler = ProviderScheduler()
+
+def get_scheduler() -> ProviderScheduler:
+    """Get the process-wide scheduler used by all agents."""
+    return _scheduler
+
+def configure_scheduler(limits: Optional[Dict[str, int]] = None, default_limit: int = DEFAULT_PROVIDER_LIMIT,
+                        adaptive: Optional[Dict] = None) -> ProviderScheduler:
+    """Replace the process-wide scheduler. Call before any agent makes a request."""
+    global _scheduler
+    _scheduler = ProviderScheduler(limits, default_limit, adaptive)
+    return _scheduler
+
+def load_scheduler_settings(config_path: str) -> Dict:
+    """Load the `scheduler` section of the config file, filling in defaults."""
+    settings = load_run_config(config_path).get('scheduler') or {}
+    return {
+        'claim_workers': settings.get('claim_workers', DEFAULT_CLAIM_WORKERS),
+        'default_limit': settings.get('default_limit', DEFAULT_PROVIDER_LIMIT),
+        'provider_limits': dict(settings.get('provider_limits') or {}),
+        'adaptive': {**DEFAULT_ADAPTIVE_SETTINGS, **(settings.get('adaptive') or {})}
+    }
+
+def parse_provider_limits(values) -> Dict[str, int]:
+    """Parse repeated `provider=N` command-line values into a dict."""
+    limits = {}
+    for value in values or []:
+        provider, sep, limit = value.partition('=')
+        if not sep or not limit.isdigit():
+            raise ValueError(f"Invalid provider limit '{value}', expected provider=N")
+        limits[provider.strip()] = int(limit)
+    return limits
+
+def setup_scheduler(config_path: str, workers: Optional[int], provider_limit_args, adaptive: bool = False) -> int:
+    """Configure the process-wide scheduler from config and CLI overrides.
+
+    Returns the number of claims to run concurrently. In adaptive mode the
+    default leaves room for a provider to grow to its maximum limit.
+    """
+    settings = load_scheduler_settings(config_path)
+    limits = {**settings['provider_limits'], **parse_provider_limits(provider_limit_args)}
+    adaptive_settings = settings['adaptive']
+    if adaptive:
+        adaptive_settings = {**adaptive_settings, 'enabled': True}
+    configure_scheduler(limits, settings['default_limit'], adaptive_settings)
+    if workers:
+        return workers
+    if adaptive_settings['enabled']:
+        return max(settings['claim_workers'], adaptive_settings['max_limit'])
+    return settings['claim_workers']
+
+def submit_in_order(submit: Callable[[Any], Future], items: Iterable, window: Optional[int] = None) -> Iterator[Tuple[Any, Future]]:
+    """Submit every item and yield (item, future) in input order.
+
+    Without a window all items are submitted up front. With one, at most
+    `window` items are submitted but not yet collected, so finished results
+    are released as the caller consumes them instead of being held until
+    the last claim finishes.
+    """
+    pending = deque()
+    for item in items:
+        pending.append((item, submit(item)))
+        if window and len(pending) >= window:
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
@@ -14,6 +14,18 @@ CONSULTANT_MODELS=("gpt4o" "qwen")
 JUDGE_MODELS=("gpt4o" "qwen")
 POSITIONS=( "correct" "incorrect")
 
+# Forecast calls, tokens, cost and wall time without running anything:
+#   bash scripts/consultancy/run_browsing_setup_consultancy.sh --plan
+if [ "$1" == "--plan" ]; then
+    python planner.py consultancy --jobs 16 \
+        --set dataset "${DATASETS[@]}" \
+        --set argue-for "${POSITIONS[@]}" \
+        --set consultant-model "${CONSULTANT_MODELS[@]}" \
+        --set judge-model "${JUDGE_MODELS[@]}" \
+        --extra --consultant browsing --judge default
+    exit 0
+fi
+
 # Log start time
 echo "Starting parallel runs at $(date)" >> "$MAIN_LOG"
 
@@ -12,6 +12,21 @@ MAIN_LOG="$LOG_DIR/run_browsing_setup_with_without_personas.log"
 
 POSITIONS=("correct" "incorrect")
 
+# Forecast calls, tokens, cost and wall time without running anything:
+#   bash scripts/consultancy/run_browsing_setup_with_without_personas.sh --plan
+if [ "$1" == "--plan" ]; then
+    JUDGE_IDS=()
+    for file in ./consultancy-claim-assignment-by-participant/*.json; do
+        JUDGE_IDS+=("$(basename "$file" | cut -d '_' -f1)")
+    done
+    python planner.py consultancy --jobs 16 \
+        --set consultant browsing-personalized browsing \
+        --set argue-for "${POSITIONS[@]}" \
+        --set judge-prolific-id "${JUDGE_IDS[@]}" \
+        --extra --dataset covid --judge persona --consultant-model gpt4o --judge-model gpt4o
+    exit 0
+fi
+
 run_personalized() {
     filename=$1
     position=$2
@@ -17,6 +17,19 @@ DEBATER_B_MODELS=("gpt4o" "qwen")
 JUDGE_MODELS=("gpt4o" "qwen")
 POSITIONS=("correct" "incorrect")
 
+# Forecast calls, tokens, cost and wall time without running anything:
+#   bash scripts/debate/run_browsing_setup_debate.sh --plan
+if [ "$1" == "--plan" ]; then
+    python planner.py debate --jobs 16 \
+        --set dataset "${DATASETS[@]}" \
+        --set argue-for-debater-a "${POSITIONS[@]}" \
+        --set debater-a-model "${DEBATER_A_MODELS[@]}" \
+        --set debater-b-model "${DEBATER_B_MODELS[@]}" \
+        --set judge-model "${JUDGE_MODELS[@]}" \
+        --extra --debater browsing --judge default
+    exit 0
+fi
+
 # Log start time
 echo "Starting parallel runs at $(date)" >> "$MAIN_LOG"
 
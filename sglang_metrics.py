@@ -0,0 +1,79 @@
+import logging
+import re
+from typing import Dict, Iterable, Optional
+import requests
+
+# Prometheus series exposed by `sglang.launch_server --enable-metrics`
+CACHE_HIT_RATE_METRIC = 'sglang:cache_hit_rate'
+PROMPT_TOKENS_METRIC = 'sglang:prompt_tokens_total'
+CACHED_TOKENS_METRIC = 'sglang:cached_tokens_total'
+
+METRIC_LINE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})?\s+([-+0-9.eEinfNa]+)')
+
+def parse_prometheus_metrics(text: str) -> Dict[str, float]:
+    """Parse Prometheus text format, summing samples of the same metric across labels."""
+    metrics = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = METRIC_LINE.match(line)
+        if match:
+            name, value = match.group(1), float(match.group(3))
+            metrics[name] = metrics.get(name, 0.0) + value
+    return metrics
+
+def fetch_cache_metrics(port: int, host: str = 'localhost', timeout: float = 5) -> Optional[Dict[str, float]]:
+    """Fetch the prefix cache counters from an SGLang server, or None if unavailable."""
+    try:
+        response = requests.get(f"http://{host}:{port}/metrics", timeout=timeout)
+        response.raise_for_status()
+    except Exception as e:
+        logging.warning(f"Could not read SGLang metrics on port {port}: {e}")
+        return None
+
+    metrics = parse_prometheus_metrics(response.text)
+    return {
+        'cache_hit_rate': metrics.get(CACHE_HIT_RATE_METRIC),
+        'prompt_tokens': metrics.get(PROMPT_TOKENS_METRIC),
+        'cached_tokens': metrics.get(CACHED_TOKENS_METRIC)
+    }
+
+def sglang_ports(agent_configs: Iterable[Dict]) -> list:
+    """Get the distinct SGLang server ports used by a set of agent configs."""
+    return sorted({config.get('port', 30000) for config in agent_configs if config.get('provider') == 'sglang'})
+
+class PrefixCacheReport:
+    """Reports the SGLang prefix cache hit rate over the span of a run.
+
+    Usage:
+        report = PrefixCacheReport([30005])   # snapshot before the run
+        ...                                   # run claims
+        summary = report.finish()             # per-port hit rates for this run
+    """
+
+    def __init__(self, ports: Iterable[int]):
+        """Take the starting snapshot for each port."""
+        self.ports = list(ports)
+        self.start = {port: fetch_cache_metrics(port) for port in self.ports}
+
+    def finish(self) -> Dict[int, Optional[Dict]]:
+        """Take the ending snapshot and compute each port's hit rate during the run."""
+        summary = {}
+        for port in self.ports:
+            start, end = self.start.get(port), fetch_cache_metrics(port)
+            if start is None or end is None:
+                summary[port] = None
+                continue
+
+            report = {'server_cache_hit_rate': end['cache_hit_rate']}
+            if None not in (start['prompt_tokens'], end['prompt_tokens'], start['cached_tokens'], end['cached_tokens']):
+                prompt_tokens = end['prompt_tokens'] - start['prompt_tokens']
+                cached_tokens = end['cached_tokens'] - start['cached_tokens']
+                report.update({
+                    'prompt_tokens': prompt_tokens,
+                    'cached_tokens': cached_tokens,
+                    'run_cache_hit_rate': cached_tokens / prompt_tokens if prompt_tokens else None
+                })
+            summary[port] = report
+            logging.info(f"SGLang prefix cache on port {port}: {report}")
+        return summary
@@ -0,0 +1,204 @@
+import argparse
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Mapping, Sequence
+from claim_store import ClaimViews, DATASET_PATHS, claim_hash, load_claims
+from source_registry import source_id
+from source_retrieval import BM25Index, split_sentences, tokenize
+from utils import count_tokens, format_sources
+
+CACHE_PATH = Path('data/sources/compressed.jsonl')
+
+# Bump when the algorithm changes so stale cache entries are not reused
+COMPRESSION_VERSION = 1
+
+# TextRank damping factor and power-iteration limits
+DAMPING = 0.85
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+
+# Longer sources are first narrowed to the sentences most relevant to the claim (BM25),
+# keeping the quadratic sentence graph small for full article dumps
+MAX_SENTENCES = 400
+
+def sentence_similarity(first: frozenset, second: frozenset) -> float:
+    """TextRank similarity: shared terms normalized by the log sentence lengths."""
+    shared = len(first & second)
+    if not shared:
+        return 0.0
+    return shared / (math.log(len(first) + 1) + math.log(len(second) + 1))
+
+def textrank(sentences: Sequence[frozenset], bias: Sequence[float]) -> List[float]:
+    """Biased TextRank scores of sentences, each given as its set of terms.
+
+    Random jumps land on sentences in proportion to `bias` (their relevance
+    to the claim) instead of uniformly, so central sentences about the claim
+    rank highest.
+    """
+    n = len(sentences)
+    total_bias = sum(bias)
+    jump = [b / total_bias for b in bias] if total_bias else [1 / n] * n
+    # Only sentences sharing a term can be linked, so build the edges from term postings
+    postings = {}
+    for i, terms in enumerate(sentences):
+        for term in terms:
+            postings.setdefault(term, []).append(i)
+    edges = [dict() for _ in range(n)]
+    for i, terms in enumerate(sentences):
+        neighbours = {j for term in terms for j in postings[term] if j != i}
+        for j in neighbours:
+            edges[i][j] = sentence_similarity(terms, sentences[j])
+    out_weight = [sum(weights.values()) for weights in edges]
+
+    scores = list(jump)
+    for _ in range(MAX_ITERATIONS):
+        # Sentences with no links pass their score on by the jump distribution
+        dangling = sum(scores[i] for i in range(n) if not out_weight[i])
+        updated = [(1 - DAMPING + DAMPING * dangling) * jump[i] for i in range(n)]
+        for i, weights in enumerate(edges):
+            if not out_weight[i]:
+                continue
+            share = DAMPING * scores[i] / out_weight[i]
+            for j, weight in weights.items():
+                updated[j] += share * weight
+        converged = sum(abs(a - b) for a, b in zip(updated, scores)) < TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return scores
+
+def compress_text(text: str, claim: str, budget: int) -> str:
+    """Keep the highest-ranked sentences of a text that fit in `budget` tokens, in their original order."""
+    if count_tokens(text) <= budget:
+        return text
+    sentences = split_sentences(text)
+    terms = [tokenize(sentence) for sentence in sentences]
+    relevance = BM25Index(terms).scores(tokenize(claim))
+
+    candidates = list(range(len(sentences)))
+    if len(candidates) > MAX_SENTENCES:
+        candidates = sorted(candidates, key=lambda i: (-relevance[i], i))[:MAX_SENTENCES]
+        candidates.sort()
+    # A small floor keeps sentences that share no terms with the claim reachable
+    scores = textrank([frozenset(terms[i]) for i in candidates], [relevance[i] + 0.1 for i in candidates])
+
+    kept, used = [], 0
+    for rank in sorted(range(len(candidates)), key=lambda r: (-scores[r], r)):
+        cost = count_tokens(sentences[candidates[rank]]) + 1
+        if used + cost > budget:
+            continue
+        kept.append(candidates[rank])
+        used += cost
+    return ' '.join(sentences[i] for i in sorted(kept))
+
+def cache_key(source: Mapping, claim: str, budget: int) -> str:
+    """Cache key of a compressed source: version, source hash, claim hash and budget."""
+    return f"v{COMPRESSION_VERSION}:{source_id(source)}:{claim_hash(claim)[:32]}:{budget}"
+
+class CompressionCache:
+    """Append-only cache of compressed source text, shared by all runs.
+
+    Entries are `<key>\\t<json>` lines written with single O_APPEND writes,
+    like the source registry, so parallel runs can share the file. Each
+    (source, claim, budget) is compressed once; later runs read the result.
+
+    Usage:
+        cache = get_compression_cache()
+        content = cache.compress(source, claim, budget=300)
+    """
+
+    def __init__(self, path: Path = CACHE_PATH):
+        """Initialize the cache without reading the file yet."""
+        self.path = Path(path)
+        self._entries = {}
+        self._scanned = 0
+        self._fd = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _scan(self) -> None:
+        """Load entries appended to the file since the last scan."""
+        if not self.path.exists():
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._scanned)
+            data = f.read()
+        # Ignore a trailing partial line from a concurrent writer
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            key, _, value = line.partition(b'\t')
+            self._entries.setdefault(key.decode('ascii'), json.loads(value)['content'])
+        self._scanned += end
+
+    def _lookup(self, key: str):
+        """Get a cached entry, rescanning the file on a miss."""
+        with self._lock:
+            if key not in self._entries:
+                self._scan()
+            return self._entries.get(key)
+
+    def _store(self, key: str, content: str) -> None:
+        """Append an entry to the file."""
+        line = f"{key}\t{json.dumps({'content': content}, ensure_ascii=False)}\n".encode('utf-8')
+        with self._lock:
+            if key in self._entries:
+                return
+            if self._fd is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, line)
+            self._entries[key] = content
+
+    def compress(self, source: Mapping, claim: str, budget: int) -> str:
+        """Get a source's content compressed for a claim, computing and caching it on first use."""
+        key = cache_key(source, claim, budget)
+        content = self._lookup(key)
+        if content is not None:
+            self.hits += 1
+            return content
+        self.misses += 1
+        content = compress_text(source['content'], claim, budget)
+        self._store(key, content)
+        return content
+
+_cache = CompressionCache()
+
+def get_compression_cache() -> CompressionCache:
+    """Get the process-wide compression cache."""
+    return _cache
+
+def compress_sources(sources: Sequence[Mapping], claim: str, budget: int) -> List[Dict]:
+    """Compress each source's content to at most `budget` tokens, keeping the sentences most relevant to the claim."""
+    cache = get_compression_cache()
+    return [
+        {'title': source['title'], 'url': source['url'], 'content': cache.compress(source, claim, budget)}
+        for source in sources
+    ]
+
+def main():
+    """Fill the compression cache for a dataset and report the source tokens saved."""
+    parser = argparse.ArgumentParser(description='Precompute compressed sources for a dataset')
+    parser.add_argument('--dataset', default='covid', help='Dataset name or claims file')
+    parser.add_argument('--budget', type=int, default=300, help='Token budget per source')
+    parser.add_argument('--limit', type=int, help='Only use the first N claims')
+    args = parser.parse_args()
+
+    views = ClaimViews(load_claims(DATASET_PATHS.get(args.dataset, args.dataset)))
+    count = min(len(views), args.limit or len(views))
+    full_tokens = compressed_tokens = 0
+    for i in range(count):
+        view = views[i]
+        if not view.sources:
+            continue
+        full_tokens += count_tokens(format_sources(view.sources, 0))
+        compressed_tokens += count_tokens(format_sources(compress_sources(view.sources, view.claim, args.budget), 0))
+    cache = get_compression_cache()
+    print(f"{count} claims: sources {full_tokens / max(count, 1):,.0f} -> {compressed_tokens / max(count, 1):,.0f} "
+          f"tokens/claim at {args.budget} tokens/source ({cache.misses} compressed, {cache.hits} from {cache.path})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import argparse
+import hashlib
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from claim_store import ClaimView, ClaimViews, DATASET_PATHS, SOURCES_PER_SIDE, load_claims
+from source_registry import get_source_registry
+from utils import count_tokens, format_sources
+
+# Sources are compared as sets of overlapping word n-grams
+SHINGLE_WORDS = 5
+
+# MinHash signature length, split into LSH bands of NUM_PERMUTATIONS // LSH_BANDS rows.
+# 16 bands of 4 rows make sources with Jaccard similarity above ~0.5 likely candidates.
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+
+# Estimated Jaccard similarity at which two candidates count as copies of the same story
+DUPLICATE_THRESHOLD = 0.8
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 64) - 1
+
+def _permutations() -> List[Tuple[int, int]]:
+    """Fixed (a, b) coefficients of the hash permutations, identical in every process."""
+    coefficients = []
+    for i in range(NUM_PERMUTATIONS):
+        digest = hashlib.sha256(f"minhash:{i}".encode('ascii')).digest()
+        coefficients.append((int.from_bytes(digest[:8], 'little') % (_PRIME - 1) + 1,
+                             int.from_bytes(digest[8:16], 'little') % _PRIME))
+    return coefficients
+
+PERMUTATIONS = _permutations()
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> Set[str]:
+    """Overlapping word n-grams of a text, ignoring case and punctuation."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash_signature(text: str) -> Tuple[int, ...]:
+    """MinHash signature of a text's shingles."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        for shingle in shingles(text)
+    ]
+    if not hashes:
+        return (_MASK,) * NUM_PERMUTATIONS
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in PERMUTATIONS)
+
+@lru_cache(maxsize=8192)
+def source_signature(sid: str) -> Tuple[int, ...]:
+    """MinHash signature of a registered source's content (cached per source)."""
+    return minhash_signature(get_source_registry().get(sid)['content'])
+
+def estimate_similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+class MinHashLSH:
+    """Locality-sensitive hash buckets over MinHash signatures.
+
+    Two signatures share a bucket when all rows of any band match, so only
+    likely near-duplicates are compared instead of every pair.
+
+    Usage:
+        lsh = MinHashLSH()
+        for sid in source_ids:
+            matches = lsh.query(source_signature(sid))
+            lsh.add(sid, source_signature(sid))
+    """
+
+    def __init__(self, bands: int = LSH_BANDS):
+        """Initialize empty buckets."""
+        self.bands = bands
+        self.rows = NUM_PERMUTATIONS // bands
+        self.buckets: Dict[Tuple, List[str]] = {}
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> Iterable[Tuple]:
+        """Bucket key of each band of a signature."""
+        for band in range(self.bands):
+            yield (band, signature[band * self.rows:(band + 1) * self.rows])
+
+    def add(self, key: str, signature: Tuple[int, ...]) -> None:
+        """Add a signature under a key."""
+        for band_key in self._band_keys(signature):
+            self.buckets.setdefault(band_key, []).append(key)
+
+    def query(self, signature: Tuple[int, ...]) -> List[str]:
+        """Keys sharing at least one band with a signature, in insertion order."""
+        return list(dict.fromkeys(key for band_key in self._band_keys(signature) for key in self.buckets.get(band_key, ())))
+
+def find_duplicates(source_ids: Iterable[str], threshold: float = DUPLICATE_THRESHOLD) -> Dict[str, List[str]]:
+    """Group near-duplicate sources. Returns {representative ID: [duplicate IDs]}.
+
+    The first occurrence of a story is its representative; later copies
+    are matched against the representatives only.
+    """
+    lsh = MinHashLSH()
+    groups: Dict[str, List[str]] = {}
+    for sid in dict.fromkeys(source_ids):
+        signature = source_signature(sid)
+        match = next((rep for rep in lsh.query(signature)
+                      if estimate_similarity(signature, source_signature(rep)) >= threshold), None)
+        if match is None:
+            lsh.add(sid, signature)
+            groups[sid] = []
+        else:
+            groups[match].append(sid)
+    return {rep: duplicates for rep, duplicates in groups.items() if duplicates}
+
+def merge_urls(sources: Iterable[Dict]) -> str:
+    """The representative's URL, followed by the URLs of its copies."""
+    urls = list(dict.fromkeys(source['url'] for source in sources))
+    return urls[0] if len(urls) == 1 else f"{urls[0]} (also published at: {', '.join(urls[1:])})"
+
+class DedupedClaim(NamedTuple):
+    """A claim view without near-duplicate sources, and what was collapsed."""
+    view: ClaimView
+    duplicates: Dict[str, List[str]]
+    tokens_saved: int
+
+def dedupe_claim(view: ClaimView, threshold: float = DUPLICATE_THRESHOLD, top_k: Optional[int] = None) -> DedupedClaim:
+    """Collapse near-duplicate sources of a claim into one representative with merged URLs.
+
+    Duplicates are found across both sides; a copy is dropped from whichever
+    side it appears on and its URL is listed on the representative. The view
+    should hold every source: only then are the first `top_k` distinct
+    sources per side kept, so collapsed copies are replaced by the next
+    distinct sources. `tokens_saved` counts the copies that would otherwise
+    have been among them.
+    """
+    ids = [*view.supporting_source_ids, *view.opposing_source_ids]
+    duplicates = find_duplicates(ids, threshold)
+    if not duplicates:
+        return DedupedClaim(view.top_sources(top_k), {}, 0)
+
+    registry = get_source_registry()
+    dropped = {sid for copies in duplicates.values() for sid in copies}
+
+    def collapse(source_ids: Tuple[str, ...], sources: Tuple[Dict, ...]) -> Tuple[Tuple[str, ...], Tuple[Dict, ...]]:
+        kept = [(sid, source) for sid, source in zip(source_ids, sources) if sid not in dropped]
+        merged = tuple(
+            {**source, 'url': merge_urls([source, *(registry.get(copy) for copy in duplicates[sid])])}
+            if sid in duplicates else source
+            for sid, source in kept
+        )
+        return tuple(sid for sid, _ in kept), merged
+
+    supporting_ids, supporting = collapse(view.supporting_source_ids, view.supporting_sources)
+    opposing_ids, opposing = collapse(view.opposing_source_ids, view.opposing_sources)
+    deduped = view._replace(
+        supporting_source_ids=supporting_ids, supporting_sources=supporting,
+        opposing_source_ids=opposing_ids, opposing_sources=opposing
+    ).top_sources(top_k)
+    original = view.top_sources(top_k)
+    tokens_saved = sum(
+        count_tokens(format_sources([source], 0))
+        for sid, source in zip([*original.supporting_source_ids, *original.opposing_source_ids], original.sources)
+        if sid in dropped
+    )
+    return DedupedClaim(deduped, duplicates, tokens_saved)
+
+def main():
+    """Report near-duplicate sources and the tokens collapsing them saves for a dataset."""
+    parser = argparse.ArgumentParser(description='Find near-duplicate sources in a dataset with MinHash/LSH')
+    parser.add_argument('--dataset', default='covid', help='Dataset name or claims file')
+    parser.add_argument('--threshold', type=float, default=DUPLICATE_THRESHOLD, help='Estimated Jaccard similarity of duplicates')
+    parser.add_argument('--limit', type=int, help='Only use the first N claims')
+    parser.add_argument('--verbose', action='store_true', help='Print every claim with duplicates')
+    args = parser.parse_args()
+
+    # Every source is a candidate, as in the runners with --dedupe-sources
+    views = ClaimViews(load_claims(DATASET_PATHS.get(args.dataset, args.dataset)), None)
+    count = min(len(views), args.limit or len(views))
+    claims_with_duplicates = dropped = tokens_saved = 0
+    for i in range(count):
+        view = views[i]
+        if not view.sources:
+            continue
+        result = dedupe_claim(view, args.threshold, SOURCES_PER_SIDE)
+        if result.duplicates:
+            claims_with_duplicates += 1
+            dropped += sum(len(copies) for copies in result.duplicates.values())
+            tokens_saved += result.tokens_saved
+            if args.verbose:
+                print(f"{view.claim[:70]}: {sum(map(len, result.duplicates.values()))} of {len(view.sources)} sources collapsed, "
+                      f"{result.tokens_saved:,} tokens saved")
+    print(f"{count} claims: {claims_with_duplicates} with near-duplicate sources, {dropped} copies collapsed, "
+          f"{tokens_saved / max(count, 1):,.0f} tokens saved per claim")
+
+if __name__ == "__main__":
+    main()
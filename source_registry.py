@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping
+
+REGISTRY_PATH = Path('data/sources/sources.jsonl')
+
+# Fields that identify a source document; anything else is per-claim metadata
+SOURCE_FIELDS = ('title', 'url', 'content')
+
+# Key of a reference to a registered source inside a claim record
+SOURCE_REF = '$source'
+
+# Sources kept decoded in memory; older ones are read from the file again when next needed
+MAX_CACHED_SOURCES = 256
+
+def source_id(source: Mapping) -> str:
+    """Content hash of a source's title, url and content."""
+    key = json.dumps([source.get(field, '') for field in SOURCE_FIELDS], ensure_ascii=False)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+class SourceRegistry:
+    """Content-addressed store of source documents shared by all claims, participants and runs.
+
+    Each distinct (title, url, content) is written once to an append-only file
+    of `<id>\\t<json>` lines, however many claims cite it. Only the file
+    offsets and the most recently used sources are held in memory. Appends
+    are single O_APPEND writes, so parallel runs can share the file.
+
+    Usage:
+        registry = get_source_registry()
+        sid = registry.intern(source)       # store if new, return its ID
+        same = registry.get(sid)            # its {'title', 'url', 'content'} dict
+    """
+
+    def __init__(self, path: Path = REGISTRY_PATH):
+        """Initialize the registry without reading the file yet."""
+        self.path = Path(path)
+        self._offsets = {}
+        self._scanned = 0
+        self._sources: 'OrderedDict[str, Dict]' = OrderedDict()
+        # Sources interned with save=False, held until saved
+        self._unsaved: Dict[str, Dict] = {}
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def _scan(self) -> None:
+        """Index lines appended to the file since the last scan."""
+        if not self.path.exists():
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._scanned)
+            data = f.read()
+        # Ignore a trailing partial line from a concurrent writer
+        end = data.rfind(b'\n') + 1
+        offset = self._scanned
+        for line in data[:end].splitlines(keepends=True):
+            sid, _, _ = line.partition(b'\t')
+            self._offsets.setdefault(sid.decode('ascii'), (offset, len(line)))
+            offset += len(line)
+        self._scanned += end
+
+    def _read(self, sid: str) -> Dict:
+        """Read a source from the file."""
+        offset, length = self._offsets[sid]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            line = f.read(length)
+        return json.loads(line.partition(b'\t')[2])
+
+    def _cache(self, sid: str, source: Dict) -> Dict:
+        """Keep a source as the most recently used, evicting the oldest past the limit."""
+        self._sources[sid] = source
+        self._sources.move_to_end(sid)
+        while len(self._sources) > MAX_CACHED_SOURCES:
+            self._sources.popitem(last=False)
+        return source
+
+    def _write(self, sid: str, record: Dict) -> None:
+        """Append a source to the file."""
+        line = f"{sid}\t{json.dumps(record, ensure_ascii=False)}\n".encode('utf-8')
+        if self._fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.write(self._fd, line)
+
+    def _is_saved(self, sid: str) -> bool:
+        """Whether a source is in the file, rescanning it for lines appended by other processes."""
+        if sid not in self._offsets:
+            self._scan()
+        return sid in self._offsets
+
+    def __contains__(self, sid: str) -> bool:
+        """Whether a source ID is registered."""
+        with self._lock:
+            return sid in self._sources or sid in self._unsaved or self._is_saved(sid)
+
+    def intern(self, source: Mapping, save: bool = True) -> str:
+        """Register a source (if new) and return its ID.
+
+        With `save=False` a new source is only held in memory until `save`
+        is called with its ID, so merely loading claims never writes the file.
+        """
+        sid = source_id(source)
+        with self._lock:
+            if sid in self._sources or sid in self._unsaved or self._is_saved(sid):
+                return sid
+            record = {field: source.get(field, '') for field in SOURCE_FIELDS}
+            if save:
+                self._write(sid, record)
+                self._cache(sid, record)
+            else:
+                self._unsaved[sid] = record
+        return sid
+
+    def save(self, sids: Iterable[str]) -> None:
+        """Write any of the given sources that were interned with save=False."""
+        with self._lock:
+            for sid in sids:
+                record = self._unsaved.pop(sid, None)
+                if record is not None and not self._is_saved(sid):
+                    self._write(sid, record)
+                    self._cache(sid, record)
+
+    def get(self, sid: str) -> Dict:
+        """Get the {'title', 'url', 'content'} dict of a source. Do not modify it."""
+        with self._lock:
+            if sid in self._sources:
+                self._sources.move_to_end(sid)
+                return self._sources[sid]
+            if sid in self._unsaved:
+                return self._unsaved[sid]
+            if not self._is_saved(sid):
+                raise KeyError(f"Unknown source {sid} in {self.path}")
+            return self._cache(sid, self._read(sid))
+
+    def size(self) -> int:
+        """Size of the registry file in bytes (0 if it does not exist yet); it only ever grows."""
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    def ref(self, source: Mapping) -> Dict:
+        """Intern a source and return a reference to it, keeping any per-claim fields."""
+        extras = {key: value for key, value in source.items() if key not in SOURCE_FIELDS}
+        return {SOURCE_REF: self.intern(source), **extras}
+
+    def resolve(self, value: Any) -> Any:
+        """Expand a source reference (from `ref`) back into the full source."""
+        if isinstance(value, dict) and SOURCE_REF in value:
+            extras = {key: item for key, item in value.items() if key != SOURCE_REF}
+            return {**self.get(value[SOURCE_REF]), **extras}
+        return value
+
+    def resolve_ids(self, sids: List[str]) -> List[Dict]:
+        """Get the sources for a list of IDs, e.g. from saved results."""
+        return [self.get(sid) for sid in sids]
+
+_registry = SourceRegistry()
+
+def get_source_registry() -> SourceRegistry:
+    """Get the process-wide source registry."""
+    return _registry
@@ -0,0 +1,212 @@
+import argparse
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from claim_store import ClaimView, ClaimViews, DATASET_PATHS, SOURCES_PER_SIDE, load_claims
+from source_registry import get_source_registry
+from utils import count_tokens, format_sources
+
+# Passages are runs of whole sentences up to this many words
+PASSAGE_WORDS = 120
+
+# Standard BM25 parameters: term-frequency saturation and length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = frozenset(
+    "a an and are as at be been but by can could did do does for from had has have how if in into is it its "
+    "may might more most no not of on or over so such than that the their them then there these they this "
+    "those to too was were what when where which while who will with would you your".split()
+)
+
+SIDES = ('supporting_sources', 'opposing_sources')
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word terms of a text, without stopwords."""
+    return [term for term in re.findall(r"[a-z0-9]+", text.lower()) if term not in STOPWORDS]
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences at '.', '!' or '?' followed by whitespace."""
+    return [sentence for sentence in re.split(r"(?<=[.!?])\s+", text.strip()) if sentence]
+
+def split_passages(text: str, max_words: int = PASSAGE_WORDS) -> List[str]:
+    """Split a source's content into passages of whole sentences, each at most `max_words` words."""
+    passages, current, length = [], [], 0
+    for sentence in split_sentences(text):
+        words = sentence.split()
+        # A sentence longer than a passage is cut at word boundaries
+        while len(words) > max_words:
+            if current:
+                passages.append(' '.join(current))
+                current, length = [], 0
+            passages.append(' '.join(words[:max_words]))
+            words = words[max_words:]
+        if current and length + len(words) > max_words:
+            passages.append(' '.join(current))
+            current, length = [], 0
+        if words:
+            current.extend(words)
+            length += len(words)
+    if current:
+        passages.append(' '.join(current))
+    return passages
+
+class BM25Index:
+    """Inverted index over a small set of documents, ranked with Okapi BM25.
+
+    Usage:
+        index = BM25Index([tokenize(text) for text in passages])
+        ranking = index.rank(tokenize(claim))   # [(document, score), ...] best first
+    """
+
+    def __init__(self, documents: Sequence[Sequence[str]], k1: float = BM25_K1, b: float = BM25_B):
+        """Build the postings (term -> [(document, term frequency)]) for the tokenized documents."""
+        self.k1 = k1
+        self.b = b
+        self.lengths = [len(terms) for terms in documents]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        for document, terms in enumerate(documents):
+            for term, frequency in Counter(terms).items():
+                self.postings.setdefault(term, []).append((document, frequency))
+
+    def idf(self, term: str) -> float:
+        """Inverse document frequency of a term (never negative)."""
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.lengths) - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: Sequence[str]) -> List[float]:
+        """BM25 score of every document for a tokenized query."""
+        scores = [0.0] * len(self.lengths)
+        for term in set(query):
+            idf = self.idf(term)
+            for document, frequency in self.postings.get(term, ()):
+                norm = 1 - self.b + self.b * self.lengths[document] / (self.avg_length or 1)
+                scores[document] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * norm)
+        return scores
+
+    def rank(self, query: Sequence[str]) -> List[Tuple[int, float]]:
+        """Documents ordered by score, best first; ties keep document order."""
+        return sorted(enumerate(self.scores(query)), key=lambda item: (-item[1], item[0]))
+
+class Passage(NamedTuple):
+    """A passage of a registered source, with its tokenized text for indexing."""
+    source_id: str
+    position: int
+    text: str
+    terms: Tuple[str, ...]
+    tokens: int
+
+@lru_cache(maxsize=4096)
+def source_passages(sid: str, max_words: int = PASSAGE_WORDS) -> Tuple[Passage, ...]:
+    """Split a registered source into passages (cached per source, shared by every claim citing it)."""
+    source = get_source_registry().get(sid)
+    title_terms = tuple(tokenize(source['title']))
+    return tuple(
+        Passage(sid, position, text, title_terms + tuple(tokenize(text)), count_tokens(text))
+        for position, text in enumerate(split_passages(source['content'], max_words))
+    )
+
+def source_header_tokens(sid: str) -> int:
+    """Tokens format_sources spends on a source besides its content."""
+    source = get_source_registry().get(sid)
+    return count_tokens(f"Title: {source['title']}\nURL: {source['url']}\nContent: \n\n")
+
+class RetrievedSources(NamedTuple):
+    """Sources cut down to the selected passages, and a record of which passages were used."""
+    sources: List[Dict]
+    passages: List[Dict]
+
+def select_passages(claim: str, source_ids: Sequence[str], budget: int, top_k: Optional[int] = None) -> List[Tuple[Passage, float]]:
+    """Pick the passages most relevant to the claim until the token budget or `top_k` is reached.
+
+    Passages that do not fit the remaining budget are skipped in favour of
+    shorter, lower-ranked ones. Passages sharing no terms with the claim are
+    only used when nothing else was selected.
+    """
+    passages = [passage for sid in dict.fromkeys(source_ids) for passage in source_passages(sid)]
+    index = BM25Index([passage.terms for passage in passages])
+    selected, used, headers = [], 0, set()
+    for document, score in index.rank(tokenize(claim)):
+        if top_k is not None and len(selected) >= top_k:
+            break
+        if score <= 0 and selected:
+            break
+        passage = passages[document]
+        cost = passage.tokens + (0 if passage.source_id in headers else source_header_tokens(passage.source_id))
+        if used + cost > budget:
+            continue
+        selected.append((passage, score))
+        headers.add(passage.source_id)
+        used += cost
+    return selected
+
+def retrieve_sources(claim: ClaimView, budget: int, top_k: Optional[int] = None) -> RetrievedSources:
+    """Select each side's most relevant passages for a claim within a token budget.
+
+    The budget (and `top_k`) is split evenly between the supporting and the
+    opposing side so neither side of the argument is crowded out. Each
+    selected source is returned as a {'title', 'url', 'content'} dict whose
+    content is its selected passages in their original order, ready for
+    utils.format_sources. Titles and URLs come from the view, so merged
+    URLs of collapsed duplicates are kept.
+    """
+    sides = [
+        (side, ids, side_sources) for side, ids, side_sources in zip(
+            SIDES,
+            (claim.supporting_source_ids, claim.opposing_source_ids),
+            (claim.supporting_sources, claim.opposing_sources)
+        ) if ids
+    ]
+    sources, passages = [], []
+    for side, ids, side_sources in sides:
+        side_k = None if top_k is None else max(1, top_k // len(sides))
+        selected = select_passages(claim.claim, ids, budget // len(sides), side_k)
+        by_source = {}
+        for passage, score in selected:
+            by_source.setdefault(passage.source_id, []).append(passage)
+            passages.append({
+                'side': side,
+                'source_id': passage.source_id,
+                'passage': passage.position,
+                'score': round(score, 4),
+                'tokens': passage.tokens
+            })
+        for sid, source in zip(ids, side_sources):
+            if sid in by_source:
+                chosen = sorted(by_source.pop(sid), key=lambda passage: passage.position)
+                sources.append({
+                    'title': source['title'],
+                    'url': source['url'],
+                    'content': ' ... '.join(passage.text for passage in chosen)
+                })
+    return RetrievedSources(sources, passages)
+
+def main():
+    """Report how much of the source text a retrieval budget keeps for a dataset."""
+    parser = argparse.ArgumentParser(description='Compare full and retrieved source prompt sizes for a dataset')
+    parser.add_argument('--dataset', default='covid', help='Dataset name or claims file')
+    parser.add_argument('--budget', type=int, default=2000, help='Source token budget per claim')
+    parser.add_argument('--top-k', type=int, help='Maximum passages per claim')
+    parser.add_argument('--limit', type=int, help='Only use the first N claims')
+    args = parser.parse_args()
+
+    claims = load_claims(DATASET_PATHS.get(args.dataset, args.dataset))
+    full_views = ClaimViews(claims, SOURCES_PER_SIDE)
+    all_views = ClaimViews(claims, None)
+    count = min(len(claims), args.limit or len(claims))
+    full_tokens = retrieved_tokens = passages = 0
+    for i in range(count):
+        full_sources = full_views[i].sources
+        full_tokens += count_tokens(format_sources(full_sources, 0)) if full_sources else 0
+        retrieval = retrieve_sources(all_views[i], args.budget, args.top_k)
+        retrieved_tokens += count_tokens(format_sources(retrieval.sources, 0)) if retrieval.sources else 0
+        passages += len(retrieval.passages)
+    print(f"{count} claims: first {SOURCES_PER_SIDE} sources per side {full_tokens / max(count, 1):,.0f} tokens/claim, "
+          f"retrieved {retrieved_tokens / max(count, 1):,.0f} tokens/claim "
+          f"({passages / max(count, 1):.1f} passages, budget {args.budget:,})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from time import monotonic, sleep, time
+from typing import Dict, Optional
+from ledger import get_ledger
+from scheduler import get_scheduler, percentile
+
+STATUS_DIR = Path('saved-data/status')
+DEFAULT_STATUS_INTERVAL = 30
+LATENCY_WINDOW = 200
+
+class RunMonitor:
+    """Tracks a run's progress and periodically reports it.
+
+    Every `interval` seconds it prints one status line and rewrites a JSON
+    status file, so several shards can be watched with `python telemetry.py`.
+    Call latencies and tokens come from the call ledger, concurrency limits
+    from the provider scheduler.
+
+    Usage:
+        monitor = start_monitor('debate_covid_correct', total_claims=120)
+        ...                                   # run claims
+        summary = monitor.stop()
+    """
+
+    def __init__(self, run_name: str, total_claims: int, status_path: Optional[Path] = None,
+                 interval: float = DEFAULT_STATUS_INTERVAL):
+        """Initialize the monitor for a run."""
+        self.run_name = run_name
+        self.total_claims = total_claims
+        self.status_path = Path(status_path) if status_path else STATUS_DIR / f"{run_name}.json"
+        self.interval = interval
+        self.started = time()
+        self._start = monotonic()
+        self.counts = {'done': 0, 'failed': 0, 'in_flight': 0, 'rounds': 0,
+                       'prompt_tokens': 0, 'completion_tokens': 0}
+        self.providers = {}
+        self.state = 'running'
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> 'RunMonitor':
+        """Start listening for calls and reporting in the background."""
+        get_ledger().add_listener(self.record_call)
+        self._thread = threading.Thread(target=self._report_loop, name='run-monitor', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Dict:
+        """Stop reporting, write the final status and return it."""
+        self._stopped.set()
+        get_ledger().remove_listener(self.record_call)
+        with self._lock:
+            self.state = 'finished'
+        return self.report()
+
+    def claim_started(self) -> None:
+        """Mark a claim as in flight."""
+        with self._lock:
+            self.counts['in_flight'] += 1
+
+    def claim_finished(self, success: bool) -> None:
+        """Mark an in-flight claim as done or failed."""
+        with self._lock:
+            self.counts['in_flight'] -= 1
+            self.counts['done' if success else 'failed'] += 1
+
+    def round_finished(self) -> None:
+        """Count one completed round."""
+        with self._lock:
+            self.counts['rounds'] += 1
+
+    def record_call(self, entry: Dict) -> None:
+        """Ledger listener: accumulate tokens and latency per provider."""
+        with self._lock:
+            provider = self.providers.setdefault(entry['provider'], {
+                'calls': 0, 'errors': 0, 'latencies': deque(maxlen=LATENCY_WINDOW)
+            })
+            provider['calls'] += 1
+            if entry.get('error'):
+                provider['errors'] += 1
+                return
+            provider['latencies'].append(entry['latency'])
+            self.counts['prompt_tokens'] += entry['prompt_tokens']
+            self.counts['completion_tokens'] += entry['completion_tokens']
+
+    def status(self) -> Dict:
+        """Return the current status as a JSON-serializable dict."""
+        elapsed = monotonic() - self._start
+        scheduler = get_scheduler().snapshot()
+        with self._lock:
+            counts = dict(self.counts)
+            providers = {}
+            for name, provider in self.providers.items():
+                queue = scheduler.get(name, {})
+                providers[name] = {
+                    'calls': provider['calls'],
+                    'errors': provider['errors'],
+                    'p50_latency': percentile(provider['latencies'], 0.5),
+                    'p95_latency': percentile(provider['latencies'], 0.95),
+                    'limit': queue.get('limit'),
+                    'in_flight': queue.get('in_flight'),
+                    'queued': queue.get('queued')
+                }
+            state = self.state
+
+        finished = counts['done'] + counts['failed']
+        remaining = self.total_claims - finished
+        tokens = counts['prompt_tokens'] + counts['completion_tokens']
+        return {
+            'run': self.run_name,
+            'pid': os.getpid(),
+            'state': state,
+            'started': datetime.fromtimestamp(self.started).isoformat(),
+            'updated': time(),
+            'elapsed_seconds': round(elapsed, 1),
+            'claims': {'total': self.total_claims, 'done': counts['done'], 'failed': counts['failed'],
+                       'in_flight': counts['in_flight']},
+            'rounds': counts['rounds'],
+            'rounds_per_second': counts['rounds'] / elapsed if elapsed else 0.0,
+            'prompt_tokens': counts['prompt_tokens'],
+            'completion_tokens': counts['completion_tokens'],
+            'tokens_per_second': tokens / elapsed if elapsed else 0.0,
+            'eta_seconds': elapsed / finished * remaining if finished and state == 'running' else None,
+            'providers': providers
+        }
+
+    def report(self) -> Dict:
+        """Print the status line and write the status file."""
+        status = self.status()
+        print(format_status(status), flush=True)
+        write_status(self.status_path, status)
+        return status
+
+    def _report_loop(self) -> None:
+        """Report every `interval` seconds until stopped."""
+        while not self._stopped.wait(self.interval):
+            self.report()
+
+class _IdleMonitor(RunMonitor):
+    """Monitor used when no run is being tracked (e.g. --plan); ignores all events."""
+
+    def __init__(self):
+        """Initialize without a status file."""
+        super().__init__('idle', 0)
+
+    def claim_started(self) -> None:
+        pass
+
+    def claim_finished(self, success: bool) -> None:
+        pass
+
+    def round_finished(self) -> None:
+        pass
+
+_monitor = _IdleMonitor()
+
+def get_monitor() -> RunMonitor:
+    """Get the process-wide run monitor."""
+    return _monitor
+
+def start_monitor(run_name: str, total_claims: int, interval: float = DEFAULT_STATUS_INTERVAL,
+                  status_path: Optional[Path] = None) -> RunMonitor:
+    """Create, start and install the process-wide run monitor."""
+    global _monitor
+    _monitor = RunMonitor(run_name, total_claims, status_path, interval).start()
+    return _monitor
+
+def write_status(path: Path, status: Dict) -> None:
+    """Atomically replace the status file so readers never see a partial write."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(status, f, indent=2)
+    os.replace(tmp_path, path)
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Format seconds as h:mm:ss, or '-' when unknown."""
+    if seconds is None:
+        return '-'
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def format_latency(seconds: Optional[float]) -> str:
+    """Format a latency in seconds, or '-' when unknown."""
+    return '-' if seconds is None else f"{seconds:.1f}s"
+
+def format_status(status: Dict) -> str:
+    """Format a status as one compact line."""
+    claims = status['claims']
+    providers = ' '.join(
+        f"{name}[lim {provider['limit']} p50 {format_latency(provider['p50_latency'])} "
+        f"p95 {format_latency(provider['p95_latency'])}]"
+        for name, provider in sorted(status['providers'].items())
+    )
+    return (
+        f"[{status['run']}] {claims['done']}/{claims['total']} done, {claims['failed']} failed, "
+        f"{claims['in_flight']} in flight | {status['rounds_per_second']:.2f} rounds/s, "
+        f"{status['tokens_per_second']:.0f} tok/s | ETA {format_duration(status['eta_seconds'])} | {providers}"
+    )
+
+def watch(status_dir: Path, interval: float, stale_after: float) -> None:
+    """Print the status of every run in `status_dir` until interrupted."""
+    while True:
+        lines = [f"{datetime.now().strftime('%H:%M:%S')}  {status_dir}"]
+        for path in sorted(status_dir.glob('*.json')):
+            try:
+                with open(path, 'r') as f:
+                    status = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if status['state'] == 'running' and time() - status['updated'] > stale_after:
+                status['run'] += ' (stale)'
+            lines.append(format_status(status))
+        # Clear the screen so the table refreshes in place
+        print('\033[2J\033[H' + '\n'.join(lines), flush=True)
+        sleep(interval)
+
+def main():
+    """Watch the status files written by running debates and consultancies."""
+    parser = argparse.ArgumentParser(description='Watch live status of running debates and consultancies')
+    parser.add_argument('status_dir', nargs='?', default=str(STATUS_DIR), help='Directory of status files')
+    parser.add_argument('--interval', type=float, default=5, help='Seconds between refreshes')
+    parser.add_argument('--stale-after', type=float, default=3 * DEFAULT_STATUS_INTERVAL,
+                        help='Mark running shards stale when not updated for this many seconds')
+    args = parser.parse_args()
+    try:
+        watch(Path(args.status_dir), args.interval, args.stale_after)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import json
+import pytest
+import source_registry
+from claim_store import ClaimRecord, ClaimStore, ClaimViews, claim_hash, compile_store, load_claims, store_path_for
+from source_registry import SourceRegistry
+
+SHARED_SOURCE = {'title': 'WHO update', 'url': 'https://who.int/a', 'content': 'Masks reduce spread.'}
+
+CLAIMS = [
+    {
+        'claim': 'Masks reduce COVID-19 transmission',
+        'veracity': 'true',
+        'supporting_sources': [SHARED_SOURCE, {'title': 'Study', 'url': 'https://b', 'content': 'RCT results.', 'rank': 2}],
+        'opposing_sources': [{'title': 'Blog', 'url': 'https://c', 'content': 'Masks do nothing.'}]
+    },
+    {
+        'claim': 'Vitamin C cures COVID-19',
+        'veracity': 'false',
+        'label': 'misleading',
+        'supporting_sources': [],
+        'opposing_sources': [SHARED_SOURCE]
+    },
+    {'claim': 'Ünïcode claim with "quotes"', 'veracity': 'false', 'evidence': None}
+]
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    """A source registry of the test's own."""
+    registry = SourceRegistry(tmp_path / 'sources.jsonl')
+    monkeypatch.setattr(source_registry, '_registry', registry)
+    return registry
+
+@pytest.fixture
+def json_path(tmp_path):
+    """A small claims JSON file."""
+    path = tmp_path / 'claims.json'
+    path.write_text(json.dumps(CLAIMS, ensure_ascii=False), encoding='utf-8')
+    return path
+
+def test_compiled_store_round_trips_every_field(registry, json_path):
+    compile_store(json_path)
+    claims = load_claims(str(json_path))
+
+    assert isinstance(claims, ClaimStore)
+    assert len(claims) == len(CLAIMS)
+    assert [claim.to_dict() for claim in claims] == CLAIMS
+    assert list(claims[0]) == list(CLAIMS[0])
+    assert claims[-1].to_dict() == CLAIMS[-1]
+    assert claims[-3]['claim'] == CLAIMS[0]['claim']
+    assert [claim['claim'] for claim in claims[1:]] == [claim['claim'] for claim in CLAIMS[1:]]
+    assert [claim['claim'] for claim in claims[::2]] == [CLAIMS[0]['claim'], CLAIMS[2]['claim']]
+    for original in CLAIMS:
+        assert claims.by_hash(claim_hash(original['claim'])).to_dict() == original
+    with pytest.raises(IndexError):
+        claims[3]
+    with pytest.raises(KeyError):
+        claims.by_hash(claim_hash('not a claim'))
+    # The shared source is stored once
+    assert len(registry.path.read_text().splitlines()) == 3
+
+def test_views_use_the_stored_source_ids(registry, json_path):
+    compile_store(json_path)
+    view = ClaimViews(load_claims(str(json_path)))[1]
+    assert view.opposing_source_ids == (source_registry.source_id(SHARED_SOURCE),)
+    assert view.sources == [SHARED_SOURCE]
+
+def test_store_without_its_registry_falls_back_to_json(registry, json_path, monkeypatch):
+    compile_store(json_path)
+    registry.path.unlink()
+    monkeypatch.setattr(source_registry, '_registry', SourceRegistry(registry.path))
+
+    claims = load_claims(str(json_path))
+    assert claims == CLAIMS
+    # Reading the store directly fails loudly instead of returning no sources
+    record = ClaimStore(store_path_for(json_path))[0]
+    assert isinstance(record, ClaimRecord)
+    with pytest.raises(RuntimeError):
+        record.get('supporting_sources', [])
@@ -0,0 +1,57 @@
+import pytest
+
+# The agents import every provider client at module level
+for module in ('aisuite', 'requests', 'google.auth', 'openai', 'azure.ai.inference'):
+    pytest.importorskip(module)
+
+from run_consultancy import ConsultancyRunner
+from run_debate import DebateRunner
+
+SOURCES = [{'title': 'WHO update', 'url': 'https://who.int/a', 'content': 'Masks reduce spread.'}]
+CLAIM = 'Masks reduce COVID-19 transmission'
+ARGUMENT = "<thinking>t</thinking><argument>Masks work.</argument>"
+
+def stub_judge(answer_tag: str):
+    """A judge that is confident after round 1 and then gives its final verdict."""
+    responses = iter([
+        f"<thinking>sure</thinking><{answer_tag}>Any RCTs?</{answer_tag}>"
+        "<provisional>Verdict: True\nConfidence: 95",
+        "<thinking>done</thinking><decision>Verdict: True\nConfidence: 95</decision>"
+    ])
+    return lambda messages, temperature, **kwargs: next(responses)
+
+def test_debate_stops_once_the_judge_is_confident():
+    first_config, second_config, judge_config = DebateRunner._load_base_config('qwen', 'qwen', 'qwen')
+    first_config.update(claim_veracity=True, argue_for_debater_a='correct')
+    runner = DebateRunner('browsing', 'default', CLAIM, first_config, second_config, judge_config,
+                          sources=SOURCES, confidence_threshold=90)
+    for debater in (runner.first_debater, runner.second_debater):
+        debater.call_api = lambda messages, temperature, **kwargs: ARGUMENT
+    runner.judge.call_api = stub_judge(DebateRunner.JUDGE_ANSWER_TAG)
+
+    rounds = runner.run()
+
+    assert (runner.rounds_used, runner.stopped_early) == (1, True)
+    assert [round_info['round_number'] for round_info in rounds] == [1, 2]
+    assert rounds[0]['judge']['provisional_confidence'] == 95
+    assert rounds[-1]['judge_only'] is True and 'debater_a' not in rounds[-1]
+    transcript = "\n".join(runner.full_transcript)
+    assert 'Any RCTs?' in transcript
+    assert 'provisional' not in transcript.lower() and 'Confidence' not in transcript
+
+def test_consultancy_stops_once_the_judge_is_confident():
+    consultant_config, judge_config = ConsultancyRunner._load_base_config('qwen', 'qwen')
+    consultant_config.update(claim_veracity=True, argue_for='correct')
+    runner = ConsultancyRunner('browsing', 'default', CLAIM, consultant_config, judge_config,
+                               sources=SOURCES, confidence_threshold=90)
+    runner.consultant.call_api = lambda messages, temperature, **kwargs: ARGUMENT
+    runner.judge.call_api = stub_judge(ConsultancyRunner.JUDGE_ANSWER_TAG)
+
+    rounds = runner.run()
+
+    assert (runner.rounds_used, runner.stopped_early) == (1, True)
+    assert [round_info['round_number'] for round_info in rounds] == [1, 2]
+    assert rounds[-1]['judge_only'] is True and 'consultant' not in rounds[-1]
+    transcript = "\n".join(runner.full_transcript)
+    assert 'Any RCTs?' in transcript
+    assert 'provisional' not in transcript.lower() and 'Confidence' not in transcript
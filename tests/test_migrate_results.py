@@ -0,0 +1,80 @@
+import io
+import json
+import pytest
+import results_log
+from json_stream import JSONStream
+from migrate_results import MIGRATED_SUFFIX, migrate_file
+from results_log import load_results
+
+LEGACY_RESULTS = {
+    'version': 2,
+    'runs': {
+        'debate_20250101_120000': {
+            'metadata': {'debater_a_model': 'qwen', 'temperature': 0.2, 'seeds': [1, -2, 3.5e-3], 'notes': None},
+            'claims': {
+                '1': {
+                    'claim': 'Masks reduce "transmission" \\ spread',
+                    'judge_confidence_level': 85,
+                    'stopped_early': False,
+                    'rounds': [{'round_number': 1, 'judge': {'questions': 'Ünïcode ✓ and\nnewlines'}}]
+                },
+                '2': {'claim': 'Vitamin C cures COVID-19', 'rounds': [], 'source_ids': {}}
+            },
+            'telemetry': {'calls': 12, 'latency': 3.25}
+        },
+        'debate_20250102_090000': {'metadata': {}, 'claims': {}},
+        'debate_20250103_090000': {
+            'metadata': {'debater_a_model': 'gpt4o'},
+            'claims': {'1': {'claim': 'x' * 500, 'judge_final_verdict': 'False'}}
+        }
+    }
+}
+
+@pytest.fixture
+def tiny_chunks(monkeypatch):
+    """Stream legacy files a few characters at a time, so every value spans buffer refills."""
+    monkeypatch.setattr(results_log, 'JSONStream', lambda f: JSONStream(f, chunk_size=7))
+
+def test_migration_preserves_every_run(tmp_path, tiny_chunks):
+    legacy_path = tmp_path / 'results_correct.json'
+    legacy_path.write_text(json.dumps(LEGACY_RESULTS, indent=2, ensure_ascii=False), encoding='utf-8')
+    original = json.loads(legacy_path.read_text(encoding='utf-8'))
+
+    result = migrate_file(legacy_path)
+
+    assert (result.runs, result.claims, result.skipped_runs) == (3, 3, 0)
+    assert not legacy_path.exists()
+    assert (tmp_path / f"results_correct.json{MIGRATED_SUFFIX}").exists()
+    assert load_results(tmp_path / 'results_correct.jsonl') == {'runs': original['runs']}
+
+def test_migration_skips_runs_already_in_the_log(tmp_path, tiny_chunks):
+    legacy_path = tmp_path / 'results_correct.json'
+    legacy_path.write_text(json.dumps(LEGACY_RESULTS), encoding='utf-8')
+    migrate_file(legacy_path, dry_run=True)
+    assert legacy_path.exists() and not (tmp_path / 'results_correct.jsonl').exists()
+
+    migrate_file(legacy_path)
+    # An interrupted migration left the legacy file in place: nothing is migrated twice
+    (tmp_path / f"results_correct.json{MIGRATED_SUFFIX}").rename(legacy_path)
+    result = migrate_file(legacy_path)
+    assert (result.runs, result.skipped_runs) == (0, 3)
+    assert load_results(tmp_path / 'results_correct.jsonl') == {'runs': LEGACY_RESULTS['runs']}
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 1 << 20])
+def test_stream_decodes_values_across_chunk_boundaries(chunk_size):
+    document = {'a': [1, 2.5, -3e10, True, None], 'b': {'c': 'text "quoted" ✓', 'd': {}}, 'e': 12345678901234567890}
+    stream = JSONStream(io.StringIO(json.dumps(document, indent=1)), chunk_size=chunk_size)
+    decoded = {}
+    for key in stream.keys():
+        if key == 'b':
+            decoded[key] = {inner: stream.value() for inner in stream.keys()}
+        else:
+            decoded[key] = stream.value()
+    assert decoded == document
+    assert stream.peek() == ''
+
+def test_stream_rejects_malformed_objects():
+    stream = JSONStream(io.StringIO('{"a": 1 "b": 2}'), chunk_size=3)
+    with pytest.raises(ValueError):
+        for _ in stream.keys():
+            stream.value()
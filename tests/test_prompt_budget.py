@@ -0,0 +1,32 @@
+from prompt_budget import component_values, fit_messages
+from utils import count_message_tokens, format_shared_prefix
+
+SOURCES = "\n\n".join(f"Title: Source {index}\nURL: https://x/{index}\nContent: {'Masks reduce spread. ' * 30}" for index in range(6))
+TRANSCRIPT = "\n".join(f"Round {index}: {'The evidence says otherwise. ' * 20}" for index in range(1, 7))
+
+def test_sources_are_dropped_whole_to_fit_the_budget():
+    context = {'REFERENCE_SOURCES': SOURCES, 'previous_rounds_transcript_debate': TRANSCRIPT}
+    messages = [{'role': 'system', 'content': f"Sources:\n<reference_sources>\n{SOURCES}\n</reference_sources>"},
+                {'role': 'user', 'content': TRANSCRIPT}]
+    budget = count_message_tokens(messages) - 200
+
+    fitted, trimmed = fit_messages(messages, component_values(context), budget)
+
+    assert trimmed == ['REFERENCE_SOURCES']
+    assert count_message_tokens(fitted) <= budget
+    assert 'sources omitted to fit the prompt budget' in fitted[0]['content']
+    assert fitted[1] == messages[1]
+
+def test_shared_prefix_is_kept_and_the_transcript_trimmed_instead():
+    prefix = format_shared_prefix('Masks reduce COVID-19 transmission', SOURCES)
+    context = {'SHARED_PREFIX': prefix, 'previous_rounds_transcript_debate': TRANSCRIPT}
+    messages = [{'role': 'system', 'content': f"{prefix}\n\nYou are a debater."},
+                {'role': 'user', 'content': TRANSCRIPT}]
+    budget = count_message_tokens(messages) - 200
+
+    fitted, trimmed = fit_messages(messages, component_values(context), budget)
+
+    assert trimmed == ['previous_rounds_transcript_debate']
+    assert fitted[0] == messages[0]
+    assert fitted[1]['content'].startswith('[Earlier rounds omitted')
+    assert count_message_tokens(fitted) <= budget
@@ -0,0 +1,31 @@
+from results_export import round_records
+
+def debate_run(rounds):
+    """A saved debate run with one claim and the given transcript."""
+    return {
+        'metadata': {'debater_a_model': 'qwen', 'debater_b_model': 'qwen', 'judge_model': 'gpt4o', 'dataset': 'covid'},
+        'claims': {'1': {'claim': 'Masks reduce transmission', 'rounds': rounds}}
+    }
+
+def test_early_stopped_transcript_exports_only_turn_fields():
+    rounds = [
+        {
+            'round_number': 1,
+            'debater_a': {'argument': 'A1', 'thinking': None},
+            'debater_b': {'argument': 'B1'},
+            'judge': {'questions': 'Q1', 'thinking': 'T1'}
+        },
+        # Final judgement after the judge stopped the debate early
+        {'round_number': 2, 'judge_only': True, 'judge': {'thinking': 'T2', 'questions': 'Final verdict'}}
+    ]
+    rows = list(round_records('run1', 'debate', debate_run(rounds)))
+
+    assert [(row['round_number'], row['speaker'], row['field'], row['text']) for row in rows] == [
+        (1, 'debater_a', 'argument', 'A1'),
+        (1, 'debater_b', 'argument', 'B1'),
+        (1, 'judge', 'questions', 'Q1'),
+        (1, 'judge', 'thinking', 'T1'),
+        (2, 'judge', 'thinking', 'T2'),
+        (2, 'judge', 'questions', 'Final verdict')
+    ]
+    assert all(row['run_id'] == 'run1' and row['claim_id'] == '1' for row in rows)
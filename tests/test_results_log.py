@@ -0,0 +1,81 @@
+import json
+import threading
+import pytest
+import results_log
+from results_log import ResultsLog, ResultsSink, iter_records, load_results
+
+def run_data(model: str, claims: dict) -> dict:
+    """A run as the runners save it."""
+    return {'metadata': {'model': model}, 'claims': claims, 'telemetry': {'calls': len(claims)}}
+
+def claim(text: str) -> dict:
+    """A saved claim."""
+    return {'claim': text, 'judge_final_verdict': 'True', 'rounds': [{'round_number': 1, 'judge': {'questions': 'Q'}}]}
+
+def test_runs_and_streamed_runs_read_back(tmp_path):
+    path = tmp_path / 'results_correct.jsonl'
+    first = run_data('qwen', {'1': claim('a'), '2': claim('b')})
+    second = run_data('gpt4o', {'1': claim('c')})
+    streamed = run_data('qwen', {'1': claim('d'), '2': claim('e')})
+
+    with ResultsLog(path) as log:
+        log.append_run('run1', first)
+        log.append_run('run2', second)
+        # Streamed: claims as they finish, the run line last
+        for claim_id, claim_info in streamed['claims'].items():
+            log.append_claim('run3', claim_id, claim_info)
+        log.finish_run('run3', streamed, len(streamed['claims']))
+        # A streamed run whose job was killed before its run line
+        log.append_claim('run4', '1', claim('f'))
+
+    assert load_results(path) == {'runs': {'run1': first, 'run2': second, 'run3': streamed}}
+    with_incomplete = load_results(path, include_incomplete=True)['runs']
+    assert list(with_incomplete) == ['run1', 'run2', 'run3', 'run4']
+    assert with_incomplete['run4'] == {'metadata': None, 'claims': {'1': claim('f')}}
+    run_records = [record for record in iter_records(path) if record['type'] == 'run']
+    assert [record['claim_count'] for record in run_records] == [2, 1, 2]
+
+def test_partial_last_line_is_ignored(tmp_path):
+    path = tmp_path / 'results_correct.jsonl'
+    with ResultsLog(path) as log:
+        log.append_run('run1', run_data('qwen', {'1': claim('a')}))
+    with open(path, 'a') as f:
+        f.write('{"type": "claim", "run_id": "run2", "cla')
+    assert list(load_results(path, include_incomplete=True)['runs']) == ['run1']
+
+def test_parallel_appends_never_interleave(tmp_path):
+    path = tmp_path / 'results_correct.jsonl'
+    logs = [ResultsLog(path) for _ in range(4)]
+
+    def save(index):
+        for number in range(25):
+            logs[index].append_run(f"run{index}_{number}", run_data('qwen', {'1': claim('x' * 5000)}))
+
+    threads = [threading.Thread(target=save, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for log in logs:
+        log.close()
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 200
+    assert all(json.loads(line)['type'] in ('claim', 'run') for line in lines)
+    assert len(load_results(path)['runs']) == 100
+
+def test_short_write_raises(tmp_path, monkeypatch):
+    log = ResultsLog(tmp_path / 'results_correct.jsonl')
+    real_write = results_log.os.write
+    monkeypatch.setattr(results_log.os, 'write', lambda fd, data: real_write(fd, data[:10]))
+    with pytest.raises(OSError, match='Short write'):
+        log.append_run('run1', run_data('qwen', {'1': claim('a')}))
+    log.close()
+
+def test_incomplete_sink_fails_when_constructed():
+    class ClaimsOnlySink(ResultsSink):
+        def append_claim(self, run_id, claim_id, claim_info):
+            pass
+
+    with pytest.raises(TypeError):
+        ClaimsOnlySink()
@@ -0,0 +1,207 @@
+import threading
+import time
+from concurrent.futures import Future
+from scheduler import AIMDController, ProviderQueue, ProviderScheduler, is_congestion_error, submit_in_order
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    """Poll until `condition()` holds, failing the test after `timeout` seconds."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the scheduler"
+        time.sleep(0.001)
+
+def test_slots_are_granted_in_arrival_order_under_contention():
+    scheduler = ProviderScheduler({'sglang': 1})
+    provider_queue = scheduler.queue('sglang')
+    order = []
+
+    def call(index):
+        with scheduler.slot('sglang'):
+            order.append(index)
+            time.sleep(0.002)
+
+    provider_queue.acquire()
+    threads = []
+    for index in range(8):
+        thread = threading.Thread(target=call, args=(index,))
+        thread.start()
+        # Each caller is queued before the next arrives, so ticket order is known
+        wait_until(lambda: provider_queue.snapshot()['queued'] == index + 1)
+        threads.append(thread)
+    provider_queue.release()
+    for thread in threads:
+        thread.join()
+
+    assert order == list(range(8))
+    assert provider_queue.snapshot() == {'limit': 1, 'in_flight': 0, 'queued': 0}
+
+def test_in_flight_never_exceeds_limit_even_after_lowering_it():
+    provider_queue = ProviderQueue('openai', 4)
+    lock = threading.Lock()
+    active, peaks = [0], []
+
+    def call():
+        provider_queue.acquire()
+        with lock:
+            active[0] += 1
+            peaks.append((provider_queue.limit, provider_queue.in_flight))
+        time.sleep(0.005)
+        with lock:
+            active[0] -= 1
+        provider_queue.release()
+
+    # Hold every slot, then lower the limit while they are held
+    for _ in range(4):
+        provider_queue.acquire()
+    provider_queue.set_limit(2)
+    threads = [threading.Thread(target=call) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: provider_queue.snapshot()['queued'] == 12)
+    assert provider_queue.snapshot()['in_flight'] == 4
+
+    # Draining the held slots must not let anyone in until in-flight is below the new limit
+    for _ in range(2):
+        provider_queue.release()
+        time.sleep(0.01)
+        assert not peaks
+    provider_queue.release()
+    provider_queue.release()
+    for thread in threads:
+        thread.join()
+
+    assert len(peaks) == 12
+    assert all(in_flight <= limit == 2 for limit, in_flight in peaks)
+    assert provider_queue.snapshot()['in_flight'] == 0
+
+def test_submit_in_order_yields_in_input_order_within_the_window():
+    outstanding, peak = set(), [0]
+
+    def submit(item):
+        future = Future()
+        outstanding.add(item)
+        peak[0] = max(peak[0], len(outstanding))
+        future.set_result(item * 10)
+        return future
+
+    seen = []
+    for item, future in submit_in_order(submit, range(10), window=3):
+        seen.append((item, future.result()))
+        outstanding.discard(item)
+
+    assert seen == [(item, item * 10) for item in range(10)]
+    assert peak[0] == 3
+
+def test_submit_in_order_without_window_submits_everything_first():
+    submitted = []
+
+    def submit(item):
+        submitted.append(item)
+        future = Future()
+        future.set_result(item)
+        return future
+
+    results = submit_in_order(submit, range(5))
+    first_item, _ = next(results)
+    assert first_item == 0 and submitted == list(range(5))
+    assert [item for item, _ in results] == [1, 2, 3, 4]
+
+class APIError(Exception):
+    """An API client error with an HTTP status code."""
+
+    def __init__(self, message: str, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+def queue_callers(provider_queue: ProviderQueue, count: int) -> None:
+    """Make the queue report `count` waiting callers."""
+    provider_queue._waiting.extend(object() for _ in range(count))
+
+def test_limit_grows_only_after_a_full_window_of_successes_while_callers_queue():
+    provider_queue = ProviderQueue('sglang', 4)
+    controller = AIMDController(provider_queue, latency_window=1000)
+
+    # Nobody waiting: healthy calls alone never raise the limit
+    for _ in range(20):
+        controller.record(0.1)
+    assert provider_queue.limit == 4
+
+    queue_callers(provider_queue, 1)
+    for _ in range(3):
+        controller.record(0.1)
+    assert provider_queue.limit == 4
+    controller.record(0.1)
+    assert provider_queue.limit == 5
+    # The next step needs a window of the new limit's size
+    for _ in range(4):
+        controller.record(0.1)
+    assert provider_queue.limit == 5
+    controller.record(0.1)
+    assert provider_queue.limit == 6
+    assert controller.counts['increases'] == 2
+
+def test_a_burst_of_429s_cuts_the_limit_once_per_window():
+    provider_queue = ProviderQueue('openai', 8)
+    controller = AIMDController(provider_queue)
+
+    # The burst fills the window of the new limit (4 calls) after the first cut
+    for _ in range(4):
+        controller.record(0.1, APIError('Too Many Requests', status_code=429))
+    assert provider_queue.limit == 4
+    assert controller.counts == {'calls': 4, 'errors': 4, 'congestion_errors': 4, 'increases': 0, 'decreases': 1}
+
+    # Once that window has passed, the next 429 cuts again
+    controller.record(0.1, APIError('Too Many Requests', status_code=429))
+    assert provider_queue.limit == 2
+    assert controller.counts['decreases'] == 2
+
+def test_other_errors_do_not_cut_the_limit():
+    provider_queue = ProviderQueue('openai', 8)
+    controller = AIMDController(provider_queue)
+    controller.record(0.1, APIError('context length 4290 tokens exceeds the maximum', status_code=400))
+    controller.record(0.1, APIError('Error: maximum context length is 4290 tokens'))
+    assert provider_queue.limit == 8
+    assert controller.counts['errors'] == 2 and controller.counts['congestion_errors'] == 0
+
+def test_p95_latency_over_baseline_cuts_the_limit():
+    provider_queue = ProviderQueue('sglang', 8)
+    controller = AIMDController(provider_queue, latency_window=10, p95_tolerance=2.0)
+    for _ in range(10):
+        controller.record(1.0)
+    assert controller.baseline_p95 == 1.0 and provider_queue.limit == 8
+
+    controller.record(1.9)
+    assert provider_queue.limit == 8
+    controller.record(2.5)
+    assert provider_queue.limit == 4
+    assert 'p95' in controller.history[-1]['reason']
+    # The overloaded window is forgotten before latency is judged again
+    assert len(controller.latencies) == 0
+
+def test_limit_is_clamped_to_min_and_max():
+    assert AIMDController(ProviderQueue('a', 50), max_limit=32).queue.limit == 32
+    assert AIMDController(ProviderQueue('b', 1), min_limit=2).queue.limit == 2
+
+    provider_queue = ProviderQueue('openai', 4)
+    controller = AIMDController(provider_queue, min_limit=3, latency_window=1000)
+    controller.record(0.1, TimeoutError())
+    assert provider_queue.limit == 3
+    for _ in range(3):
+        controller.record(0.1)
+    controller.record(0.1, TimeoutError())
+    assert provider_queue.limit == 3
+
+    provider_queue = ProviderQueue('sglang', 4)
+    controller = AIMDController(provider_queue, max_limit=5, latency_window=1000)
+    queue_callers(provider_queue, 1)
+    for _ in range(20):
+        controller.record(0.1)
+    assert provider_queue.limit == 5
+
+def test_congestion_errors():
+    assert is_congestion_error(TimeoutError())
+    assert is_congestion_error(APIError('slow down', status_code=503))
+    assert is_congestion_error(APIError('Error code: 429 - rate limited'))
+    assert is_congestion_error(APIError('Rate limit reached for requests'))
+    assert not is_congestion_error(APIError('Error code: 429', status_code=400))
+    assert not is_congestion_error(APIError('prompt has 4290 tokens'))
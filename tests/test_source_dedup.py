@@ -0,0 +1,41 @@
+import pytest
+import source_registry
+from claim_store import ClaimView
+from source_dedup import dedupe_claim
+from source_registry import SourceRegistry
+
+STORY = "Health officials said on Monday that masks cut transmission of the virus in crowded indoor spaces by half. " * 5
+
+def source(index: int, content: str = None) -> dict:
+    """A source with distinct content unless `content` is given."""
+    words = ' '.join(f"topic{index}word{position}" for position in range(60))
+    return {'title': f"Source {index}", 'url': f"https://news{index}.example/story", 'content': content or words}
+
+@pytest.fixture(autouse=True)
+def registry(tmp_path, monkeypatch):
+    """A source registry of the test's own."""
+    registry = SourceRegistry(tmp_path / 'sources.jsonl')
+    monkeypatch.setattr(source_registry, '_registry', registry)
+    return registry
+
+def test_collapsed_copies_are_replaced_by_the_next_distinct_sources():
+    # Sources 1 and 2 are syndicated copies of source 0
+    supporting = [source(0, STORY), source(1, STORY), source(2, STORY), *(source(index) for index in range(3, 10))]
+    claim = {'claim': 'Masks reduce COVID-19 transmission', 'veracity': 'true',
+             'supporting_sources': supporting, 'opposing_sources': [source(index) for index in range(10, 13)]}
+    view = ClaimView.from_claim(claim, None)
+
+    deduped, duplicates, tokens_saved = dedupe_claim(view, top_k=7)
+
+    assert sum(map(len, duplicates.values())) == 2
+    assert [s['title'] for s in deduped.supporting_sources] == ['Source 0', *(f"Source {index}" for index in range(3, 9))]
+    assert 'news1.example' in deduped.supporting_sources[0]['url'] and 'news2.example' in deduped.supporting_sources[0]['url']
+    assert len(deduped.supporting_source_ids) == 7 and len(deduped.opposing_sources) == 3
+    assert tokens_saved > 0
+
+def test_claims_without_duplicates_are_only_cut_to_top_k():
+    claim = {'claim': 'Vitamin C cures COVID-19', 'veracity': 'false',
+             'supporting_sources': [source(index) for index in range(9)], 'opposing_sources': []}
+    view = ClaimView.from_claim(claim, None)
+    assert dedupe_claim(view, top_k=7) == (view.top_sources(7), {}, 0)
+    assert dedupe_claim(view).view == view
@@ -0,0 +1,254 @@
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import os
+import zlib
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from source_registry import SOURCE_REF, SourceRegistry, get_source_registry
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional; fall back to zlib with a preset dictionary
+    zstandard = None
+
+DICTIONARY_DIR = Path('data/dictionaries')
+
+# Names the dictionary new transcripts are compressed with
+CURRENT_DICTIONARY = 'CURRENT'
+
+# Articles are kept apart from the source registry, which holds only real retrieved sources
+ARTICLE_STORE_PATH = Path('data/articles/articles.jsonl')
+
+# Keys of a compressed transcript and of a stored article inside a claim record
+TRANSCRIPT_REF = '$transcript'
+ARTICLE_REF = '$article'
+
+# Claim fields stored as compressed blobs, and fields stored in the article store by content hash
+COMPRESSED_FIELDS = ('rounds',)
+ARTICLE_FIELDS = ('article',)
+
+DICTIONARY_SIZE = 112 * 1024
+# zlib only uses the last 32 KB of a preset dictionary
+ZLIB_DICTIONARY_SIZE = 32 * 1024
+COMPRESSION_LEVEL = 19 if zstandard else 9
+
+# Prompt templates are part of the training samples
+PROMPTS_DIR = Path('config/prompts')
+
+_article_store = None
+
+def get_article_store() -> SourceRegistry:
+    """The content-addressed store of claim articles, a registry file of its own."""
+    global _article_store
+    if _article_store is None:
+        _article_store = SourceRegistry(ARTICLE_STORE_PATH)
+    return _article_store
+
+def _common_strings_dictionary(samples: List[bytes], size: int) -> bytes:
+    """A preset dictionary of the lines and sentences repeated most across samples.
+
+    Strings are ranked by how many bytes they would save (count × length)
+    and the best are placed last, where deflate reaches them most cheaply.
+    """
+    counts = Counter()
+    for sample in samples:
+        for line in sample.split(b'\n'):
+            for sentence in line.split(b'. '):
+                if len(sentence) >= 8:
+                    counts[sentence] += 1
+    ranked = sorted((item for item in counts.items() if item[1] > 1), key=lambda item: -item[1] * len(item[0]))
+    chosen, used = [], 0
+    for string, _ in ranked:
+        if used + len(string) + 1 > size:
+            continue
+        chosen.append(string)
+        used += len(string) + 1
+    return b'\n'.join(reversed(chosen))
+
+def train_dictionary(samples: List[bytes], size: int = DICTIONARY_SIZE) -> bytes:
+    """Train a compression dictionary on sample transcripts and prompts."""
+    if zstandard is not None:
+        try:
+            return zstandard.train_dictionary(size, samples).as_bytes()
+        except zstandard.ZstdError:
+            # Too few samples to train; a raw-content dictionary still helps
+            pass
+    return _common_strings_dictionary(samples, size if zstandard else ZLIB_DICTIONARY_SIZE)
+
+def save_dictionary(data: bytes, directory: Path = DICTIONARY_DIR) -> str:
+    """Store a dictionary under its content hash, make it the current one, and return its ID."""
+    dictionary_id = hashlib.sha256(data).hexdigest()[:16]
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{dictionary_id}.dict"
+    if not path.exists():
+        temporary = path.with_suffix(f".tmp{os.getpid()}")
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+    current = directory / f"{CURRENT_DICTIONARY}.tmp{os.getpid()}"
+    current.write_text(dictionary_id)
+    os.replace(current, directory / CURRENT_DICTIONARY)
+    return dictionary_id
+
+def current_dictionary_id(directory: Path = DICTIONARY_DIR) -> Optional[str]:
+    """ID of the dictionary new transcripts are compressed with, if one was trained."""
+    path = directory / CURRENT_DICTIONARY
+    return path.read_text().strip() if path.exists() else None
+
+@lru_cache(maxsize=16)
+def load_dictionary(dictionary_id: str, directory: Path = DICTIONARY_DIR) -> bytes:
+    """Read a dictionary by ID; dictionaries never change once written."""
+    return (directory / f"{dictionary_id}.dict").read_bytes()
+
+class TranscriptCodec:
+    """Compresses JSON values into short text blobs with a shared dictionary.
+
+    A blob is `<codec>:<dictionary ID>:<base85 data>`, where the codec is
+    zstd when `zstandard` is installed and zlib otherwise, and `-` means
+    no dictionary. Blobs name their dictionary, so they stay readable after
+    a new one is trained, by either codec.
+
+    Usage:
+        codec = TranscriptCodec()                   # current dictionary, if trained
+        blob = codec.compress(claim_info['rounds'])
+        rounds = decompress_value(blob)
+    """
+
+    def __init__(self, dictionary_id: Optional[str] = None):
+        """Initialize with a dictionary (default: the current one, if any)."""
+        self.dictionary_id = dictionary_id or current_dictionary_id()
+        self.codec = 'zstd' if zstandard is not None else 'zlib'
+        if zstandard is None:
+            logging.warning("zstandard is not installed; compressing transcripts with zlib, which compresses about half as well")
+        dictionary = load_dictionary(self.dictionary_id) if self.dictionary_id else None
+        if self.codec == 'zstd':
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            self._compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL, dict_data=dict_data)
+        self._zdict = dictionary[-ZLIB_DICTIONARY_SIZE:] if dictionary else None
+
+    def compress(self, value: Any) -> str:
+        """Compress a JSON value into a blob."""
+        data = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        if self.codec == 'zstd':
+            compressed = self._compressor.compress(data)
+        else:
+            compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=self._zdict) if self._zdict else zlib.compressobj(COMPRESSION_LEVEL)
+            compressed = compressor.compress(data) + compressor.flush()
+        return f"{self.codec}:{self.dictionary_id or '-'}:{base64.b85encode(compressed).decode('ascii')}"
+
+def decompress_value(blob: str) -> Any:
+    """Decompress a blob from TranscriptCodec.compress."""
+    codec, dictionary_id, encoded = blob.split(':', 2)
+    compressed = base64.b85decode(encoded)
+    dictionary = load_dictionary(dictionary_id) if dictionary_id != '-' else None
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("This transcript was compressed with zstd; install zstandard to read it")
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        data = zstandard.ZstdDecompressor(dict_data=dict_data).decompress(compressed)
+    else:
+        decompressor = zlib.decompressobj(zdict=dictionary[-ZLIB_DICTIONARY_SIZE:]) if dictionary else zlib.decompressobj()
+        data = decompressor.decompress(compressed) + decompressor.flush()
+    return json.loads(data)
+
+def pack_claim(claim_info: Dict, codec: TranscriptCodec) -> Dict:
+    """A claim record with its transcript compressed and its article stored by content hash."""
+    packed = dict(claim_info)
+    for field in COMPRESSED_FIELDS:
+        if packed.get(field) is not None:
+            packed[field] = {TRANSCRIPT_REF: codec.compress(packed[field])}
+    for field in ARTICLE_FIELDS:
+        if isinstance(packed.get(field), str):
+            packed[field] = {ARTICLE_REF: get_article_store().intern({'content': packed[field]})}
+    return packed
+
+def unpack_claim(claim_info: Dict) -> Dict:
+    """Expand a claim record from pack_claim; other records are returned as they are."""
+    unpacked = None
+    for field, value in claim_info.items():
+        if isinstance(value, dict) and (TRANSCRIPT_REF in value or ARTICLE_REF in value or SOURCE_REF in value):
+            unpacked = unpacked if unpacked is not None else dict(claim_info)
+            if TRANSCRIPT_REF in value:
+                unpacked[field] = decompress_value(value[TRANSCRIPT_REF])
+            elif ARTICLE_REF in value:
+                unpacked[field] = get_article_store().get(value[ARTICLE_REF])['content']
+            else:
+                # Logs packed before articles had their own store
+                unpacked[field] = get_source_registry().get(value[SOURCE_REF])['content']
+    return unpacked if unpacked is not None else claim_info
+
+def training_samples(paths: Iterable[Path], limit: int) -> List[bytes]:
+    """Prompt templates plus up to `limit` transcripts from results logs, serialized as they are compressed."""
+    # Imported here: results_log imports this module to unpack claims
+    from results_log import iter_records
+    samples = [path.read_bytes() for path in sorted(PROMPTS_DIR.glob('**/*.yaml'))]
+    transcripts = 0
+    for path in paths:
+        for record in iter_records(path):
+            rounds = record.get('claim', {}).get('rounds') if record['type'] == 'claim' else None
+            if rounds:
+                samples.append(json.dumps(rounds, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                transcripts += 1
+                if transcripts >= limit:
+                    return samples
+    return samples
+
+def pack_log(path: Path, codec: TranscriptCodec) -> tuple:
+    """Rewrite a results log with packed claims; returns its size before and after.
+
+    The rewrite replaces the file, so run it while no job is appending to
+    the log. Every claim is checked to read back unchanged first, and a
+    partial last line is copied as it is.
+    """
+    temporary = path.with_name(path.name + f".tmp{os.getpid()}")
+    try:
+        with open(path, 'r', encoding='utf-8') as source, open(temporary, 'w', encoding='utf-8') as target:
+            for line in source:
+                record = json.loads(line) if line.endswith('\n') else None
+                if record is not None and record['type'] == 'claim':
+                    claim = unpack_claim(record['claim'])
+                    packed = pack_claim(claim, codec)
+                    if unpack_claim(packed) != claim:
+                        raise ValueError(f"{path}: claim {record['claim_id']} of {record['run_id']} does not round-trip")
+                    line = json.dumps({**record, 'claim': packed}, ensure_ascii=False) + '\n'
+                target.write(line)
+        before = path.stat().st_size
+        os.replace(temporary, path)
+    finally:
+        temporary.unlink(missing_ok=True)
+    return before, path.stat().st_size
+
+def main():
+    """Train the transcript dictionary, or compress existing results logs with it."""
+    parser = argparse.ArgumentParser(description='Dictionary-compressed transcript storage for results logs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    train = subparsers.add_parser('train', help='Train a dictionary on prompts and saved transcripts and make it current')
+    train.add_argument('paths', nargs='*', help='results_*.jsonl files (default: every results log under saved-data/)')
+    train.add_argument('--samples', type=int, default=5000, help='Maximum transcripts to train on')
+    train.add_argument('--size', type=int, default=DICTIONARY_SIZE, help='Dictionary size in bytes')
+    pack = subparsers.add_parser('pack', help='Rewrite results logs with compressed transcripts (while no job writes to them)')
+    pack.add_argument('paths', nargs='*', help='results_*.jsonl files (default: every results log under saved-data/)')
+    args = parser.parse_args()
+
+    from results_log import find_results_logs
+    paths = [Path(path) for path in args.paths] or [path for path in find_results_logs() if path.exists()]
+    if args.command == 'train':
+        samples = training_samples(paths, args.samples)
+        dictionary_id = save_dictionary(train_dictionary(samples, args.size))
+        print(f"Trained dictionary {dictionary_id} on {len(samples)} samples ({'zstd' if zstandard else 'zlib'})")
+        return
+    codec = TranscriptCodec()
+    total_before = total_after = 0
+    for path in paths:
+        before, after = pack_log(path, codec)
+        total_before += before
+        total_after += after
+        print(f"{path}: {before:,} -> {after:,} bytes")
+    print(f"Total: {total_before:,} -> {total_after:,} bytes ({total_before / max(total_after, 1):.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,31 @@
 from dataclasses import dataclass
-from typing import Dict, Any, Callable, Optional, List
+from typing import Dict, Any, Callable, Optional, List, Tuple
 import json
 import re
 import random
+import hashlib
+import os
+import threading
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding('o200k_base')
+except Exception:  # tiktoken is optional; fall back to a character-based estimate
+    _ENCODING = None
+
+CHARS_PER_TOKEN = 4
+
+def count_tokens(text: str) -> int:
+    """Count tokens offline with tiktoken, or estimate them from the text length."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    """Count the tokens of a chat message list, including a small per-message overhead."""
+    return sum(count_tokens(message.get('content') or '') + 4 for message in messages)
 
 @dataclass
 class PlaceholderSource:
@@ -11,14 +34,23 @@ class PlaceholderSource:
     description: str
     condition: Optional[Callable] = None
 
-def format_sources(sources_list):
-    """Format a list of source dictionaries into a string."""
+SOURCES_IN_PREFIX_NOTE = "(The reference sources are provided at the start of this conversation.)"
+
+def format_sources(sources_list, seed: Optional[int] = None):
+    """Format a list of source dictionaries into a string.
+    
+    Sources are shuffled; with a `seed` the order is reproducible, which keeps
+    the formatted text byte-identical across agents and runs.
+    """
     if not sources_list:
         raise ValueError("Sources are required for browsing setup but none were provided!")
         
     # Randomize the order of sources
     randomized_sources = sources_list.copy()  # Create a copy to not modify original
-    random.shuffle(randomized_sources)  # Shuffle the sources randomly
+    if seed is None:
+        random.shuffle(randomized_sources)  # Shuffle the sources randomly
+    else:
+        random.Random(seed).shuffle(randomized_sources)
         
     formatted = []
     for source in randomized_sources:  # Use randomized sources
@@ -34,10 +66,63 @@ def format_sources(sources_list):
         
     return "\n\n".join(formatted)
 
+def claim_source_seed(run_seed: int, claim: str) -> int:
+    """Derive the per-claim source ordering seed from the run seed and the claim text."""
+    digest = hashlib.sha256(f"{run_seed}:{claim}".encode('utf-8')).hexdigest()
+    return int(digest[:16], 16)
+
+def format_shared_prefix(claim: str, sources_text: str) -> str:
+    """Format the claim and sources block that leads every source-reading agent's prompt."""
+    return (
+        f"Claim under discussion: \"{claim}\"\n\n"
+        f"Reference sources:\n<reference_sources>\n{sources_text}\n</reference_sources>"
+    )
+
+PERSONAS_PATH = './personas/all_personas.json'
+
+class PersonaRepository:
+    """Process-wide cache of a personas file, keyed by Prolific ID.
+
+    The file is parsed once and re-read only when its mtime changes, so
+    lookups are dictionary hits however many claims or threads ask.
+    """
+
+    def __init__(self, path: str):
+        """Initialize the repository without reading the file yet."""
+        self.path = path
+        self._personas = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def all(self) -> Dict[str, Dict]:
+        """Get every persona, reloading the file if it changed on disk."""
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with open(self.path, 'r') as file:
+                        self._personas = json.load(file)
+                    self._mtime = mtime
+        return self._personas
+
+    def get(self, prolific_id: str) -> Dict:
+        """Get the persona for a Prolific ID."""
+        return self.all()[prolific_id]
+
+_persona_repositories: Dict[str, PersonaRepository] = {}
+_persona_repositories_lock = threading.Lock()
+
+def get_persona_repository(path: str = PERSONAS_PATH) -> PersonaRepository:
+    """Get the shared persona repository for a personas file."""
+    key = os.path.abspath(path)
+    if key not in _persona_repositories:
+        with _persona_repositories_lock:
+            if key not in _persona_repositories:
+                _persona_repositories[key] = PersonaRepository(path)
+    return _persona_repositories[key]
+
 def load_persona(prolific_id: str):
-    with open('./personas/all_personas.json', 'r') as file:
-        personas = json.load(file)
-        return personas[prolific_id]
+    return get_persona_repository().get(prolific_id)
 
 class PlaceholderManager:
     """Manages dynamic values that get inserted into prompt templates."""
@@ -47,6 +132,19 @@ class PlaceholderManager:
         'consultancy': 'consultant_settings'
     }
     
+    # Every key get_context can produce
+    PLACEHOLDER_KEYS = frozenset({
+        'WORD_LIMIT', 'CLAIM', 'ROUND_THINKING_ADVICE', 'REFERENCE_SOURCES', 'SHARED_PREFIX',
+        'PERSONA_DESC', 'PERSONA_DIR', 'ANSWER_DEFENDING', 'ANSWER_OPPOSING'
+    })
+    
+    # Keys the agents and runners add to the context themselves
+    RUNTIME_KEYS = frozenset({
+        'NAME', 'OPPONENT_NAME', 'NAME_A', 'NAME_B', 'ANSWER_A', 'ANSWER_B', 'round_number',
+        'previous_rounds_transcript_debate', 'previous_rounds_transcript_consultant',
+        'previous_rounds_transcript_judge', 'entire_consultant_judge_transcript'
+    })
+    
     def __init__(self, config: Dict, agent_type: str, mode: str, claim: str = None, sources: List[Dict] = None):
         """Initialize the placeholder manager."""
         self.config = config
@@ -55,6 +153,9 @@ class PlaceholderManager:
         self._judge_prolific_id = config.get('judge_prolific_id')
         self.claim = claim
         self._raw_sources = sources  # Store sources in a separate variable
+        self._source_seed = config.get('source_seed')
+        self._shared_prefix = bool(config.get('shared_prefix'))
+        self._formatted_sources = None
         self.context = {}
         self._define_sources()
 
@@ -90,10 +191,15 @@ class PlaceholderManager:
                 condition=lambda: self.mode == 'debate'
             ),
             'REFERENCE_SOURCES': PlaceholderSource(
-                getter=lambda: format_sources(self._raw_sources) if self._raw_sources else "",
+                getter=lambda: SOURCES_IN_PREFIX_NOTE if self._shared_prefix else self._get_formatted_sources(),
                 description="Information from sources",
                 condition=lambda: 'browsing' in self.agent_type
             ),
+            'SHARED_PREFIX': PlaceholderSource(
+                getter=lambda: format_shared_prefix(self.claim, self._get_formatted_sources()),
+                description="Claim and sources block placed first in every source-reading agent's prompt",
+                condition=lambda: self._shared_prefix and 'browsing' in self.agent_type
+            ),
             'PERSONA_DESC': PlaceholderSource(
                 getter=lambda: load_persona(self._judge_prolific_id)['description'],
                 description="Judge's persona info, third person",
@@ -148,6 +254,12 @@ class PlaceholderManager:
                 )
             })
 
+    def _get_formatted_sources(self) -> str:
+        """Format the sources once so every placeholder sees the same ordering."""
+        if self._formatted_sources is None:
+            self._formatted_sources = format_sources(self._raw_sources, self._source_seed) if self._raw_sources else ""
+        return self._formatted_sources
+
     def get_context(self) -> Dict[str, Any]:
         """Get all placeholder values that should be included in prompts."""
         context = {}
@@ -182,3 +294,19 @@ def extract_content(response: str, tag_name: str) -> str:
 def format_transcript(round_num: int, response: str) -> str:
     """Format response transcript with round number."""
     return f"<round_{round_num}>\n{response}\n</round_{round_num}>"
+
+def strip_provisional(response: str) -> str:
+    """Remove the judge's provisional verdict block, which the other agents must not see."""
+    return re.sub(r'<provisional>.*?(?:</provisional>|$)', '', response, flags=re.DOTALL | re.IGNORECASE)
+
+def extract_provisional_verdict(response: str) -> Tuple[Optional[str], Optional[int]]:
+    """Extract the judge's provisional verdict and confidence, or (None, None) if absent."""
+    match = re.search(r'<provisional>(.*?)(?:</provisional>|$)', response, re.DOTALL | re.IGNORECASE)
+    if not match:
+        return None, None
+    
+    verdict_match = re.search(r'verdict:\s*(true|false)', match.group(1), re.IGNORECASE)
+    confidence_match = re.search(r'confidence:\s*(\d{1,3})', match.group(1), re.IGNORECASE)
+    verdict = verdict_match.group(1).capitalize() if verdict_match else None
+    confidence = int(confidence_match.group(1)) if confidence_match else None
+    return verdict, confidence